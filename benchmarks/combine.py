@@ -0,0 +1,308 @@
+import os
+from tempfile import mkdtemp
+from timeit import default_timer
+
+from ocdsmerge import Merger
+
+import ocdskit.packager
+from benchmarks.data import RELEASE_SCHEMA, release_packages
+from ocdskit.combine import combine_release_packages, merge, package_releases
+from ocdskit.packager import Packager, ReleaseCache, ReleaseDeduplicator, SQLiteBackend
+from ocdskit.util import json_dumpb
+
+# The settings of the SQLite backend to compare.
+SQLITE_SETTINGS = {
+    # Hold the database in memory until it exceeds 64 MiB.
+    'default': {},
+    # Always hold the database in memory.
+    'memory': {'memory_limit': 2 ** 62},
+    # Always write the database to a temporary file.
+    'file': {'memory_limit': 0},
+    # Write the database to a temporary file, with SQLite's default PRAGMAs (the behavior before tuning).
+    'untuned': {'memory_limit': 0, 'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'page_size': 4096,
+                                               'cache_size': -2000, 'mmap_size': 0}},
+    # Sort in memory, instead of in temporary files.
+    'temp_store': {'memory_limit': 0, 'pragmas': {'temp_store': 'MEMORY'}},
+    # Don't memory-map the temporary file.
+    'no_mmap': {'memory_limit': 0, 'pragmas': {'mmap_size': 0}},
+}
+
+
+class Backend:
+    """
+    Selects the packager's backend: ``sqlite``, ``sort``, ``hybrid`` or ``python``.
+    """
+    def setup(self, n, backend):
+        if backend == 'sqlite' and not ocdskit.packager.USING_SQLITE:
+            raise NotImplementedError  # asv skips the benchmark
+
+        self.backend = backend
+        self.data = release_packages(n)
+
+
+class Merge(Backend):
+    """
+    Measures merging releases into compiled releases, with each backend, and without a backend, if presorted.
+    """
+    params = ([100, 1000], ['sqlite', 'sort', 'hybrid', 'python', 'presorted'])
+    param_names = ['releases', 'backend']
+
+    def _merge(self, **kwargs):
+        # The releases of each OCID are consecutive in the data.
+        if self.backend == 'presorted':
+            kwargs['presorted'] = True
+        else:
+            kwargs['backend'] = self.backend
+
+        for _ in merge(self.data, schema=RELEASE_SCHEMA, **kwargs):
+            pass
+
+    def time_merge(self, n, backend):
+        self._merge()
+
+    def time_merge_versioned(self, n, backend):
+        self._merge(return_versioned_release=True)
+
+    def peakmem_merge(self, n, backend):
+        self._merge()
+
+    def track_throughput(self, n, backend):
+        start = default_timer()
+        self._merge()
+        return n / (default_timer() - start)
+
+    track_throughput.unit = 'releases/s'
+
+
+class MergeWorkers:
+    """
+    Measures merging releases into compiled releases, with many processes.
+    """
+    params = ([1000, 10000], [1, 2, 4])
+    param_names = ['releases', 'workers']
+
+    def setup(self, n, workers):
+        self.data = release_packages(n)
+
+    def time_merge(self, n, workers):
+        for _ in merge(self.data, schema=RELEASE_SCHEMA, workers=workers):
+            pass
+
+
+class MergeCache:
+    """
+    Measures merging releases into compiled releases, with a cache that is cold (empty) or warm (filled by an earlier
+    run).
+    """
+    params = ([1000, 10000], ['cold', 'warm'])
+    param_names = ['releases', 'cache']
+
+    def setup(self, n, cache):
+        if not ocdskit.packager.USING_SQLITE:
+            raise NotImplementedError  # asv skips the benchmark
+
+        self.data = release_packages(n)
+        self.directory = mkdtemp()
+        if cache == 'warm':
+            self._merge('warm.db')
+
+    def teardown(self, n, cache):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def _merge(self, name):
+        with ReleaseCache(os.path.join(self.directory, name)) as cache:
+            for _ in merge(self.data, schema=RELEASE_SCHEMA, cache=cache):
+                pass
+
+    def time_merge(self, n, cache):
+        # A cold cache is created by each repeat, and a warm cache is reused.
+        self._merge('warm.db' if cache == 'warm' else '{}.db'.format(default_timer()))
+
+
+class MergeDuplicates:
+    """
+    Measures merging releases into compiled releases, if each release is published twice, without deduplication, and
+    with deduplication in memory, on disk, and comparing content.
+    """
+    params = ([1000, 10000], ['none', 'memory', 'disk', 'content'])
+    param_names = ['releases', 'deduplicate']
+
+    def setup(self, n, deduplicate):
+        if deduplicate == 'disk' and not ocdskit.packager.USING_SQLITE:
+            raise NotImplementedError  # asv skips the benchmark
+
+        self.data = release_packages(n) * 2
+
+    def _merge(self, deduplicate):
+        if deduplicate == 'none':
+            for _ in merge(self.data, schema=RELEASE_SCHEMA):
+                pass
+            return
+
+        options = {'on_disk': deduplicate == 'disk', 'compare_content': deduplicate == 'content'}
+        with ReleaseDeduplicator(**options) as deduplicator:
+            for _ in merge(self.data, schema=RELEASE_SCHEMA, deduplicator=deduplicator):
+                pass
+
+    def time_merge(self, n, deduplicate):
+        self._merge(deduplicate)
+
+    def peakmem_merge(self, n, deduplicate):
+        self._merge(deduplicate)
+
+
+class PackagerBackend(Backend):
+    """
+    Measures adding releases to, and getting releases from, each backend, without merging.
+    """
+    params = ([1000, 10000], ['sqlite', 'sort', 'hybrid', 'python'])
+    param_names = ['releases', 'backend']
+
+    def time_add(self, n, backend):
+        with Packager(backend=backend) as packager:
+            packager.add(self.data)
+
+    def time_add_and_get(self, n, backend):
+        with Packager(backend=backend) as packager:
+            packager.add(self.data)
+            for _, rows in packager.backend.get_releases_by_ocid():
+                list(rows)
+
+    def peakmem_add(self, n, backend):
+        with Packager(backend=backend) as packager:
+            packager.add(self.data)
+
+
+class PackagerCodec:
+    """
+    Measures adding releases to, and getting releases from, each backend, with each codec, without merging.
+    """
+    params = ([10000], ['sqlite', 'sort', 'hybrid', 'python'], ['json', 'zlib'])
+    param_names = ['releases', 'backend', 'codec']
+
+    def setup(self, n, backend, codec):
+        Backend.setup(self, n, backend)
+
+    def _add_and_get(self, backend, codec):
+        options = {'codec': codec}
+        if backend == 'sqlite':
+            # Write the database to a temporary file, so that its size is written to disk.
+            options['memory_limit'] = 0
+
+        with Packager(backend=backend, backend_options=options) as packager:
+            packager.add(self.data)
+            for _, rows in packager.backend.get_releases_by_ocid():
+                list(rows)
+
+    def time_add_and_get(self, n, backend, codec):
+        self._add_and_get(backend, codec)
+
+    def peakmem_add_and_get(self, n, backend, codec):
+        self._add_and_get(backend, codec)
+
+
+class PackagerHybrid:
+    """
+    Measures adding releases to, and getting releases from, the hybrid backend, if the releases are held in memory,
+    if they exceed the memory budget, and if they are expected to exceed it once sampled.
+    """
+    params = ([10000], ['memory', 'exceeded', 'estimated'])
+    param_names = ['releases', 'budget']
+
+    def setup(self, n, budget):
+        self.data = release_packages(n)
+
+        self.options = {}
+        if budget != 'memory':
+            self.options['max_memory'] = 10 * 1024 * 1024
+        if budget == 'estimated':
+            self.options['input_size'] = sum(len(json_dumpb(package)) for package in self.data)
+
+    def _add_and_get(self, budget):
+        with Packager(backend='hybrid', backend_options=self.options) as packager:
+            packager.add(self.data)
+            for _, rows in packager.backend.get_releases_by_ocid():
+                list(rows)
+
+    def time_add_and_get(self, n, budget):
+        self._add_and_get(budget)
+
+    def peakmem_add_and_get(self, n, budget):
+        self._add_and_get(budget)
+
+
+class SQLiteSettings:
+    """
+    Measures adding releases to, and getting releases from, the SQLite backend, with each setting in
+    ``SQLITE_SETTINGS``.
+    """
+    params = ([10000], list(SQLITE_SETTINGS))
+    param_names = ['releases', 'setting']
+
+    def setup(self, n, setting):
+        if not ocdskit.packager.USING_SQLITE:
+            raise NotImplementedError  # asv skips the benchmark
+
+        self.data = release_packages(n)
+
+    def _add_and_get(self, setting):
+        backend = SQLiteBackend(**SQLITE_SETTINGS[setting])
+        try:
+            for package in self.data:
+                for release in package['releases']:
+                    backend.add_release(release, package['uri'])
+                backend.flush()
+            for _, rows in backend.get_releases_by_ocid():
+                list(rows)
+        finally:
+            backend.close()
+
+    def time_add_and_get(self, n, setting):
+        self._add_and_get(setting)
+
+    def peakmem_add_and_get(self, n, setting):
+        self._add_and_get(setting)
+
+    def track_throughput(self, n, setting):
+        start = default_timer()
+        self._add_and_get(setting)
+        return n / (default_timer() - start)
+
+    track_throughput.unit = 'releases/s'
+
+
+class OutputRecords(Backend):
+    """
+    Measures building a record package, with linked releases.
+    """
+    params = ([100, 1000], ['sqlite', 'sort', 'hybrid', 'python'])
+    param_names = ['releases', 'backend']
+
+    def setup(self, n, backend):
+        super().setup(n, backend)
+        self.merger = Merger(RELEASE_SCHEMA)
+
+    def time_output_package(self, n, backend):
+        with Packager(backend=backend) as packager:
+            packager.add(self.data)
+            next(packager.output_package(self.merger, use_linked_releases=True))
+
+
+class Package:
+    """
+    Measures combining release packages and packaging releases.
+    """
+    params = ([1000, 10000],)
+    param_names = ['releases']
+
+    def setup(self, n):
+        self.data = release_packages(n)
+        self.releases = [release for package in self.data for release in package['releases']]
+
+    def time_combine_release_packages(self, n):
+        combine_release_packages(self.data)
+
+    def time_package_releases(self, n):
+        package_releases(self.releases)
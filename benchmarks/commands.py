@@ -0,0 +1,53 @@
+import os
+import pathlib
+import sys
+import tempfile
+from io import TextIOWrapper
+from unittest.mock import patch
+
+from benchmarks.data import RELEASE_SCHEMA, release_packages
+from ocdskit.cli.__main__ import main
+from ocdskit.util import json_dumpb
+
+# The arguments for each command, which read the input file. Commands that access the network are omitted.
+COMMANDS = {
+    'echo': ['echo'],
+    'echo --jsonl': ['echo', '--jsonl'],
+    'compile': ['compile', '--schema', RELEASE_SCHEMA],
+    'compile --package': ['compile', '--schema', RELEASE_SCHEMA, '--package', '--linked-releases'],
+    'upgrade': ['upgrade', '1.0:1.1'],
+    'package-releases': ['package-releases', '--root-path', 'releases.item'],
+    'combine-release-packages': ['combine-release-packages'],
+    'split-release-packages': ['split-release-packages', '10'],
+    'tabulate': ['tabulate', 'sqlite://', '--schema', pathlib.Path(RELEASE_SCHEMA).as_uri()],
+}
+
+
+class Command:
+    """
+    Measures running each command on release packages, from reading the input to writing the output.
+    """
+    params = ([1000], list(COMMANDS))
+    param_names = ['releases', 'command']
+
+    def setup(self, n, command):
+        self.file = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False)
+        for package in release_packages(n):
+            self.file.write(json_dumpb(package) + b'\n')
+        self.file.close()
+
+    def teardown(self, n, command):
+        os.unlink(self.file.name)
+
+    def _run(self, command):
+        argv = ['ocdskit'] + COMMANDS[command] + ['--input', self.file.name]
+        with open(os.devnull, 'wb') as devnull, patch('sys.stdout', TextIOWrapper(devnull)), \
+                patch('sys.argv', argv):
+            main()
+            sys.stdout.flush()
+
+    def time_command(self, n, command):
+        self._run(command)
+
+    def peakmem_command(self, n, command):
+        self._run(command)
@@ -0,0 +1,73 @@
+"""
+Builds scaled datasets for benchmarks from the test fixtures.
+"""
+import copy
+import glob
+import json
+import os.path
+
+import ijson
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fixtures')
+
+# The release schema to use for merging, so that benchmarks don't access the network.
+RELEASE_SCHEMA = os.path.join(FIXTURES, 'release-schema.json')
+
+
+def path(filename):
+    return os.path.join(FIXTURES, filename)
+
+
+def read(filename):
+    """
+    Returns the parsed JSON of a fixture.
+    """
+    with open(path(filename)) as f:
+        return json.load(f)
+
+
+def read_realdata():
+    """
+    Returns the packages in ``tests/fixtures/realdata`` as JSON Lines.
+    """
+    data = b''
+    for filename in sorted(glob.glob(path(os.path.join('realdata', '*package*.json')))):
+        # Skip the fixture that isn't UTF-8.
+        if 'iso-8859-1' not in filename:
+            with open(filename, 'rb') as f:
+                for item in ijson.items(f, '', multiple_values=True, use_float=True):
+                    data += json.dumps(item).encode() + b'\n'
+    return data
+
+
+def releases(n, releases_per_ocid=4, version='1.1'):
+    """
+    Returns ``n`` releases copied from the "realdata" fixtures, with ``releases_per_ocid`` releases per OCID.
+    """
+    if version == '1.0':
+        templates = read('realdata/release-package_1.0-1.json')['releases']
+    else:
+        templates = read('realdata/release-package-1.json')['releases'] + \
+            read('realdata/release-package-2.json')['releases']
+
+    output = []
+    for i in range(n):
+        release = copy.deepcopy(templates[i % len(templates)])
+        release['ocid'] = 'ocds-213czf-{:08d}'.format(i // releases_per_ocid)
+        release['id'] = '{}-{}'.format(release['ocid'], i)
+        output.append(release)
+    return output
+
+
+def release_packages(n, size=100, **kwargs):
+    """
+    Returns release packages of ``size`` releases each, containing ``n`` releases in all.
+    """
+    data = releases(n, **kwargs)
+    return [{
+        'uri': 'http://example.com/{}.json'.format(i),
+        'publishedDate': '2001-02-03T04:05:06Z',
+        'publisher': {'name': 'Acme'},
+        'version': '1.1',
+        'releases': data[i:i + size],
+    } for i in range(0, n, size)]
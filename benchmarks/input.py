@@ -0,0 +1,46 @@
+from io import BytesIO
+from timeit import default_timer
+
+from ocdskit.cli.commands.base import InputReader
+
+SIZE = 16 * 1024 * 1024
+
+BUF_SIZE = 64 * 1024
+
+
+def _read(reader):
+    while reader.read(BUF_SIZE):
+        pass
+
+
+class Transcode:
+    """
+    Measures the throughput of reading data with the ``--encoding`` option.
+    """
+    params = (['ascii', 'latin-1', 'shift_jis'], ['iso-8859-1', 'cp1252', 'shift_jis', 'utf-8'])
+    param_names = ['data', 'encoding']
+
+    def setup(self, data, encoding):
+        if data == 'ascii':
+            text = '{"name": "Acme Inc.", "amount": 123.45}\n'
+        elif data == 'latin-1':
+            text = '{"name": "Compañía Eléctrica", "amount": 123.45}\n'
+        else:
+            text = '{"name": "株式会社", "amount": 123.45}\n'
+
+        try:
+            chunk = text.encode(encoding)
+        except UnicodeEncodeError:
+            raise NotImplementedError  # asv skips the benchmark
+
+        self.data = chunk * (SIZE // len(chunk))
+
+    def time_read(self, data, encoding):
+        _read(InputReader(BytesIO(self.data), encoding))
+
+    def track_throughput(self, data, encoding):
+        start = default_timer()
+        _read(InputReader(BytesIO(self.data), encoding))
+        return len(self.data) / (default_timer() - start) / 1024 / 1024
+
+    track_throughput.unit = 'MB/s'
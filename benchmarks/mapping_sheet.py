@@ -0,0 +1,22 @@
+import pathlib
+from io import StringIO
+
+import jsonref
+
+from benchmarks.data import RELEASE_SCHEMA, read
+from ocdskit.mapping_sheet import mapping_sheet
+
+
+class MappingSheet:
+    """
+    Measures writing a mapping sheet for the release schema.
+    """
+    def setup(self):
+        base_uri = pathlib.Path(RELEASE_SCHEMA).as_uri()
+        self.schema = jsonref.JsonRef.replace_refs(read('release-schema.json'), base_uri=base_uri)
+
+    def time_mapping_sheet(self):
+        mapping_sheet(self.schema, StringIO())
+
+    def time_mapping_sheet_include_definitions(self):
+        mapping_sheet(read('release-schema.json'), StringIO(), include_definitions=True)
@@ -0,0 +1,24 @@
+from benchmarks.data import RELEASE_SCHEMA, release_packages
+from ocdskit.combine import merge
+from ocdskit.oc4ids import run_transforms
+
+
+class RunTransforms:
+    """
+    Measures transforming releases into an OC4IDS project, with all transforms.
+
+    The records are merged in ``setup``, so that ``run_transforms`` doesn't access the network for the schema.
+    """
+    params = ([100, 1000],)
+    param_names = ['releases']
+
+    def setup(self, n):
+        self.data = release_packages(n)
+        package = next(merge(self.data, schema=RELEASE_SCHEMA, return_package=True, use_linked_releases=True))
+        self.records = package['records']
+
+    def time_run_transforms(self, n):
+        run_transforms({'all': True}, self.data, records=self.records)
+
+    def peakmem_run_transforms(self, n):
+        run_transforms({'all': True}, self.data, records=self.records)
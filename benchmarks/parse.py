@@ -0,0 +1,47 @@
+from io import BytesIO
+
+import ijson
+
+from benchmarks.data import read_realdata
+from ocdskit.cli.commands.base import _read_lines
+from ocdskit.util import IJSON_BACKENDS, json_loads
+
+# The number of times to repeat the fixtures, so that parsing takes longer than reading.
+REPEAT = 10
+
+
+class Parse:
+    """
+    Measures the time to parse the packages in ``tests/fixtures/realdata`` with each ijson backend.
+    """
+    params = (IJSON_BACKENDS,)
+    param_names = ['backend']
+
+    def setup(self, backend):
+        try:
+            self.backend = ijson.get_backend(backend)
+        except ImportError:
+            raise NotImplementedError  # asv skips the benchmark
+
+        self.data = read_realdata() * REPEAT
+
+    def time_items(self, backend):
+        for _ in self.backend.items(BytesIO(self.data), '', multiple_values=True):
+            pass
+
+    def time_parse(self, backend):
+        for _ in self.backend.parse(BytesIO(self.data), multiple_values=True):
+            pass
+
+
+class ParseLines:
+    """
+    Measures the time to parse the packages in ``tests/fixtures/realdata`` as JSON Lines, like ``--jsonl``.
+    """
+    def setup(self):
+        self.data = read_realdata() * REPEAT
+
+    def time_items(self):
+        for line in _read_lines(BytesIO(self.data), 64 * 1024):
+            if line:
+                json_loads(line)
@@ -0,0 +1,51 @@
+from timeit import default_timer
+
+import ocdskit.util
+from benchmarks.data import release_packages
+from ocdskit.util import iterencodeb, json_dumpb, json_loads
+
+
+class Serialize:
+    """
+    Measures dumping and loading JSON with orjson and with the standard library.
+    """
+    params = ([1000, 10000], ['orjson', 'json'])
+    param_names = ['releases', 'library']
+
+    def setup(self, n, library):
+        self.using_orjson = ocdskit.util.USING_ORJSON
+        if library == 'orjson':
+            if not self.using_orjson:
+                raise NotImplementedError  # asv skips the benchmark
+        else:
+            ocdskit.util.USING_ORJSON = False
+
+        self.data = release_packages(n)
+        self.dumped = [json_dumpb(package) for package in self.data]
+
+    def teardown(self, n, library):
+        ocdskit.util.USING_ORJSON = self.using_orjson
+
+    def time_json_dumpb(self, n, library):
+        for package in self.data:
+            json_dumpb(package)
+
+    def time_json_dumpb_indent(self, n, library):
+        for package in self.data:
+            json_dumpb(package, indent=2)
+
+    def time_iterencodeb(self, n, library):
+        for package in self.data:
+            for _ in iterencodeb(dict(package, releases=iter(package['releases']))):
+                pass
+
+    def time_json_loads(self, n, library):
+        for data in self.dumped:
+            json_loads(data)
+
+    def track_dumpb_throughput(self, n, library):
+        start = default_timer()
+        size = sum(len(json_dumpb(package)) for package in self.data)
+        return size / (default_timer() - start) / 1024 / 1024
+
+    track_dumpb_throughput.unit = 'MB/s'
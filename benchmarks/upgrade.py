@@ -0,0 +1,36 @@
+import json
+from collections import OrderedDict
+
+from benchmarks.data import release_packages
+from ocdskit.upgrade import upgrade_10_11
+
+
+class Upgrade:
+    """
+    Measures upgrading release packages from OCDS 1.0 to 1.1.
+
+    As ``upgrade_10_11`` edits its input, each run parses the packages first: subtract ``time_loads`` from
+    ``time_upgrade_10_11`` to get the time to upgrade.
+    """
+    params = ([100, 1000],)
+    param_names = ['releases']
+
+    def setup(self, n):
+        packages = release_packages(n, version='1.0')
+        for package in packages:
+            del package['version']
+        self.data = [json.dumps(package) for package in packages]
+
+    def _loads(self):
+        return [json.loads(package, object_pairs_hook=OrderedDict) for package in self.data]
+
+    def time_loads(self, n):
+        self._loads()
+
+    def time_upgrade_10_11(self, n):
+        for package in self._loads():
+            upgrade_10_11(package)
+
+    def peakmem_upgrade_10_11(self, n):
+        for package in self._loads():
+            upgrade_10_11(package)
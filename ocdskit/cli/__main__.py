@@ -6,17 +6,21 @@ import warnings
 
 import ijson
 
+from ocdskit.cli.commands.base import FLUSH_INTERVAL, OUTPUT_BUFFER_SIZE
 from ocdskit.exceptions import CommandError
+from ocdskit.util import BUF_SIZE, IJSON_BACKENDS, json_dump, set_ijson_backend
 
 logger = logging.getLogger('ocdskit')
 
 COMMAND_MODULES = (
+    'ocdskit.cli.commands.cache_schemas',
     'ocdskit.cli.commands.combine_record_packages',
     'ocdskit.cli.commands.combine_release_packages',
     'ocdskit.cli.commands.compile',
     'ocdskit.cli.commands.convert_to_oc4ids',
     'ocdskit.cli.commands.detect_format',
     'ocdskit.cli.commands.echo',
+    'ocdskit.cli.commands.generate',
     'ocdskit.cli.commands.indent',
     'ocdskit.cli.commands.mapping_sheet',
     'ocdskit.cli.commands.package_records',
@@ -34,33 +38,52 @@ COMMAND_MODULES = (
 
 
 def main():
-    parser = argparse.ArgumentParser(description='Open Contracting Data Standard CLI')
-    parser.add_argument('--encoding', help='the file encoding')
-    parser.add_argument('--ascii', help='print escape sequences instead of UTF-8 characters', action='store_true')
-    parser.add_argument('--pretty', help='pretty print output', action='store_true')
-
-    subparsers = parser.add_subparsers(dest='subcommand')
-
-    subcommands = {}
+    # Only the chosen command's module is imported, as some modules import slow or optional dependencies (sqlalchemy,
+    # jsonschema, ocdsextensionregistry, etc.). Each command's name is derived from its module's name.
+    parser, command = _create_parser()
+    args, _ = parser.parse_known_args()
 
-    for module in COMMAND_MODULES:
+    if args.subcommand:
+        module = _command_module(args.subcommand)
         try:
-            command = importlib.import_module(module).Command(subparsers)
+            parser, command = _create_parser(module)
         except ImportError as e:
             logger.error('exception "%s" prevented loading of %s module', e, module)
-        else:
-            subcommands[command.name] = command
+            sys.exit(1)
 
     args = parser.parse_args()
 
-    if args.subcommand:
-        command = subcommands[args.subcommand]
+    if command:
         try:
+            if args.parser:
+                try:
+                    set_ijson_backend(args.parser)
+                except ImportError as e:
+                    raise CommandError('--parser {} is unavailable: {}'.format(args.parser, e)) from e
+
+            if args.compress and not command.prints_json:
+                raise CommandError('--compress is unavailable, because the {} command does not print JSON'.format(
+                    args.subcommand))
+
             command.args = args
+            if args.stats or args.stats_file or args.trace_memory:
+                # The modules for statistics and profiling are imported only if used.
+                from ocdskit.stats import Stats
+
+                command.stats = Stats(trace_memory=args.trace_memory)
+            profiler = _create_profiler(args)
             try:
                 with warnings.catch_warnings():
                     warnings.showwarning = _showwarning
-                    command.handle()
+                    if profiler:
+                        profiler.start()
+                    try:
+                        command.handle()
+                    finally:
+                        command.close()
+                        if profiler:
+                            profiler.stop()
+                        _report_stats(command.stats, args)
             except ijson.common.IncompleteJSONError as e:
                 if e.args and isinstance(e.args[0], (bytes, UnicodeDecodeError)):
                     message = e.args[0]
@@ -77,6 +100,105 @@ def main():
         parser.print_help()
 
 
+def _create_parser(module=None):
+    """
+    Returns a parser with a subparser for each command, and the command instance for the given module, if any.
+
+    Only the given module is imported. The other commands' subparsers have no arguments.
+    """
+    parser = argparse.ArgumentParser(description='Open Contracting Data Standard CLI')
+    parser.add_argument('--encoding', help='the file encoding')
+    parser.add_argument('--ascii', help='print escape sequences instead of UTF-8 characters', action='store_true')
+    parser.add_argument('--pretty', help='pretty print output', action='store_true')
+    parser.add_argument('--buffer-size', type=_positive_int, default=BUF_SIZE,
+                        help='the number of bytes to read from the input at a time (default {})'.format(BUF_SIZE))
+    parser.add_argument('--output-buffer-size', type=_positive_int, default=OUTPUT_BUFFER_SIZE,
+                        help='the number of bytes to buffer before writing output (default {})'.format(
+                            OUTPUT_BUFFER_SIZE))
+    parser.add_argument('--flush-interval', type=float, default=FLUSH_INTERVAL,
+                        help='the maximum number of seconds to buffer output, or 0 to write each item immediately '
+                             '(default {})'.format(FLUSH_INTERVAL))
+    parser.add_argument('--parser', choices=IJSON_BACKENDS,
+                        help='the ijson backend with which to parse JSON (default the fastest available)')
+    parser.add_argument('--stats', action='store_true',
+                        help='print the throughput and the time of each phase to standard error at exit')
+    parser.add_argument('--stats-file', metavar='PATH',
+                        help='write the throughput and the time of each phase to this JSON file at exit')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='trace memory allocations, and print the peak memory usage and the top allocation sites '
+                             'at each checkpoint to standard error at exit (slow)')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='profile the command, and write the profile to this file')
+    parser.add_argument('--profile-mode', choices=('cprofile', 'sample'), default='cprofile',
+                        help='if --profile is set, "cprofile" profiles every function call and writes a pstats '
+                             'file; "sample" samples the stack at intervals and writes a folded stacks file for flame '
+                             'graphs (default cprofile)')
+    parser.add_argument('--profile-interval', type=float,
+                        help='if --profile-mode is "sample", the number of seconds of CPU time between samples '
+                             '(default 0.01)')
+    parser.add_argument('--compress', choices=('gzip', 'bz2', 'xz'), help='compress JSON output')
+    parser.add_argument('--compress-threads', type=int, default=1,
+                        help='if --compress is gzip, the number of threads with which to compress (default 1)')
+
+    subparsers = parser.add_subparsers(dest='subcommand')
+
+    command = None
+    for name in COMMAND_MODULES:
+        if name == module:
+            command = importlib.import_module(name).Command(subparsers)
+        else:
+            # Don't add help, so that `--help` is left to the chosen command's subparser.
+            subparsers.add_parser(_command_name(name), add_help=False)
+
+    return parser, command
+
+
+def _command_name(module):
+    return module.rsplit('.', 1)[1].replace('_', '-')
+
+
+def _command_module(name):
+    return 'ocdskit.cli.commands.{}'.format(name.replace('-', '_'))
+
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError('{} is not a positive integer'.format(value))
+    return number
+
+
+def _create_profiler(args):
+    if not args.profile:
+        return None
+
+    from ocdskit.cli.profile import DeterministicProfiler, SamplingProfiler
+
+    if args.profile_mode == 'sample':
+        if args.profile_interval is None:
+            return SamplingProfiler(args.profile)
+        return SamplingProfiler(args.profile, interval=args.profile_interval)
+    return DeterministicProfiler(args.profile)
+
+
+def _report_stats(stats, args):
+    if not stats.enabled:
+        return
+
+    stats.checkpoint('exit')
+    stats.close()
+
+    if args.stats or args.trace_memory:
+        print(stats.report(), file=sys.stderr)
+    if args.stats_file:
+        with open(args.stats_file, 'w') as f:
+            json_dump(stats.as_dict(), f, indent=2)
+            f.write('\n')
+
+
 def _showwarning(message, category, filename, lineno, file=None, line=None):
     if file is None:
         file = sys.stderr
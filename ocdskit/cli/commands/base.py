@@ -1,25 +1,329 @@
+import bz2
+import codecs
+import glob
+import gzip
+import logging
+import lzma
 import os
 import sys
+import threading
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from queue import Full, Queue
 
-import ijson
+from ocdskit.exceptions import CommandError
+from ocdskit.stats import NullStats
+from ocdskit.util import (SLOW_IJSON_BACKENDS, get_ijson_backend, is_ascii, iterencodeb, json_dumpb, json_loads,
+                          zero_copy_reader)
 
-from ocdskit.util import iterencode, json_dumps
+logger = logging.getLogger('ocdskit')
 
+# The maximum number of items to buffer per file, if reading files concurrently.
+QUEUE_SIZE = 1000
 
-class StandardInputReader:
-    def __init__(self, encoding):
+# The number of items to send to a process at a time, if processing items with many processes.
+JOB_BATCH_SIZE = 100
+
+# The size of the uncompressed data in each gzip member, if compressing output with many threads.
+GZIP_BLOCK_SIZE = 1024 * 1024
+
+# The default number of bytes to buffer before writing output.
+OUTPUT_BUFFER_SIZE = 64 * 1024
+
+# The default maximum number of seconds to buffer output.
+FLUSH_INTERVAL = 1
+
+# https://en.wikipedia.org/wiki/List_of_file_signatures
+COMPRESSION_FORMATS = {
+    'gzip': (b'\x1f\x8b', gzip.open),
+    'bz2': (b'BZh', bz2.open),
+    'xz': (b'\xfd7zXZ\x00', lzma.open),
+}
+
+# All ASCII bytes, followed by escape sequences for ISO-2022-JP, HZ, ISO-2022-KR and UTF-7.
+ASCII_PROBE = bytes(range(128)) + b'\x1b$B!!\x1b(B~{!!~}\x0e!!\x0f+AGE-'
+
+MAGIC_LENGTH = max(len(magic) for magic, _ in COMPRESSION_FORMATS.values())
+
+_SENTINEL = object()
+
+
+class PrefixedFile:
+    """
+    Reads the given bytes, and then reads from the file.
+    """
+    def __init__(self, prefix, file):
+        self.prefix = prefix
+        self.file = file
+
+    def read(self, size=-1):
+        if not self.prefix:
+            return self.file.read(size)
+        if size < 0:
+            data = self.prefix + self.file.read()
+            self.prefix = b''
+        else:
+            data = self.prefix[:size]
+            self.prefix = self.prefix[size:]
+        return data
+
+
+class ParallelGzipFile:
+    """
+    Compresses blocks of data in a pool of threads, and writes each block as a gzip member, in order.
+
+    A file of concatenated gzip members is a valid gzip file, which decompresses to the concatenated data.
+    """
+    def __init__(self, file, threads, block_size=GZIP_BLOCK_SIZE):
+        self.file = file
+        self.threads = threads
+        self.block_size = block_size
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.futures = deque()
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= self.block_size:
+            self._submit()
+
+    def _submit(self):
+        # zlib releases the GIL while compressing.
+        self.futures.append(self.executor.submit(gzip.compress, bytes(self.buffer)))
+        self.buffer = bytearray()
+
+        # Limit the number of blocks in memory.
+        while len(self.futures) > self.threads * 2 or self.futures and self.futures[0].done():
+            self.file.write(self.futures.popleft().result())
+
+    def flush(self):
+        """
+        Does nothing, as blocks are written once compressed.
+        """
+
+    def close(self):
+        if self.buffer:
+            self._submit()
+        while self.futures:
+            self.file.write(self.futures.popleft().result())
+        self.executor.shutdown()
+        self.file.flush()
+
+
+class TextWriter:
+    """
+    Writes bytes to a text stream.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        self.stream.write(data.decode())
+
+    def flush(self):
+        self.stream.flush()
+
+
+class OutputWriter:
+    """
+    Buffers bytes, and writes them to a binary file once the buffer reaches a size, once a time interval elapses, or
+    once closed.
+
+    If the interval elapses while no bytes are written (for example, while waiting for input), a background thread
+    writes the buffer. The file is flushed only once the interval elapses or once closed, as flushing a compressed file
+    ends a compressed block, which worsens compression.
+    """
+    def __init__(self, file, stream=None, buffer_size=OUTPUT_BUFFER_SIZE, flush_interval=FLUSH_INTERVAL):
+        """
+        :param file: a binary file-like object, like ``sys.stdout.buffer`` or a compressed file
+        :param stream: the stream to flush after writing to ``file``, if different from ``file``
+        :param int buffer_size: the number of bytes to buffer
+        :param float flush_interval: the maximum number of seconds to buffer bytes (0 to write after each call to
+            ``write``)
+        """
+        self.file = file
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+
+        self.buffer = bytearray()
+        # Whether bytes were written to the file since it was last flushed.
+        self.unflushed = False
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+        self.exception = None
+
+        if flush_interval > 0:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        else:
+            self.thread = None
+
+    def write(self, data):
+        with self.lock:
+            self._raise()
+            self.buffer += data
+            if not self.thread:
+                self._flush()
+            elif len(self.buffer) >= self.buffer_size:
+                self._write()
+
+    def close(self):
+        self.closed.set()
+        if self.thread:
+            self.thread.join()
+        with self.lock:
+            self._raise()
+            self._flush()
+            if self.stream is not None and self.file is not self.stream:
+                self.file.close()
+                self.stream.flush()
+
+    def _run(self):
+        while not self.closed.wait(self.flush_interval):
+            with self.lock:
+                if self.exception:
+                    return
+                try:
+                    self._flush()
+                # Raise the exception in the main thread, on the next write.
+                except Exception as e:  # pylint: disable=broad-except
+                    self.exception = e
+                    return
+
+    def _write(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer = bytearray()
+            self.unflushed = True
+
+    def _flush(self):
+        self._write()
+        if not self.unflushed:
+            return
+        self.file.flush()
+        if self.stream is not None and self.file is not self.stream:
+            self.stream.flush()
+        self.unflushed = False
+
+    def _raise(self):
+        if self.exception:
+            exception, self.exception = self.exception, None
+            raise exception
+
+
+class InputReader:
+    """
+    Reads a file, decompressing it if needed, and transcoding it to UTF-8 if an encoding is set.
+
+    Transcoding uses an incremental decoder, so that a character split across reads is decoded correctly. If the
+    encoding is ASCII-compatible, ASCII data is returned without transcoding.
+    """
+    def __init__(self, file, encoding):
+        self.file = decompress(file)
         self.encoding = encoding
 
+        if encoding is None or encoding == 'utf-8':
+            self.decoder = None
+        else:
+            self.decoder = codecs.getincrementaldecoder(encoding)()
+            self.initial_state = self.decoder.getstate()
+            self.ascii_compatible = is_ascii_compatible(encoding)
+
     def read(self, buf_size):
-        data = sys.stdin.buffer.read(buf_size)
-        if self.encoding is None or self.encoding == 'utf-8':
-            return data
-        return data.decode(self.encoding).encode('utf-8')
+        if self.decoder is None:
+            return self.file.read(buf_size)
+
+        # ijson reads zero bytes to determine whether the file is binary.
+        if not buf_size:
+            return b''
+
+        while True:
+            data = self.file.read(buf_size)
+            # The decoder has no pending bytes and no shift state, if its state is its initial state.
+            if self.ascii_compatible and is_ascii(data) and self.decoder.getstate() == self.initial_state:
+                return data
+            text = self.decoder.decode(data, final=not data)
+            # If the data is only part of a character, read more data, as an empty return value means end-of-file.
+            if text or not data:
+                return text.encode('utf-8')
+
+
+class _CountingReader:
+    """
+    Counts the bytes read from a reader.
+    """
+    def __init__(self, reader, stats):
+        self.reader = reader
+        self.stats = stats
+
+    def read(self, size=-1):
+        data = self.reader.read(size)
+        self.stats.count('bytes read', len(data))
+        return data
+
+
+class StandardInputReader(InputReader):
+    def __init__(self, encoding):
+        super().__init__(sys.stdin.buffer, encoding)
+
+
+def is_ascii_compatible(encoding):
+    """
+    Returns whether bytes in the ASCII range always decode to ASCII characters in the encoding.
+
+    Tests the escape sequences of stateful encodings like ISO-2022-JP, HZ and UTF-7, which use only ASCII bytes.
+    """
+    try:
+        return ASCII_PROBE.decode(encoding) == ASCII_PROBE.decode('ascii')
+    except UnicodeDecodeError:
+        return False
+
+
+def is_compressed(prefix):
+    """
+    Returns whether the data starts with the magic number of a gzip, bz2 or xz file.
+    """
+    return any(prefix.startswith(magic) for magic, _ in COMPRESSION_FORMATS.values())
+
+
+def decompress(file):
+    """
+    Returns a file-like object that decompresses the file, if the file is gzip, bz2 or xz compressed, based on its
+    magic number. Otherwise, returns a file-like object that reads the file.
+    """
+    file = PrefixedFile(file.read(MAGIC_LENGTH), file)
+
+    for magic, opener in COMPRESSION_FORMATS.values():
+        if file.prefix.startswith(magic):
+            return opener(file)
+    return file
+
+
+def compress(file, compression, threads=1):
+    """
+    Returns a file-like object that compresses data written to the file.
+
+    :param file: a binary file-like object
+    :param str compression: "gzip", "bz2" or "xz"
+    :param int threads: if ``compression`` is "gzip", the number of threads with which to compress
+    """
+    if compression == 'gzip' and threads > 1:
+        return ParallelGzipFile(file, threads)
+    return COMPRESSION_FORMATS[compression][1](file, 'wb')
+
+
+class _Failure:
+    def __init__(self, exception):
+        self.exception = exception
 
 
 class BaseCommand(ABC):
     kwargs = {}
+    # Whether the command prints JSON with `print` or `print_each`, which is the output that `--compress` compresses.
+    prints_json = True
 
     def __init__(self, subparsers):
         """
@@ -29,6 +333,10 @@ class BaseCommand(ABC):
         self.add_base_arguments()
         self.add_arguments()
         self.args = None
+        self.output = None
+        self.stats = NullStats()
+        # Whether the slow JSON parser warning was logged.
+        self.warned_slow_parser = False
 
     def add_base_arguments(self):
         """
@@ -58,49 +366,196 @@ class BaseCommand(ABC):
         """
         return ''
 
+    def paths(self):
+        """
+        Returns the paths of the files to read. If there are none, standard input is read.
+        """
+        return []
+
     def items(self, **kwargs):
         """
         Yields the items in the input.
         """
-        file = StandardInputReader(self.args.encoding)
-        yield from ijson.items(file, self.prefix(), multiple_values=True, **kwargs)
+        for item in self.stats.iterate('parse', self._items(**kwargs)):
+            self.stats.count('items')
+            yield item
+
+    def _items(self, **kwargs):
+        paths = self.paths()
+
+        if not paths:
+            yield from self.items_from_reader(StandardInputReader(self.args.encoding), **kwargs)
+        elif self.args.threads > 1:
+            yield from _read_concurrently(lambda path: self.items_from_path(path, **kwargs), paths,
+                                          self.args.threads, ordered=not self.args.unordered)
+        else:
+            for path in paths:
+                yield from self.items_from_path(path, **kwargs)
+
+    def items_from_path(self, path, **kwargs):
+        """
+        Yields the items in the file at the given path.
+        """
+        if path == '-':
+            yield from self.items_from_reader(StandardInputReader(self.args.encoding), **kwargs)
+        else:
+            with open(path, 'rb') as f:
+                # If the file needn't be decompressed or transcoded, read it using a memory map, if possible.
+                if self.args.encoding in (None, 'utf-8') and not is_compressed(f.peek(MAGIC_LENGTH)):
+                    with zero_copy_reader(f) as reader:
+                        yield from self.items_from_reader(reader, **kwargs)
+                else:
+                    yield from self.items_from_reader(InputReader(f, self.args.encoding), **kwargs)
+
+    def items_from_reader(self, reader, **kwargs):
+        """
+        Yields the items read from the reader.
+        """
+        backend = get_ijson_backend()
+        if backend.backend in SLOW_IJSON_BACKENDS and not self.warned_slow_parser:
+            self.warned_slow_parser = True
+            logger.warning('the %s JSON parser is slow. Install the yajl library and reinstall ijson to use the '
+                           'yajl2_c parser.', backend.backend)
+
+        if self.stats.enabled:
+            reader = _CountingReader(reader, self.stats)
+
+        yield from backend.items(reader, self.prefix(), multiple_values=True, buf_size=self.args.buffer_size,
+                                 **kwargs)
 
     def print(self, data, streaming=False):
         """
         Prints JSON data.
 
-        :param bool streaming: whether to stream output using ``json.JSONEncoder().iterencode()`` (it is only more
-            memory efficient if ``data`` contains iterators)
+        :param bool streaming: whether to stream output using :meth:`ocdskit.util.iterencodeb` (it is only more memory
+            efficient if ``data`` contains iterators)
+        """
+        kwargs = self.json_kwargs()
+
+        try:
+            output = self.get_output()
+            if streaming:
+                for chunk in self.stats.iterate('encode', iterencodeb(data, **kwargs)):
+                    self.write(output, chunk)
+            else:
+                with self.stats.phase('encode'):
+                    chunk = json_dumpb(data, **kwargs)
+                self.write(output, chunk)
+            self.write(output, b'\n')
+        except BrokenPipeError:
+            _handle_broken_pipe()
+
+    def write(self, output, data):
+        """
+        Writes bytes to the output.
+        """
+        with self.stats.phase('write'):
+            output.write(data)
+        self.stats.count('bytes written', len(data))
+
+    def print_each(self, function, items, jobs=1, ordered=True):
+        """
+        Calls the function with each item, and prints each value in the iterable that the function returns.
+
+        If ``jobs`` is greater than 1, calls the function in a pool of processes, in batches of items, in which case
+        the function must be picklable: for example, a module-level function or a ``functools.partial`` of one.
+
+        :param int jobs: the number of processes
+        :param bool ordered: whether to print the output in input order, if ``jobs`` is greater than 1
+        """
+        if jobs <= 1:
+            for item in items:
+                for data in self.stats.iterate('transform', function(item)):
+                    self.print(data)
+            return
+
+        items = iter(items)
+        batches = iter(lambda: list(islice(items, JOB_BATCH_SIZE)), [])
+        chunks = _process_concurrently(function, batches, self.json_kwargs(), jobs, ordered=ordered)
+        try:
+            output = self.get_output()
+            # The time to transform and encode items in other processes is measured as the time waiting for them.
+            for chunk in self.stats.iterate('transform', chunks):
+                self.write(output, chunk)
+        except BrokenPipeError:
+            _handle_broken_pipe()
+
+    def json_kwargs(self):
+        """
+        Returns the keyword arguments with which to dump JSON, per the ``--pretty`` and ``--ascii`` options.
         """
         kwargs = {}
         if self.args.pretty:
             kwargs['indent'] = 2
         if self.args.ascii:
             kwargs['ensure_ascii'] = True
+        return kwargs
 
-        try:
-            if streaming:
-                for chunk in iterencode(data, **kwargs):
-                    print(chunk, end='')
-                print()
-            else:
-                print(json_dumps(data, **kwargs))
+    def get_output(self):
+        """
+        Returns the buffered writer to standard output, creating it if needed.
+        """
+        if not self.output:
+            # Write any text that was printed, before writing bytes.
             sys.stdout.flush()
-        # https://docs.python.org/3/library/signal.html#note-on-sigpipe
-        except BrokenPipeError:
-            devnull = os.open(os.devnull, os.O_WRONLY)
-            os.dup2(devnull, sys.stdout.fileno())
-            sys.exit(1)
+
+            stream = getattr(sys.stdout, 'buffer', None)
+            if stream is None:  # for example, if standard output is replaced with a StringIO object
+                stream = TextWriter(sys.stdout)
+
+            if self.args.compress:
+                if isinstance(stream, TextWriter):
+                    raise CommandError('--compress requires a binary standard output')
+                file = compress(stream, self.args.compress, self.args.compress_threads)
+            else:
+                file = stream
+
+            self.output = OutputWriter(file, stream, buffer_size=self.args.output_buffer_size,
+                                       flush_interval=self.args.flush_interval)
+        return self.output
+
+    def close(self):
+        """
+        Tidies up any resources used by the command, like flushing buffered output.
+        """
+        if self.output:
+            try:
+                with self.stats.phase('write'):
+                    self.output.close()
+            except BrokenPipeError:
+                _handle_broken_pipe()
 
 
 class OCDSCommand(BaseCommand, ABC):
     def add_base_arguments(self):
         self.add_argument('--root-path', type=str, default='',
                           help='the path to the items to process within each input')
+        self.add_argument('--input', nargs='+', default=[], metavar='PATH',
+                          help='read these files or glob patterns instead of standard input ("-" is standard input)')
+        self.add_argument('--threads', type=int, default=1,
+                          help='if --input is set, the number of files to read concurrently (default 1)')
+        self.add_argument('--unordered', action='store_true',
+                          help='process items in any order, instead of in input order, for higher throughput')
+        self.add_argument('--jsonl', action='store_true',
+                          help='read JSON Lines, with one JSON document per line, for higher throughput')
 
     def prefix(self):
         return self.args.root_path
 
+    def paths(self):
+        paths = []
+        for pattern in self.args.input:
+            # A path can be a named pipe, like `<(command)` in Bash.
+            if pattern == '-' or os.path.exists(pattern) and not os.path.isdir(pattern):
+                paths.append(pattern)
+                continue
+
+            matches = sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+            if not matches:
+                raise CommandError('{}: No such file'.format(pattern))
+            paths.extend(matches)
+        return paths
+
     def items(self, **kwargs):
         """
         Yields the items in the input. If an item is an array, yields each entry of the array.
@@ -112,6 +567,45 @@ class OCDSCommand(BaseCommand, ABC):
             else:
                 yield item
 
+    def items_from_reader(self, reader, **kwargs):
+        """
+        Yields the items read from the reader. If ``--jsonl`` is set, parses each line as a JSON document.
+        """
+        if not self.args.jsonl:
+            yield from super().items_from_reader(reader, **kwargs)
+            return
+
+        if self.stats.enabled:
+            reader = _CountingReader(reader, self.stats)
+
+        components = self.prefix().split('.') if self.prefix() else []
+        object_pairs_hook = kwargs.get('map_type')
+        for number, line in enumerate(_read_lines(reader, self.args.buffer_size), 1):
+            if line.strip():
+                try:
+                    data = json_loads(line, object_pairs_hook=object_pairs_hook)
+                except ValueError as e:
+                    raise CommandError('JSON error: line {}: {}'.format(number, e)) from e
+                yield from _items_at(data, components)
+
+    def add_jobs_argument(self, help='the number of processes with which to process items (default 1)'):
+        """
+        Adds the ``--jobs`` argument to the subparser, for commands that process items with many processes, like by
+        calling :meth:`~ocdskit.cli.commands.base.OCDSCommand.print_each`.
+        """
+        self.add_argument('--jobs', type=int, default=1, help=help)
+
+    def print_each(self, function, items):
+        """
+        Calls the function with each item, and prints each value in the iterable that the function returns. The command
+        must add the ``--jobs`` argument: see :meth:`~ocdskit.cli.commands.base.OCDSCommand.add_jobs_argument`.
+
+        If ``--jobs`` is greater than 1, calls the function in a pool of processes, in batches of items, in which case
+        the function must be picklable: for example, a module-level function or a ``functools.partial`` of one. The
+        output is printed in input order, unless ``--unordered`` is set.
+        """
+        super().print_each(function, items, jobs=self.args.jobs, ordered=not self.args.unordered)
+
     def add_package_arguments(self, infix, prefix='', version='1.1'):
         """
         Adds arguments for setting package metadata to the subparser.
@@ -156,3 +650,147 @@ class OCDSCommand(BaseCommand, ABC):
                 kwargs['publisher'][key[10:]] = value
 
         return kwargs
+
+
+# https://docs.python.org/3/library/signal.html#note-on-sigpipe
+def _handle_broken_pipe():
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+    sys.exit(1)
+
+
+def _read_lines(reader, buf_size):
+    """
+    Yields the lines read from the reader, without line endings.
+    """
+    parts = []
+    while True:
+        data = reader.read(buf_size)
+        if not data:
+            break
+
+        # `memoryview` objects have no `split` method.
+        lines = bytes(data).split(b'\n')
+        if len(lines) > 1:
+            parts.append(lines[0])
+            yield b''.join(parts)
+            yield from lines[1:-1]
+            parts = []
+        parts.append(lines[-1])
+
+    if parts:
+        yield b''.join(parts)
+
+
+def _items_at(data, components):
+    """
+    Yields the items at the ijson prefix within the data. An ``item`` component matches each entry of an array.
+    """
+    if not components:
+        yield data
+    elif isinstance(data, dict):
+        if components[0] in data:
+            yield from _items_at(data[components[0]], components[1:])
+    elif isinstance(data, list) and components[0] == 'item':
+        for item in data:
+            yield from _items_at(item, components[1:])
+
+
+def _process_batch(function, batch, kwargs):
+    """
+    Calls the function with each item in the batch, and returns the values that it returns as JSON Lines.
+    """
+    return b''.join(json_dumpb(data, **kwargs) + b'\n' for item in batch for data in function(item))
+
+
+def _process_concurrently(function, batches, kwargs, jobs, ordered=True):
+    """
+    Yields the JSON Lines from calling ``function`` on each item of each batch, using a pool of processes.
+
+    If ``ordered`` is ``True``, yields the output of each batch in input order. Otherwise, yields output as it is
+    produced. At most two batches per process are pending at a time, so that memory usage remains bounded.
+    """
+    # multiprocessing is slow to import, so it is imported only if using many processes.
+    from concurrent.futures import ProcessPoolExecutor
+
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    futures = deque()
+    try:
+        for batch in batches:
+            if len(futures) >= jobs * 2:
+                if ordered:
+                    yield futures.popleft().result()
+                else:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        futures.remove(future)
+                        yield future.result()
+            futures.append(executor.submit(_process_batch, function, batch, kwargs))
+
+        while futures:
+            yield futures.popleft().result()
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def _read_concurrently(function, paths, threads, ordered=True):
+    """
+    Yields the items from calling ``function`` on each path, using a pool of threads.
+
+    If ``ordered`` is ``True``, yields all items of a path before any items of the next path. Otherwise, yields items
+    as they are read. Each path's items are buffered in a bounded queue, so that memory usage remains bounded.
+    """
+    stop = threading.Event()
+
+    def put(queue, item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return
+            except Full:
+                pass
+
+    def worker(path, queue):
+        if stop.is_set():
+            return
+        try:
+            for item in function(path):
+                if stop.is_set():
+                    return
+                put(queue, item)
+        except Exception as e:  # pylint: disable=broad-except
+            put(queue, _Failure(e))
+        put(queue, _SENTINEL)
+
+    if ordered:
+        queues = [Queue(QUEUE_SIZE) for _ in paths]
+    else:
+        queues = [Queue(QUEUE_SIZE)] * len(paths)
+
+    executor = ThreadPoolExecutor(max_workers=threads)
+    futures = []
+    try:
+        for path, queue in zip(paths, queues):
+            futures.append(executor.submit(worker, path, queue))
+
+        if ordered:
+            consumers = ((queue, 1) for queue in queues)
+        else:
+            consumers = ((queues[0], len(paths)),)
+
+        for queue, remaining in consumers:
+            while remaining:
+                item = queue.get()
+                if item is _SENTINEL:
+                    remaining -= 1
+                elif isinstance(item, _Failure):
+                    raise item.exception
+                else:
+                    yield item
+    finally:
+        stop.set()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,38 @@
+from ocdskit.cli.commands.base import BaseCommand
+from ocdskit.schema_cache import SCHEMA_CACHE_MAX_AGE, SchemaCache
+
+
+class Command(BaseCommand):
+    name = 'cache-schemas'
+    help = 'downloads the release schemas, patched release schemas and merge rules that the compile command uses, ' \
+           'so that it can run with --offline'
+    prints_json = False
+
+    def add_arguments(self):
+        self.add_argument('--tag', nargs='*', default=[],
+                          help='cache the release schemas of these versions of OCDS, like 1__1__4 (default the latest '
+                               'patch version of each minor version)')
+        self.add_argument('--extension', nargs='*', default=[], metavar='URL',
+                          help='also cache the release schemas patched with these extensions')
+        self.add_argument('--schema', nargs='*', default=[], metavar='URL',
+                          help='also cache the merge rules of these release schemas')
+        self.add_argument('--refresh', action='store_true',
+                          help='download the tags of OCDS versions, the patched release schemas and the release '
+                               'schemas at URLs again, even if recently cached')
+
+    def handle(self):
+        schema_cache = SchemaCache(max_age=0 if self.args.refresh else SCHEMA_CACHE_MAX_AGE)
+
+        tags = self.args.tag
+        if not tags:
+            # Cache the release schemas that the compile command selects for OCDS 1.0 and OCDS 1.1 data, etc.
+            versions = {'.'.join(tag.split('__')[:2]) for tag in schema_cache.get_tags()}
+            tags = [schema_cache.get_latest_tag(version) for version in sorted(versions)]
+
+        for tag in tags:
+            schema_cache.get_merger(tag=tag)
+            if self.args.extension:
+                schema_cache.get_merger(tag=tag, extensions=self.args.extension)
+
+        for url in self.args.schema:
+            schema_cache.get_merger(url)
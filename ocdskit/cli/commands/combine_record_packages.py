@@ -13,5 +13,6 @@ class Command(OCDSCommand):
         kwargs = self.parse_package_arguments()
 
         output = combine_record_packages(self.items(), **kwargs)
+        self.stats.checkpoint('combine_record_packages')
 
         self.print(output)
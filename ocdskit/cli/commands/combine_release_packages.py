@@ -13,5 +13,6 @@ class Command(OCDSCommand):
         kwargs = self.parse_package_arguments()
 
         output = combine_release_packages(self.items(), **kwargs)
+        self.stats.checkpoint('combine_release_packages')
 
         self.print(output)
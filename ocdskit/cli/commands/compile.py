@@ -1,10 +1,16 @@
 import logging
+import os
+import stat
 import sys
+from contextlib import ExitStack
 
 import ocdskit.packager
-from ocdskit.cli.commands.base import OCDSCommand
+from ocdskit.cli.commands.base import MAGIC_LENGTH, OCDSCommand, is_compressed
 from ocdskit.combine import merge
-from ocdskit.exceptions import CommandError, InconsistentVersionError, MissingOcidKeyError
+from ocdskit.exceptions import (BackendOptionError, CommandError, InconsistentExtensionsError,
+                                InconsistentVersionError, MissingOcidKeyError, OutOfOrderOcidError,
+                                SchemaCacheMissError)
+from ocdskit.schema_cache import SchemaCache
 
 logger = logging.getLogger('ocdskit')
 
@@ -23,6 +29,54 @@ class Command(OCDSCommand):
                           help='if --package is set, include versioned releases in the record package; otherwise, '
                                'print versioned releases instead of compiled releases')
 
+        self.add_argument('--offline', action='store_true',
+                          help="don't access the network: read the release schema's merge rules from the schema cache "
+                               'only (see the cache-schemas command)')
+
+        self.add_argument('--backend', choices=['sqlite', 'sort', 'hybrid', 'python'],
+                          help='store releases in SQLite, in sorted runs in temporary files, in memory until they '
+                               'exceed --max-memory and then in sorted runs, or in memory (default sqlite, if '
+                               'available, otherwise hybrid)')
+        self.add_argument('--presorted', action='store_true',
+                          help="merge each OCID's releases as they are read, without storing releases, if the "
+                               'releases of each OCID are consecutive in the input')
+        self.add_argument('--store', metavar='PATH',
+                          help='add releases to this persistent store, and print only the OCIDs whose releases '
+                               'changed since the last run')
+        self.add_argument('--unchanged', action='store_true',
+                          help='also print the OCIDs whose releases are unchanged (requires --store)')
+        self.add_argument('--cache', metavar='PATH',
+                          help='read compiled releases from this persistent cache, instead of merging releases, if '
+                               'the releases of an OCID are unchanged, and add compiled releases to it')
+        self.add_argument('--cache-size', type=int, default=ocdskit.packager.CACHE_MAX_SIZE, metavar='BYTES',
+                          help='if --cache is set, evict the least recently used releases once the cache exceeds this '
+                               'size')
+        self.add_argument('--deduplicate', choices=['memory', 'disk'],
+                          help='ignore releases with the same ocid and id as an earlier release, holding their '
+                               'digests in memory or in a temporary SQLite database')
+        self.add_argument('--deduplicate-content', action='store_true',
+                          help='if --deduplicate is set, keep releases with the same ocid and id as an earlier '
+                               'release, if their content is different')
+        self.add_argument('--codec', choices=['json', 'zlib'],
+                          help='encode releases with this codec in the backend: JSON, or JSON compressed with zlib '
+                               '(by default, releases are held in memory as Python objects, and are stored in a '
+                               'database or temporary file as JSON)')
+        self.add_argument('--tempdir', metavar='PATH',
+                          help='create the temporary SQLite database or sorted runs in this directory, instead of the '
+                               'default')
+        self.add_argument('--sqlite-pragma', action='append', default=[], metavar='NAME=VALUE',
+                          help='set this SQLite PRAGMA, like temp_store=MEMORY (can be repeated)')
+        self.add_argument('--sqlite-memory-limit', type=int, default=ocdskit.packager.SQLITE_MEMORY_LIMIT,
+                          metavar='BYTES', help='hold the SQLite database in memory until it exceeds this size (0 to '
+                                                'never hold it in memory)')
+        self.add_argument('--max-memory', type=int, default=ocdskit.packager.HYBRID_MAX_MEMORY, metavar='BYTES',
+                          help='if --backend is hybrid, hold releases in memory until their estimated size exceeds '
+                               'this many bytes')
+        self.add_argument('--sort-memory-limit', type=int, default=ocdskit.packager.SORT_MEMORY_LIMIT,
+                          metavar='BYTES', help='if --backend is sort, buffer this many bytes of releases before '
+                                                'writing a sorted run')
+        self.add_jobs_argument('the number of processes with which to merge releases (default 1)')
+
         self.add_package_arguments('record', 'if --package is set, ')
 
     def handle(self):
@@ -31,16 +85,107 @@ class Command(OCDSCommand):
         kwargs['return_package'] = self.args.package
         kwargs['use_linked_releases'] = self.args.linked_releases
         kwargs['return_versioned_release'] = self.args.versioned
+        kwargs['schema_cache'] = SchemaCache(offline=self.args.offline)
+
+        kwargs['backend'] = self.args.backend
+        kwargs['workers'] = self.args.jobs
+        if self.args.codec and (self.args.presorted or self.args.store):
+            raise CommandError('--codec is incompatible with --presorted and --store')
+
+        if self.args.unchanged and not self.args.store:
+            raise CommandError('--unchanged requires --store')
+
+        if self.args.presorted:
+            if self.args.backend or self.args.store:
+                raise CommandError('--presorted, --backend and --store are mutually exclusive')
+
+            kwargs['presorted'] = True
+        elif self.args.store:
+            if self.args.backend:
+                raise CommandError('--store and --backend are mutually exclusive')
+            if not ocdskit.packager.USING_SQLITE:
+                raise CommandError('--store is unavailable, because sqlite3 is unavailable')
+
+            kwargs['backend'] = 'store'
+            kwargs['backend_options'] = {
+                'path': self.args.store,
+                'changed_only': not self.args.unchanged,
+            }
+        elif self.args.backend == 'sort':
+            kwargs['backend_options'] = {
+                'tempdir': self.args.tempdir,
+                'memory_limit': self.args.sort_memory_limit,
+                'codec': self.args.codec,
+            }
+        elif self.args.backend == 'hybrid' or not self.args.backend and not ocdskit.packager.USING_SQLITE:
+            if not self.args.backend:
+                logger.warning('sqlite3 is unavailable, so the command will hold releases in memory until they exceed '
+                               '--max-memory, and then write them to temporary files.')
+
+            kwargs['backend'] = 'hybrid'
+            kwargs['backend_options'] = {
+                'max_memory': self.args.max_memory,
+                'tempdir': self.args.tempdir,
+                'input_size': _input_size(self.paths()),
+                'codec': self.args.codec,
+            }
+        elif self.args.backend == 'python':
+            kwargs['backend_options'] = {
+                'codec': self.args.codec,
+            }
+        elif self.args.backend in (None, 'sqlite'):
+            if not ocdskit.packager.USING_SQLITE:
+                raise CommandError('--backend sqlite is unavailable, because sqlite3 is unavailable')
 
-        if not ocdskit.packager.USING_SQLITE:
-            logger.warning('sqlite3 is unavailable, so the command will run in memory. If input files are too large, '
-                           'the command might exceed available memory.')
+            pragmas = {}
+            for pragma in self.args.sqlite_pragma:
+                name, sep, value = pragma.partition('=')
+                if not sep:
+                    raise CommandError('--sqlite-pragma must be like NAME=VALUE, not {}'.format(pragma))
+                pragmas[name.strip()] = value.strip()
+
+            kwargs['backend_options'] = {
+                'pragmas': pragmas,
+                'tempdir': self.args.tempdir,
+                'memory_limit': self.args.sqlite_memory_limit,
+                'codec': self.args.codec,
+            }
+
+        if self.args.deduplicate == 'disk' and not ocdskit.packager.USING_SQLITE:
+            raise CommandError('--deduplicate disk is unavailable, because sqlite3 is unavailable')
+        if self.args.deduplicate_content and not self.args.deduplicate:
+            raise CommandError('--deduplicate-content requires --deduplicate')
 
         try:
-            for output in merge(self.items(), streaming=True, **kwargs):
-                self.print(output, streaming=self.args.package)
+            with ExitStack() as stack:
+                if self.args.cache:
+                    kwargs['cache'] = stack.enter_context(ocdskit.packager.ReleaseCache(self.args.cache,
+                                                                                        self.args.cache_size))
+                if self.args.deduplicate:
+                    deduplicator = stack.enter_context(ocdskit.packager.ReleaseDeduplicator(
+                        compare_content=self.args.deduplicate_content, on_disk=self.args.deduplicate == 'disk',
+                        tempdir=self.args.tempdir))
+                    kwargs['deduplicator'] = deduplicator
+
+                for output in merge(self.items(), streaming=True, stats=self.stats, **kwargs):
+                    self.print(output, streaming=self.args.package)
+
+                # The numbers of duplicates and conflicting duplicates are also reported by --stats.
+                if self.args.deduplicate:
+                    logger.info('%d duplicate releases were ignored', deduplicator.duplicates)
+                    if deduplicator.conflicts:
+                        logger.warning('%d releases have the same ocid and id as an earlier release, but different '
+                                       'content, and were kept', deduplicator.conflicts)
         except MissingOcidKeyError as e:
             raise CommandError('The `ocid` field of at least one release is missing.') from e
+        except (BackendOptionError, OutOfOrderOcidError) as e:
+            raise CommandError(str(e)) from e
+        except InconsistentExtensionsError as e:
+            raise CommandError('{}\nTry setting --schema to a release schema patched with all extensions, or running '
+                               'the command without --presorted.'.format(e)) from e
+        except SchemaCacheMissError as e:
+            raise CommandError('{}\nTry first running the command without --offline, or caching the release schema '
+                               'with the cache-schemas command.'.format(e)) from e
         except InconsistentVersionError as e:
             versions = [e.earlier_version, e.current_version]
             if versions[1] < versions[0]:
@@ -49,3 +194,32 @@ class Command(OCDSCommand):
             message = '{}\nTry first upgrading items to the same version:\n  cat file [file ...] | ocdskit upgrade ' \
                       '{}:{} | ocdskit compile {}'.format(str(e), *versions, ' '.join(sys.argv[2:]))
             raise CommandError(message) from e
+
+
+def _input_size(paths):
+    # The size of the input is known only if each input is a regular file. If a file is compressed, the size of its
+    # JSON is unknown.
+    if not paths:
+        paths = ['-']
+
+    size = 0
+    for path in paths:
+        try:
+            # A path can be a named pipe, which mustn't be read here.
+            if path == '-':
+                status = os.fstat(sys.stdin.buffer.fileno())
+                if not stat.S_ISREG(status.st_mode):
+                    return None
+                prefix = sys.stdin.buffer.peek(MAGIC_LENGTH)
+            else:
+                status = os.stat(path)
+                if not stat.S_ISREG(status.st_mode):
+                    return None
+                with open(path, 'rb') as f:
+                    prefix = f.read(MAGIC_LENGTH)
+        except (AttributeError, OSError, ValueError):
+            return None
+        if is_compressed(prefix):
+            return None
+        size += status.st_size
+    return size
@@ -30,7 +30,7 @@ class Command(OCDSCommand):
             for option in self.args.transforms.split(","):
                 config[option.strip()] = True
 
-        project = oc4ids.run_transforms(config, self.items(), project_id=project_id)
+        project = oc4ids.run_transforms(config, self.items(), project_id=project_id, stats=self.stats)
 
         if self.args.package:
             kwargs = self.parse_package_arguments()
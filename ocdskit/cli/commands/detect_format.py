@@ -11,6 +11,7 @@ logger = logging.getLogger('ocdskit')
 class Command(OCDSCommand):
     name = 'detect-format'
     help = 'reads OCDS files, and reports whether each is a release, record, package, etc.'
+    prints_json = False
 
     def add_arguments(self):
         self.add_argument('file', help='OCDS files', nargs='+')
@@ -32,7 +33,7 @@ class Command(OCDSCommand):
 
     def detect_format(self, path):
         try:
-            _print(path, *detect_format(path, self.args.root_path))
+            _print(path, *detect_format(path, self.args.root_path, buf_size=self.args.buffer_size))
         except UnknownFormatError as e:
             logger.warning('%s: unknown (%s)', path, e)
 
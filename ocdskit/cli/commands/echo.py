@@ -1,10 +1,16 @@
 from ocdskit.cli.commands.base import OCDSCommand
 
 
+def _echo(data):
+    yield data
+
+
 class Command(OCDSCommand):
     name = 'echo'
     help = 'Repeats the input, applying --encoding, --ascii, --pretty and --root-path, and using the UTF-8 encoding'
 
+    def add_arguments(self):
+        self.add_jobs_argument()
+
     def handle(self):
-        for data in self.items():
-            self.print(data)
+        self.print_each(_echo, self.items())
@@ -0,0 +1,53 @@
+from functools import partial
+
+from ocdskit.cli.commands.base import BaseCommand
+from ocdskit.exceptions import CommandError
+from ocdskit.generate import DEFAULT_PREFIX, DISTRIBUTIONS, generate_packages
+
+
+def _generate(bounds, **kwargs):
+    return generate_packages(*bounds, **kwargs)
+
+
+class Command(BaseCommand):
+    name = 'generate'
+    help = 'prints synthetic release packages, record packages or releases, for example, for load testing'
+
+    def add_arguments(self):
+        self.add_argument('--type', choices=('release-package', 'record-package', 'release'),
+                          default='release-package', help='the type of data to print (default release-package)')
+        self.add_argument('--ocids', type=int, default=1000, help='the number of OCIDs (default 1000)')
+        self.add_argument('--releases-per-ocid', type=int, default=1,
+                          help='the mean number of releases per OCID (default 1)')
+        self.add_argument('--distribution', choices=DISTRIBUTIONS, default='fixed',
+                          help='the distribution of the number of releases per OCID (default fixed)')
+        self.add_argument('--parties', type=int, default=2,
+                          help='the number of organizations per contracting process (default 2)')
+        self.add_argument('--documents', type=int, default=1, help='the number of documents per release (default 1)')
+        self.add_argument('--extension', nargs='*', default=[], metavar='URL',
+                          help="add these extensions to each package's extensions")
+        self.add_argument('--version', choices=('1.0', '1.1'), default='1.1',
+                          help='the OCDS version of the data (default 1.1)')
+        self.add_argument('--package-size', type=int, default=100,
+                          help='the number of OCIDs per package (default 100)')
+        self.add_argument('--prefix', default=DEFAULT_PREFIX,
+                          help='the OCID prefix (default {})'.format(DEFAULT_PREFIX))
+        self.add_argument('--seed', default='0', help='the seed of the random number generator (default 0)')
+        self.add_argument('--jobs', type=int, default=1,
+                          help='generate data with this many processes (the output is the same)')
+
+    def handle(self):
+        for name in ('ocids', 'releases_per_ocid', 'package_size'):
+            if getattr(self.args, name) < 1:
+                raise CommandError('--{} must be at least 1'.format(name.replace('_', '-')))
+
+        function = partial(_generate, package_type=self.args.type, extensions=self.args.extension,
+                           seed=self.args.seed, releases_per_ocid=self.args.releases_per_ocid,
+                           distribution=self.args.distribution, parties=self.args.parties,
+                           documents=self.args.documents, version=self.args.version, prefix=self.args.prefix)
+
+        size = self.args.package_size
+        bounds = ((start, min(start + size, self.args.ocids)) for start in range(0, self.args.ocids, size))
+
+        # Each package depends only on its OCIDs, so the output is the same for any number of jobs.
+        self.print_each(function, bounds, jobs=self.args.jobs)
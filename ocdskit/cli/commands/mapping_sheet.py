@@ -6,11 +6,11 @@ from argparse import RawDescriptionHelpFormatter
 from textwrap import dedent
 
 import jsonref
-from ocdsextensionregistry import ProfileBuilder
 
 from ocdskit.cli.commands.base import BaseCommand
-from ocdskit.exceptions import CommandError, MissingColumnError
+from ocdskit.exceptions import CommandError, MissingColumnError, SchemaCacheMissError
 from ocdskit.mapping_sheet import mapping_sheet
+from ocdskit.schema_cache import SchemaCache
 
 
 class Command(BaseCommand):
@@ -41,6 +41,7 @@ class Command(BaseCommand):
         ),
         'formatter_class': RawDescriptionHelpFormatter,
     }
+    prints_json = False
 
     def add_arguments(self):
         self.add_argument('file', help='the schema file')
@@ -49,6 +50,8 @@ class Command(BaseCommand):
         self.add_argument('--extension', nargs='*', help='patch the release schema with this extension')
         self.add_argument('--extension-field', help='add an "extension" column for the name of the extension in which '
                           'each field was defined')
+        self.add_argument('--offline', action='store_true',
+                          help="don't access the network: read the patched release schema from the schema cache only")
         self.add_argument('--no-deprecated', action='store_true', help="don't include deprecated fields")
         self.add_argument('--no-replace-refs', action='store_true', help="don't replace schema with $ref properties "
                           'with the referenced schema')
@@ -58,8 +61,12 @@ class Command(BaseCommand):
             schema = json.load(f)
 
         if self.args.extension:
-            builder = ProfileBuilder(None, self.args.extension)
-            schema = builder.patched_release_schema(schema=schema, extension_field=self.args.extension_field)
+            schema_cache = SchemaCache(offline=self.args.offline)
+            try:
+                schema = schema_cache.get_patched_release_schema(None, self.args.extension, schema=schema,
+                                                                 extension_field=self.args.extension_field)
+            except SchemaCacheMissError as e:
+                raise CommandError('{}\nTry first running the command without --offline.'.format(e)) from e
 
         base_uri = pathlib.Path(os.path.realpath(self.args.file)).as_uri()
         if not self.args.no_replace_refs:
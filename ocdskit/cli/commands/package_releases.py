@@ -1,8 +1,15 @@
+from functools import partial
+
 from ocdskit.cli.commands.base import OCDSCommand
 from ocdskit.combine import package_releases
+from ocdskit.exceptions import CommandError
 from ocdskit.util import grouper
 
 
+def _package(data, **kwargs):
+    yield package_releases(list(filter(None, data)), **kwargs)
+
+
 class Command(OCDSCommand):
     name = 'package-releases'
     help = 'reads releases from standard input, and prints one release package'
@@ -10,6 +17,7 @@ class Command(OCDSCommand):
     def add_arguments(self):
         self.add_argument('extension', help='add this extension to the package', nargs='*')
         self.add_argument('--size', type=int, help='the maximum number of releases per package')
+        self.add_jobs_argument('if --size is set, the number of processes with which to package releases (default 1)')
 
         self.add_package_arguments('release')
 
@@ -17,10 +25,11 @@ class Command(OCDSCommand):
         kwargs = self.parse_package_arguments()
         kwargs['extensions'] = self.args.extension
 
+        if self.args.jobs > 1 and not self.args.size:
+            raise CommandError('--jobs requires --size, as a single package is printed otherwise')
+
         if self.args.size:  # assume `--size` is reasonable
-            for data in grouper(self.items(), self.args.size):
-                output = package_releases(list(filter(None, data)), **kwargs)
-                self.print(output)
+            self.print_each(partial(_package, **kwargs), grouper(self.items(), self.args.size))
         else:
             output = package_releases(self.items(), **kwargs)
             self.print(output, streaming=True)
@@ -13,6 +13,7 @@ from ocdskit.cli.commands.base import BaseCommand
 class Command(BaseCommand):
     name = 'schema-report'
     help = 'reports details of a JSON Schema'
+    prints_json = False
 
     def add_arguments(self):
         self.add_argument('file', help='the schema file')
@@ -11,6 +11,7 @@ class Command(BaseCommand):
     name = 'schema-strict'
     help = 'adds "minItems" and "uniqueItems" if an array, "minProperties" if an object and "minLength" if a ' \
            'string and "enum", "format" and "pattern" are not set'
+    prints_json = False
 
     def add_arguments(self):
         self.add_argument('file', help='the schema file')
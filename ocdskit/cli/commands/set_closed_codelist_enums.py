@@ -19,6 +19,7 @@ meta_schema_exceptions = {
 class Command(BaseCommand):
     name = 'set-closed-codelist-enums'
     help = 'sets the enum in a JSON Schema to match the codes in the CSV files of closed codelists'
+    prints_json = False
 
     def __init__(self, subparsers):
         super().__init__(subparsers)
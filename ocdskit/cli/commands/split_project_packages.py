@@ -1,19 +1,25 @@
+from functools import partial
+
 from ocdskit.cli.commands.base import OCDSCommand
 
 
+def _split(package, size):
+    projects = package['projects']
+
+    for i in range(0, len(projects), size):
+        package.update(projects=projects[i:i + size])
+
+        yield package
+
+
 class Command(OCDSCommand):
     name = 'split-project-packages'
     help = 'reads project packages from standard input, and prints many record packages for each'
 
     def add_arguments(self):
         self.add_argument('size', type=int, help='the number of projects per package')
+        self.add_jobs_argument()
 
     def handle(self):
         # See exploration of not reading each input into memory: https://github.com/open-contracting/ocdskit/issues/118
-        for package in self.items():
-            projects = package['projects']
-
-            for i in range(0, len(projects), self.args.size):
-                package.update(projects=projects[i:i + self.args.size])
-
-                self.print(package)
+        self.print_each(partial(_split, size=self.args.size), self.items())
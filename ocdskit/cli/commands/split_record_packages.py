@@ -1,23 +1,29 @@
+from functools import partial
+
 from ocdskit.cli.commands.base import OCDSCommand
 
 
+def _split(package, size):
+    records = package['records']
+
+    # We can't determine which records came from which packages.
+    if 'packages' in package:
+        del package['packages']
+
+    for i in range(0, len(records), size):
+        package.update(records=records[i:i + size])
+
+        yield package
+
+
 class Command(OCDSCommand):
     name = 'split-record-packages'
     help = 'reads record packages from standard input, and prints many record packages for each'
 
     def add_arguments(self):
         self.add_argument('size', type=int, help='the number of records per package')
+        self.add_jobs_argument()
 
     def handle(self):
         # See exploration of not reading each input into memory: https://github.com/open-contracting/ocdskit/issues/118
-        for package in self.items():
-            records = package['records']
-
-            # We can't determine which records came from which packages.
-            if 'packages' in package:
-                del package['packages']
-
-            for i in range(0, len(records), self.args.size):
-                package.update(records=records[i:i + self.args.size])
-
-                self.print(package)
+        self.print_each(partial(_split, size=self.args.size), self.items())
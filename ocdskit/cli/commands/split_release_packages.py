@@ -1,19 +1,25 @@
+from functools import partial
+
 from ocdskit.cli.commands.base import OCDSCommand
 
 
+def _split(package, size):
+    releases = package['releases']
+
+    for i in range(0, len(releases), size):
+        package.update(releases=releases[i:i + size])
+
+        yield package
+
+
 class Command(OCDSCommand):
     name = 'split-release-packages'
     help = 'reads release packages from standard input, and prints many release packages for each'
 
     def add_arguments(self):
         self.add_argument('size', type=int, help='the number of releases per package')
+        self.add_jobs_argument()
 
     def handle(self):
         # See exploration of not reading each input into memory: https://github.com/open-contracting/ocdskit/issues/118
-        for package in self.items():
-            releases = package['releases']
-
-            for i in range(0, len(releases), self.args.size):
-                package.update(releases=releases[i:i + self.args.size])
-
-                self.print(package)
+        self.print_each(partial(_split, size=self.args.size), self.items())
@@ -9,6 +9,7 @@ from ocdskit.util import is_linked_release, is_record, is_record_package, is_rel
 class Command(OCDSCommand):
     name = 'tabulate'
     help = 'load packages into a database'
+    prints_json = False
 
     def add_arguments(self):
         self.add_argument('database_url', help='a SQLAlchemy database URL')
@@ -34,6 +35,8 @@ class Command(OCDSCommand):
 
             self.upload_file(metadata, engine, releases)
 
+        self.stats.checkpoint('tabulate')
+
     def process_schema_object(self, path, current_name, flattened, obj):
         """
         Return a dictionary with a flattened representation of the schema. `patternProperties` are skipped as we don't
@@ -1,16 +1,22 @@
 from collections import OrderedDict
+from functools import partial
 
 from ocdskit import upgrade
 from ocdskit.cli.commands.base import OCDSCommand
 from ocdskit.exceptions import CommandError
 
 
+def _upgrade(data, upgrade_method):
+    yield upgrade_method(data)
+
+
 class Command(OCDSCommand):
     name = 'upgrade'
     help = 'upgrades packages, records and releases from an old version of OCDS to a new version'
 
     def add_arguments(self):
         self.add_argument('versions', help='the colon-separated old and new versions')
+        self.add_jobs_argument()
 
     def handle(self):
         versions = self.args.versions
@@ -27,6 +33,4 @@ class Command(OCDSCommand):
             message = '{}grade from {} is not supported'.format(direction, versions.replace(':', ' to '))
             raise CommandError(message) from e
 
-        for data in self.items(map_type=OrderedDict):
-            data = upgrade_method(data)
-            self.print(data)
+        self.print_each(partial(_upgrade, upgrade_method=upgrade_method), self.items(map_type=OrderedDict))
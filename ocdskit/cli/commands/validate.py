@@ -13,6 +13,7 @@ from ocdskit.cli.commands.base import OCDSCommand
 class Command(OCDSCommand):
     name = 'validate'
     help = 'reads JSON data from standard input, validates it against the schema, and prints errors'
+    prints_json = False
 
     def add_arguments(self):
         self.add_argument('--schema', help='the URL or path of the schema to validate against',
@@ -0,0 +1,98 @@
+import cProfile
+import os.path
+import signal
+import sys
+import threading
+from collections import Counter
+
+# The default number of seconds between stack samples.
+SAMPLE_INTERVAL = 0.01
+
+
+class DeterministicProfiler:
+    """
+    Profiles every function call with cProfile, and writes the statistics to a file that can be read with the
+    ``pstats`` module or with tools like `SnakeViz <https://jiffyclub.github.io/snakeviz/>`__.
+    """
+    def __init__(self, path):
+        """
+        :param str path: the path of the file to write
+        """
+        self.path = path
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.profiler.dump_stats(self.path)
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the thread that started the profiler at regular intervals, and writes the samples to a file in
+    the "folded" format: one line per distinct stack, with the frames from outermost to innermost separated by
+    semicolons, followed by a space and the number of samples. The file can be read by flame graph tools like
+    `FlameGraph <https://github.com/brendangregg/FlameGraph>`__ and `speedscope <https://www.speedscope.app>`__.
+
+    On Unix, the intervals are measured in CPU time, using a ``SIGPROF`` timer. Otherwise, the intervals are measured
+    in wall time, using a background thread, which tends to over-sample code that releases the GIL, like I/O.
+
+    Sampling adds little overhead, so that it can be left on in production.
+    """
+    def __init__(self, path, interval=SAMPLE_INTERVAL):
+        """
+        :param str path: the path of the file to write
+        :param float interval: the number of seconds between samples
+        """
+        self.path = path
+        self.interval = interval
+        self.samples = Counter()
+        self._handler = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_id = None
+
+    def start(self):
+        if hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread():
+            self._handler = signal.signal(signal.SIGPROF, self._sample)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._thread_id = threading.get_ident()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+        else:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self._handler)
+
+        with open(self.path, 'w') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write('{} {}\n'.format(stack, count))
+
+    def _sample(self, signum, frame):
+        if frame:
+            self.samples[_fold(frame)] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample(None, sys._current_frames().get(self._thread_id))  # pylint: disable=protected-access
+
+
+def _fold(frame):
+    """
+    Returns the stack of the frame in the "folded" format.
+    """
+    names = []
+    while frame:
+        code = frame.f_code
+        # Semicolons separate frames.
+        name = '{} ({}:{})'.format(code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+        names.append(name.replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
@@ -1,3 +1,4 @@
+import functools
 import warnings
 
 from ocdsextensionregistry import ProfileBuilder
@@ -127,7 +128,9 @@ def combine_release_packages(packages, uri='', publisher=None, published_date=''
 
 
 def merge(data, uri='', publisher=None, published_date='', version=DEFAULT_VERSION, schema=None,
-          return_versioned_release=False, return_package=False, use_linked_releases=False, streaming=False):
+          return_versioned_release=False, return_package=False, use_linked_releases=False, streaming=False,
+          stats=None, backend=None, backend_options=None, workers=1, presorted=False, cache=None, schema_cache=None,
+          deduplicator=None):
     """
     Merges release packages and individual releases.
 
@@ -151,22 +154,43 @@ def merge(data, uri='', publisher=None, published_date='', version=DEFAULT_VERSI
         package; otherwise, yield versioned releases instead of compiled releases
     :param bool streaming: if ``return_package`` is ``True``, set the package's records to a generator (this only works
         if the calling code exhausts the generator before ``merge`` returns)
+    :param ocdskit.stats.Stats stats: an object in which to collect the time spent in the backend and in merging
+    :param str backend: the backend in which to store releases: "sqlite", "sort", "hybrid", "python" or "store" (by
+        default, "sqlite" if available, otherwise "hybrid")
+    :param dict backend_options: keyword arguments with which to initialize the backend: see
+        :class:`ocdskit.packager.SQLiteBackend`, :class:`ocdskit.packager.SortMergeBackend`,
+        :class:`ocdskit.packager.HybridBackend` and :class:`ocdskit.packager.StoreBackend`
+    :param int workers: the number of processes with which to merge releases. The output is the same in any case.
+    :param bool presorted: whether the releases of each OCID are consecutive in the input, in which case the releases
+        are merged as they are read, without a backend, and the output is in input order instead of OCID order. The
+        schema is chosen using the first item only: if ``schema`` isn't set, later packages mustn't declare other
+        extensions. If ``return_package`` and ``streaming`` are set, the package's metadata is that of the first
+        package, and its ``packages`` and ``extensions`` fields are written after its ``records``.
+    :param ocdskit.packager.ReleaseCache cache: a cache from which to read compiled releases and versioned releases,
+        instead of merging releases, if the releases of an OCID are unchanged since they were cached
+    :param ocdskit.schema_cache.SchemaCache schema_cache: a cache from which to read the tags of OCDS versions, the
+        release schema and its merge rules, instead of downloading them each time
+    :param ocdskit.packager.ReleaseDeduplicator deduplicator: an object with which to ignore releases with the same
+        ``ocid`` and ``id`` as an earlier release
     :raises InconsistentVersionError: if the versions are inconsistent across packages to merge
     :raises MissingOcidKeyError: if the release is missing an ``ocid`` field
+    :raises OutOfOrderOcidError: if ``presorted`` is set, and the releases of an OCID aren't consecutive
+    :raises InconsistentExtensionsError: if ``presorted`` is set and ``schema`` isn't set, and a later package declares
+        extensions that the first item doesn't
+    :raises SchemaCacheMissError: if ``schema_cache`` is offline, and the release schema's merge rules aren't cached
     """
-    with Packager() as packager:
+    with Packager(stats=stats, backend=backend, backend_options=backend_options, presorted=presorted,
+                  cache=cache, deduplicator=deduplicator) as packager:
         packager.add(data)
 
-        if not schema and packager.version:
-            prefix = packager.version.replace('.', '__') + '__'
-            tag = next(tag for tag in reversed(get_tags()) if tag.startswith(prefix))
-            schema = get_release_schema_url(tag)
+        if presorted and not schema:
+            # The merge rules are chosen using the extensions of the first item only, so later items mustn't declare
+            # other extensions.
+            packager.merger_extensions = set(packager.extensions)
 
-            if packager.package['extensions']:
-                builder = ProfileBuilder(tag, list(packager.package['extensions']))
-                schema = builder.patched_release_schema()
-
-        merger = Merger(schema)
+        # The merger is created only if there are releases to merge, as creating it can access the network and the
+        # schema cache.
+        merger = functools.partial(_merger, schema, packager.version, list(packager.extensions), schema_cache)
 
         if return_package:
             packager.package['uri'] = uri
@@ -176,9 +200,28 @@ def merge(data, uri='', publisher=None, published_date='', version=DEFAULT_VERSI
                 packager.package['publisher'] = publisher
 
             yield from packager.output_package(merger, return_versioned_release=return_versioned_release,
-                                               use_linked_releases=use_linked_releases, streaming=streaming)
+                                               use_linked_releases=use_linked_releases, streaming=streaming,
+                                               workers=workers)
         else:
-            yield from packager.output_releases(merger, return_versioned_release=return_versioned_release)
+            yield from packager.output_releases(merger, return_versioned_release=return_versioned_release,
+                                                workers=workers)
+
+
+def _merger(schema, version, extensions, schema_cache):
+    if schema_cache:
+        tag = None if schema else schema_cache.get_latest_tag(version)
+        return schema_cache.get_merger(schema, tag=tag, extensions=extensions)
+
+    if not schema and version:
+        prefix = version.replace('.', '__') + '__'
+        tag = next(tag for tag in reversed(get_tags()) if tag.startswith(prefix))
+        schema = get_release_schema_url(tag)
+
+        if extensions:
+            builder = ProfileBuilder(tag, extensions)
+            schema = builder.patched_release_schema()
+
+    return Merger(schema)
 
 
 def compile_release_packages(*args, **kwargs):
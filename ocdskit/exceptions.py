@@ -27,6 +27,34 @@ class MissingOcidKeyError(OCDSKitError, KeyError):
     """Raised if a release to be merged is missing an ``ocid`` field"""
 
 
+class OutOfOrderOcidError(OCDSKitError):
+    """Raised if the releases of an OCID aren't consecutive in presorted input to merge"""
+
+    def __init__(self, message, ocid=None):
+        self.ocid = ocid
+        super().__init__(message)
+
+
+class InconsistentExtensionsError(OCDSKitError):
+    """Raised if a package declares extensions after the merge rules are chosen, in presorted input to merge"""
+
+    def __init__(self, message, extensions=None):
+        self.extensions = extensions
+        super().__init__(message)
+
+
+class BackendOptionError(OCDSKitError, ValueError):
+    """Raised if an option of the packager's backend is invalid"""
+
+
+class SchemaCacheMissError(OCDSKitError):
+    """Raised if a file isn't in the schema cache, and the cache is offline"""
+
+    def __init__(self, message, path=None):
+        self.path = path
+        super().__init__(message)
+
+
 class OCDSKitWarning(UserWarning):
     """Base class for warnings from within this package"""
 
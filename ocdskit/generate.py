@@ -0,0 +1,217 @@
+import random
+from datetime import datetime, timedelta
+
+from ocdskit.combine import package_records, package_releases
+
+DEFAULT_PREFIX = 'ocds-213czf'
+
+# The distributions of the number of releases per OCID.
+DISTRIBUTIONS = ('fixed', 'uniform', 'pareto')
+
+# The shape of the Pareto distribution. The mean of a Pareto distribution with a shape of 1.5 and a scale of 1 is 3.
+PARETO_SHAPE = 1.5
+PARETO_MEAN = PARETO_SHAPE / (PARETO_SHAPE - 1)
+
+# The maximum number of releases per OCID, as a multiple of the mean, to bound the Pareto distribution's long tail.
+MAX_RELEASES_FACTOR = 1000
+
+EPOCH = datetime(2001, 1, 1)
+
+STAGES = ('planning', 'tender', 'award', 'contract', 'implementation')
+
+ROLES = ('buyer', 'procuringEntity', 'tenderer', 'supplier', 'payee')
+ROLE_PAIRS = tuple([a, b] for a in ROLES for b in ROLES if a < b)
+
+CURRENCIES = ('EUR', 'GBP', 'MXN', 'PYG', 'USD')
+
+DOCUMENT_TYPES = ('tenderNotice', 'awardNotice', 'contractSigned', 'evaluationReports', 'biddingDocuments')
+
+WORDS = ('supply', 'office', 'equipment', 'road', 'maintenance', 'school', 'medical', 'services', 'construction',
+         'consulting', 'water', 'software', 'vehicles', 'cleaning', 'training', 'bridge', 'hospital', 'furniture')
+
+
+def _random(seed, index):
+    # A string seed is hashed, so that nearby seeds and indices yield independent sequences.
+    return random.Random('{}:{}'.format(seed, index))
+
+
+def _count(rng, mean, distribution):
+    if distribution == 'fixed' or mean <= 1 and distribution == 'uniform':
+        return mean
+    if distribution == 'uniform':
+        return rng.randint(1, 2 * mean - 1)
+    if distribution == 'pareto':
+        return max(1, min(round(mean * rng.paretovariate(PARETO_SHAPE) / PARETO_MEAN), mean * MAX_RELEASES_FACTOR))
+    raise ValueError('distribution must be one of {}, not {!r}'.format(', '.join(DISTRIBUTIONS), distribution))
+
+
+def _title(rng, length=3):
+    return ' '.join(rng.choices(WORDS, k=length)).capitalize()
+
+
+def _date(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _organization(rng, index, version):
+    identifier = {'scheme': 'XI-EXAMPLE', 'id': '{:08d}'.format(index)}
+    name = '{} {}'.format(_title(rng, 2), rng.choice(('Ltd', 'SA', 'Inc', 'Ministry', 'Council')))
+
+    if version == '1.0':
+        return {'name': name, 'identifier': identifier}
+    return {'id': '{scheme}-{id}'.format(**identifier), 'name': name, 'identifier': identifier}
+
+
+def _documents(rng, ocid, number, documents, date):
+    return [{
+        'id': '{}-{}'.format(number, i),
+        'documentType': rng.choice(DOCUMENT_TYPES),
+        'title': _title(rng),
+        'url': 'https://example.com/{}/{}/{}.pdf'.format(ocid, number, i),
+        'datePublished': date,
+        'format': 'application/pdf',
+    } for i in range(documents)]
+
+
+def _release(rng, ocid, number, moment, organizations, currency, amount, documents, version):
+    stage = STAGES[min(number, len(STAGES) - 1)]
+    buyer, *others = organizations
+    date = _date(moment)
+
+    release = {
+        'ocid': ocid,
+        'id': '{}-{:04d}'.format(ocid, number),
+        'date': date,
+        'tag': [stage if number < len(STAGES) else 'contractAmendment'],
+        'initiationType': 'tender',
+        'language': 'en',
+    }
+
+    value = {'amount': amount, 'currency': currency}
+
+    tender = {
+        'id': '{}-tender'.format(ocid),
+        'title': _title(rng),
+        'status': 'planned' if stage == 'planning' else 'active' if stage == 'tender' else 'complete',
+        'value': value,
+        'documents': _documents(rng, ocid, number, documents, date),
+    }
+
+    if version == '1.0':
+        release['buyer'] = buyer
+        tender['procuringEntity'] = buyer
+        tender['tenderers'] = others
+        suppliers = others[:1]
+    else:
+        release['parties'] = [dict(organization, roles=list(rng.choice(ROLE_PAIRS)))
+                              for organization in organizations]
+        release['buyer'] = {'id': buyer['id'], 'name': buyer['name']}
+        tender['procuringEntity'] = {'id': buyer['id'], 'name': buyer['name']}
+        tender['tenderers'] = [{'id': other['id'], 'name': other['name']} for other in others]
+        suppliers = tender['tenderers'][:1]
+
+    release['tender'] = tender
+
+    if number >= STAGES.index('award'):
+        release['awards'] = [{
+            'id': '{}-award'.format(ocid),
+            'status': 'active',
+            'date': date,
+            'value': value,
+            'suppliers': suppliers,
+        }]
+
+    if number >= STAGES.index('contract'):
+        release['contracts'] = [{
+            'id': '{}-contract'.format(ocid),
+            'awardID': '{}-award'.format(ocid),
+            'status': 'active',
+            'value': {'amount': round(amount * (1 + 0.05 * (number - STAGES.index('contract'))), 2),
+                      'currency': currency},
+            'dateSigned': date,
+        }]
+
+    return release
+
+
+def generate_releases(start, stop, seed=0, releases_per_ocid=1, distribution='fixed', parties=2, documents=1,
+                      version='1.1', prefix=DEFAULT_PREFIX):
+    """
+    Yields lists of synthetic releases, one list per OCID, for the OCIDs numbered from ``start`` to ``stop - 1``.
+
+    The releases of an OCID depend only on the seed, the OCID's number and the other arguments, so that any range of
+    OCIDs can be generated independently, and the output is deterministic.
+
+    :param int start: the number of the first OCID
+    :param int stop: the number after the number of the last OCID
+    :param seed: the seed of the random number generator
+    :param int releases_per_ocid: the mean number of releases per OCID
+    :param str distribution: the distribution of the number of releases per OCID: "fixed" (exactly
+        ``releases_per_ocid``), "uniform" (from 1 to twice the mean) or "pareto" (a long-tailed distribution, in which
+        most OCIDs have few releases and some have very many)
+    :param int parties: the number of organizations involved in each contracting process
+    :param int documents: the number of documents per release
+    :param str version: the OCDS version of the releases: "1.0" or "1.1"
+    :param str prefix: the OCID prefix
+    """
+    for index in range(start, stop):
+        rng = _random(seed, index)
+
+        ocid = '{}-{:010d}'.format(prefix, index)
+        count = _count(rng, releases_per_ocid, distribution)
+        organizations = [_organization(rng, index * parties + i, version) for i in range(max(parties, 1))]
+        currency = rng.choice(CURRENCIES)
+        amount = round(rng.uniform(1000, 10000000), 2)
+        moment = EPOCH + timedelta(seconds=rng.randrange(20 * 365 * 86400))
+
+        releases = []
+        for number in range(count):
+            releases.append(_release(rng, ocid, number, moment, organizations, currency, amount, documents, version))
+            moment += timedelta(seconds=rng.randrange(1, 90 * 86400))
+
+        yield releases
+
+
+def generate_packages(start, stop, package_type='release-package', extensions=None, **kwargs):
+    """
+    Yields a synthetic release package or record package for the OCIDs numbered from ``start`` to ``stop - 1``, or
+    yields their releases, if ``package_type`` is "release".
+
+    The records in a record package have no compiled releases. Remaining keyword arguments are passed to
+    :meth:`ocdskit.generate.generate_releases`.
+
+    :param int start: the number of the first OCID
+    :param int stop: the number after the number of the last OCID
+    :param str package_type: "release-package", "record-package" or "release"
+    :param list extensions: the package's ``extensions``
+    """
+    version = kwargs.get('version', '1.1')
+    metadata = {
+        'uri': 'https://example.com/{}/{}-{}.json'.format(package_type, start, stop - 1),
+        'publisher': {'name': 'OCDS Kit'},
+        'published_date': _date(EPOCH),
+        'version': version,
+        'extensions': extensions,
+    }
+
+    groups = generate_releases(start, stop, **kwargs)
+
+    if package_type == 'release':
+        for releases in groups:
+            yield from releases
+        return
+
+    if package_type == 'release-package':
+        package = package_releases([release for releases in groups for release in releases], **metadata)
+    elif package_type == 'record-package':
+        package = package_records([{'ocid': releases[0]['ocid'], 'releases': releases} for releases in groups],
+                                  **metadata)
+    else:
+        raise ValueError('package_type must be release-package, record-package or release, not {!r}'.format(
+            package_type))
+
+    # OCDS 1.0 packages have no version field.
+    if version == '1.0':
+        del package['version']
+
+    yield package
@@ -12,6 +12,7 @@ import jsonpointer
 from ocdsmerge.util import sorted_releases
 
 from ocdskit.combine import merge
+from ocdskit.stats import NullStats
 from ocdskit.util import is_package
 
 logger = logging.getLogger("ocdskit")
@@ -65,7 +66,7 @@ def cast_string(item):
     return ""
 
 
-def run_transforms(config, releases, project_id=None, records=None, output=None):
+def run_transforms(config, releases, project_id=None, records=None, output=None, stats=None):
     """
     Transforms a list of OCDS releases into a OC4IDS project.
 
@@ -74,6 +75,7 @@ def run_transforms(config, releases, project_id=None, records=None, output=None)
     :param string project_id: project ID of resulting project
     :param list records: pre computed list of records
     :param dict output: initial project output template project where transformed data will be added
+    :param ocdskit.stats.Stats stats: an object in which to collect the time spent in transforms and memory usage
     """
     transforms_to_run = []
 
@@ -83,17 +85,20 @@ def run_transforms(config, releases, project_id=None, records=None, output=None)
             continue
         transforms_to_run.append(transform)
 
-    return _run_transforms(releases, project_id, records, output, transforms_to_run)
+    return _run_transforms(releases, project_id, records, output, transforms_to_run, stats)
 
 
-def _run_transforms(releases, project_id=None, records=None, output=None, transforms=None):
+def _run_transforms(releases, project_id=None, records=None, output=None, transforms=None, stats=None):
+    stats = stats or NullStats()
 
     state = InitialTransformState(releases, project_id, records, output)
+    stats.checkpoint('InitialTransformState')
     if not transforms:
         transforms = TRANSFORM_LIST
 
-    for transform in transforms:
-        transform(state)
+    with stats.phase('transform'):
+        for transform in transforms:
+            transform(state)
 
     return state.output
 
@@ -1,17 +1,28 @@
+import hashlib
+import heapq
 import itertools
 import os
+import re
+import struct
+import sys
+import zlib
 from abc import ABC, abstractmethod
-from collections import defaultdict
-from tempfile import NamedTemporaryFile
+from collections import defaultdict, deque
+from tempfile import NamedTemporaryFile, TemporaryFile
 
-from ocdskit.exceptions import InconsistentVersionError, MissingOcidKeyError
+from ocdskit.exceptions import (BackendOptionError, InconsistentExtensionsError, InconsistentVersionError,
+                                MissingOcidKeyError, OutOfOrderOcidError)
+from ocdskit.stats import NullStats
 from ocdskit.util import (_empty_record_package, _remove_empty_optional_metadata, _resolve_metadata,
-                          _update_package_metadata, get_ocds_minor_version, is_release, json_dumps, jsonlib)
+                          _update_package_metadata, get_ocds_minor_version, is_release, json_dumpb, json_dumps,
+                          json_loads, jsonlib)
 
 try:
     import sqlite3
 
     USING_SQLITE = True
+    # https://docs.python.org/3/library/sqlite3.html#sqlite3.Connection.backup
+    USING_SQLITE_BACKUP = hasattr(sqlite3.Connection, 'backup')  # Python 3.7+
 
     def adapt_json(data):
         return json_dumps(data)
@@ -23,6 +34,68 @@ try:
     sqlite3.register_converter('json', convert_json)
 except ImportError:
     USING_SQLITE = False
+    USING_SQLITE_BACKUP = False
+
+# The SQLite database is temporary, so its durability is unimportant. https://sqlite.org/pragma.html
+SQLITE_PRAGMAS = {
+    # Don't write a rollback journal.
+    'journal_mode': 'OFF',
+    # Don't wait for writes to reach the disk.
+    'synchronous': 'OFF',
+    # Use larger pages, as each row contains a release.
+    'page_size': 32768,
+    # Cache up to 64 MiB of pages (a negative value is a number of KiB).
+    'cache_size': -65536,
+    # Read up to 256 MiB of the database file using a memory map.
+    'mmap_size': 268435456,
+}
+
+# The size in bytes of the SQLite database above which to move it from memory to a temporary file.
+SQLITE_MEMORY_LIMIT = 64 * 1024 * 1024
+
+# The number of releases that the SQLite backend buffers before inserting them, and checking the database's size.
+SQLITE_INSERT_BATCH_SIZE = 1000
+
+_PRAGMA_VALUE_RE = re.compile(r'^-?\w+$')
+
+# The minimum number of releases to send to a process at a time, if merging with many processes.
+MERGE_BATCH_SIZE = 1000
+
+# The approximate size in bytes of the releases that the sort-merge backend buffers before writing a sorted run.
+SORT_MEMORY_LIMIT = 256 * 1024 * 1024
+
+# The maximum number of sorted runs that the sort-merge backend merges at once.
+SORT_MAX_RUNS = 128
+
+# The number of bytes to buffer when reading or writing a sorted run.
+SORT_BUFFER_SIZE = 1024 * 1024
+
+# The estimated size in bytes of the releases that the hybrid backend holds in memory before writing sorted runs.
+HYBRID_MAX_MEMORY = 1024 * 1024 * 1024
+
+# The number of releases from which the hybrid backend estimates the size of each release in memory.
+HYBRID_SAMPLE_SIZE = 1000
+
+# The default number of seconds that the persistent store waits for another process to finish writing.
+STORE_TIMEOUT = 60
+
+# The default maximum size of the compiled release cache, in bytes.
+CACHE_MAX_SIZE = 1024 * 1024 * 1024
+
+# The number of changes to the compiled release cache after which to commit them and evict entries.
+CACHE_COMMIT_INTERVAL = 1000
+
+# The compression level of the zlib codec.
+ZLIB_LEVEL = 6
+
+# The size in bytes of the zlib codec's preset dictionary, which is the maximum size that zlib uses.
+ZLIB_DICTIONARY_SIZE = 32768
+
+# The lengths of the OCID, package URI and release of each row in a sorted run.
+_SORT_HEADER = struct.Struct('<III')
+
+# The approximate memory usage in bytes of a buffered row, excluding the lengths of its values.
+_SORT_ROW_OVERHEAD = 200
 
 
 class Packager:
@@ -31,28 +104,94 @@ class Packager:
     releases. Release packages and/or individual releases can be added to the packager. All releases should use the
     same version of OCDS.
     """
-    def __init__(self):
+    def __init__(self, stats=None, backend=None, backend_options=None, presorted=False, cache=None,
+                 deduplicator=None):
+        """
+        :param ocdskit.stats.Stats stats: an object in which to collect the time spent in the backend and in merging
+        :param str backend: the backend in which to store releases: "sqlite", "sort", "hybrid", "python" or "store"
+            (by default, "sqlite" if available, otherwise "hybrid")
+        :param dict backend_options: keyword arguments with which to initialize the backend (ignored, except for
+            ``codec``, if ``backend`` is not set and SQLite is unavailable)
+        :param bool presorted: whether the releases of each OCID are consecutive in the input, in which case no backend
+            is used: see :meth:`~ocdskit.packager.Packager.add`
+        :param ocdskit.packager.ReleaseCache cache: a cache from which to read compiled releases and versioned
+            releases, instead of merging releases, if the releases of an OCID are unchanged
+        :param ocdskit.packager.ReleaseDeduplicator deduplicator: an object with which to ignore releases with the
+            same ``ocid`` and ``id`` as an earlier release, before they are stored or merged
+        :raises BackendOptionError: if the backend is unavailable or unknown, or if an option is invalid
+        """
         self.package = _empty_record_package()
         self.version = None
+        self.stats = stats or NullStats()
+        self.presorted = presorted
+        self.cache = cache
+        self.deduplicator = deduplicator
+        self.backend = None
+        # The package's extensions, which are accumulated in an insertion-ordered dict as items are read.
+        self.extensions = self.package['extensions']
+        # If set, the extensions with which the merge rules were chosen, in which case a presorted package that
+        # declares other extensions raises an error.
+        self.merger_extensions = None
+        self._items = None
 
-        if USING_SQLITE:
-            self.backend = SQLiteBackend()
-        else:
-            self.backend = PythonBackend()
+        if presorted:
+            if backend:
+                raise BackendOptionError('presorted and backend are mutually exclusive')
+            return
+
+        if backend is None:
+            if not USING_SQLITE:
+                self.backend = HybridBackend(codec=(backend_options or {}).get('codec'))
+                return
+            backend = 'sqlite'
+
+        if backend not in BACKENDS:
+            raise BackendOptionError('backend must be one of {}, not {}'.format(', '.join(BACKENDS), backend))
+        if backend in ('sqlite', 'store') and not USING_SQLITE:
+            raise BackendOptionError('the {} backend is unavailable, because sqlite3 is unavailable'.format(backend))
+
+        self.backend = BACKENDS[backend](**(backend_options or {}))
 
     def __enter__(self):
         return self
 
     def __exit__(self, type_, value, traceback):
-        self.backend.close()
+        if self.backend:
+            self.backend.close()
 
     def add(self, data):
         """
         Adds release packages and/or individual releases to be merged.
 
+        If the packager is ``presorted``, only the first item is read, to set the version and package metadata. The
+        other items are read as the releases are merged: only the current OCID's releases are held in memory, along
+        with the OCIDs seen so far. Call this method once only.
+
         :param data: an iterable of release packages and individual releases
         :raises InconsistentVersionError: if the versions are inconsistent across packages to merge
         """
+        items = self._iterate(data)
+
+        if self.presorted:
+            first = next(items, None)
+            self._items = itertools.chain([first], items) if first else items
+            return
+
+        for uri, releases in items:
+            self.stats.count('releases', len(releases))
+            if self.deduplicator:
+                releases = self._deduplicate(releases)
+
+            with self.stats.phase('backend'):
+                for release in releases:
+                    self.backend.add_release(release, uri)
+
+                self.backend.flush()
+
+        self.stats.checkpoint('Packager.add')
+
+    def _iterate(self, data):
+        # Yields each item's package URI and releases, after checking its version and updating the package metadata.
         for i, item in enumerate(data):
             version = get_ocds_minor_version(item)
             if self.version:
@@ -67,32 +206,56 @@ class Packager:
                 self.version = version
 
             if is_release(item):
-                self.backend.add_release(item, '')
+                yield '', [item]
             else:  # release package
                 uri = item.get('uri', '')
 
-                _update_package_metadata(self.package, item)
+                _update_package_metadata(self.package, item, self.extensions)
 
-                # Note: If there are millions of packages to merge, we should use SQLite to store the packages instead.
+                if self.merger_extensions is not None:
+                    extensions = [extension for extension in self.extensions
+                                  if extension not in self.merger_extensions]
+                    if extensions:
+                        raise InconsistentExtensionsError('item {}: extensions error: this item declares extensions '
+                                                          'that earlier items did not, but the merge rules were '
+                                                          'chosen using the first item: {}'.format(
+                                                              i, ', '.join(extensions)), extensions)
+
+                # Note: If there are millions of packages to merge, we should use SQLite to store the packages
+                # instead.
                 if uri:
                     self.package['packages'].append(uri)
 
-                for release in item['releases']:
-                    self.backend.add_release(release, uri)
+                yield uri, item['releases']
+
+    def _deduplicate(self, releases):
+        deduplicator = self.deduplicator
+        duplicates = deduplicator.duplicates
+        conflicts = deduplicator.conflicts
 
-            self.backend.flush()
+        with self.stats.phase('deduplicate'):
+            releases = [release for release in releases if not deduplicator.is_duplicate(release)]
 
-    def output_package(self, merger, return_versioned_release=False, use_linked_releases=False, streaming=False):
+        self.stats.count('duplicates', deduplicator.duplicates - duplicates)
+        self.stats.count('conflicts', deduplicator.conflicts - conflicts)
+        return releases
+
+    def output_package(self, merger, return_versioned_release=False, use_linked_releases=False, streaming=False,
+                       workers=1):
         """
         Yields a record package.
 
-        :param ocdsmerge.merge.Merger merger: a merger
+        :param merger: a merger, or a function that returns a merger, which is called only if there are releases to
+            merge
         :param bool return_versioned_release: whether to include versioned releases in the record package
         :param bool use_linked_releases: whether to use linked releases instead of full releases, if possible
-        :param bool streaming: whether to set the package's records to a generator instead of a list
+        :param bool streaming: whether to set the package's records to a generator instead of a list. If the packager
+            is ``presorted``, the package's ``packages`` and ``extensions`` fields are then set after its ``records``,
+            and are filled as the records are yielded.
+        :param int workers: the number of processes with which to merge releases
         """
         records = self.output_records(merger, return_versioned_release=return_versioned_release,
-                                      use_linked_releases=use_linked_releases)
+                                      use_linked_releases=use_linked_releases, workers=workers)
 
         # If a user wants to stream data but can’t exhaust records right away, we can add an `autoclose=True` argument.
         # If set to `False`, `__exit__` will do nothing, and the user will need to call `packager.backend.close()`.
@@ -101,59 +264,249 @@ class Packager:
 
         self.package['records'] = records
 
-        _resolve_metadata(self.package, 'extensions')
+        # If streaming presorted input, the package URIs and extensions are known only after the records are merged, so
+        # they are written after the records. The extensions are resolved into a list once the records are exhausted,
+        # so they are written as an empty array if no package declares extensions.
+        if self.presorted and streaming:
+            extensions = []
+            self.package['records'] = self._resolve_extensions(records, extensions)
+            self.package['packages'] = self.package.pop('packages')
+            del self.package['extensions']
+            self.package['extensions'] = extensions
+        else:
+            _resolve_metadata(self.package, 'extensions')
         _remove_empty_optional_metadata(self.package)
 
         yield self.package
 
-    def output_records(self, merger, return_versioned_release=False, use_linked_releases=False):
+    def _resolve_extensions(self, records, extensions):
+        yield from records
+        extensions.extend(self.extensions)
+
+    def output_records(self, merger, return_versioned_release=False, use_linked_releases=False, workers=1):
         """
         Yields records, ordered by OCID.
 
-        :param ocdsmerge.merge.Merger merger: a merger
+        If ``workers`` is greater than 1, merges the releases of many OCIDs at a time in a pool of processes, each of
+        which receives a copy of the merger once.
+
+        :param merger: a merger, or a function that returns a merger, which is called only if there are releases to
+            merge
         :param bool return_versioned_release: whether to include versioned releases in the record package
         :param bool use_linked_releases: whether to use linked releases instead of full releases, if possible
+        :param int workers: the number of processes with which to merge releases
         """
-        for ocid, rows in self.backend.get_releases_by_ocid():
-            record = {
-                'ocid': ocid,
-                'releases': [],
-            }
+        groups = ((_record(ocid, rows, use_linked_releases), [row[2] for row in rows])
+                  for ocid, rows in self._groups())
 
-            releases = []
-            for _, uri, release in rows:
-                releases.append(release)
-
-                if use_linked_releases and uri:
-                    package_release = {
-                        'url': uri + '#' + release['id'],
-                        'date': release['date'],
-                        'tag': release['tag'],
-                    }
-                else:
-                    package_release = release
-                record['releases'].append(package_release)
-
-            record['compiledRelease'] = merger.create_compiled_release(releases)
+        for record, compiled_release, versioned_release in self._merge(merger, groups, True, return_versioned_release,
+                                                                       workers):
+            record['compiledRelease'] = compiled_release
             if return_versioned_release:
-                record['versionedRelease'] = merger.create_versioned_release(releases)
+                record['versionedRelease'] = versioned_release
 
             yield record
 
-    def output_releases(self, merger, return_versioned_release=False):
+    def output_releases(self, merger, return_versioned_release=False, workers=1):
         """
         Yields compiled releases or versioned releases, ordered by OCID.
 
-        :param ocdsmerge.merge.Merger merger: a merger
+        If ``workers`` is greater than 1, merges the releases of many OCIDs at a time in a pool of processes, each of
+        which receives a copy of the merger once.
+
+        :param merger: a merger, or a function that returns a merger, which is called only if there are releases to
+            merge
         :param bool return_versioned_release: whether to yield versioned releases instead of compiled releases
+        :param int workers: the number of processes with which to merge releases
         """
-        for _, rows in self.backend.get_releases_by_ocid():
-            releases = (row[-1] for row in rows)
+        groups = ((None, [row[2] for row in rows]) for _, rows in self._groups())
 
+        for _, compiled_release, versioned_release in self._merge(merger, groups, not return_versioned_release,
+                                                                  return_versioned_release, workers):
             if return_versioned_release:
-                yield merger.create_versioned_release(releases)
+                yield versioned_release
+            else:
+                yield compiled_release
+
+    def _groups(self):
+        if self.presorted:
+            yield from self._presorted_groups()
+            return
+
+        for ocid, rows in self.stats.iterate('backend', self.backend.get_releases_by_ocid()):
+            with self.stats.phase('backend'):
+                rows = list(rows)
+
+            yield ocid, rows
+
+    def _presorted_groups(self):
+        seen = set()
+        for ocid, rows in itertools.groupby(self._presorted_rows(), lambda row: row[0]):
+            if ocid in seen:
+                raise OutOfOrderOcidError('the releases of OCID {} are not consecutive. Try without presorted '
+                                          'input.'.format(ocid), ocid)
+            seen.add(ocid)
+
+            yield ocid, list(rows)
+
+    def _presorted_rows(self):
+        for uri, releases in self._items or ():
+            self.stats.count('releases', len(releases))
+            if self.deduplicator:
+                releases = self._deduplicate(releases)
+            for release in releases:
+                try:
+                    ocid = release['ocid']
+                except KeyError as e:
+                    raise MissingOcidKeyError('ocid') from e
+                yield ocid, uri, release
+
+    def _merge(self, merger, groups, compiled, versioned, workers):
+        # Yields each group's key, and its compiled release and versioned release, or None if not requested.
+        if callable(merger):
+            groups = iter(groups)
+            first = next(groups, None)
+            if first is None:
+                return
+            groups = itertools.chain((first,), groups)
+            merger = merger()
+
+        if self.cache:
+            groups = self._cached_groups(merger, groups, compiled, versioned)
+
+        if workers > 1:
+            # The time to merge releases in other processes is measured as the time waiting for them.
+            results = self.stats.iterate('merge', _merge_concurrently(merger, groups, compiled, versioned, workers))
+        else:
+            results = self._merge_serially(merger, groups, compiled, versioned)
+
+        for key, compiled_release, versioned_release in results:
+            if self.cache:
+                key, digest, cached = key
+                if cached:
+                    compiled_release, versioned_release = cached
+                else:
+                    with self.stats.phase('cache'):
+                        self.cache.set(digest, compiled_release, versioned_release)
+
+            self.stats.count('ocids')
+            yield key, compiled_release, versioned_release
+
+    def _cached_groups(self, merger, groups, compiled, versioned):
+        # Adds to each group's key its digest and its cached results, if any. If cached, the releases are replaced by
+        # None, so that they aren't merged.
+        fingerprint = self.cache.fingerprint(merger)
+
+        for key, releases in groups:
+            with self.stats.phase('cache'):
+                digest = self.cache.digest(releases, fingerprint)
+                cached = self.cache.get(digest, compiled, versioned)
+
+            if cached:
+                self.stats.count('cache_hits')
+                yield (key, digest, cached), None
             else:
-                yield merger.create_compiled_release(releases)
+                self.stats.count('cache_misses')
+                yield (key, digest, None), releases
+
+    def _merge_serially(self, merger, groups, compiled, versioned):
+        for key, releases in groups:
+            with self.stats.phase('merge'):
+                result = _merge_releases(merger, releases, compiled, versioned)
+
+            yield (key, *result)
+
+
+def _record(ocid, rows, use_linked_releases):
+    record = {
+        'ocid': ocid,
+        'releases': [],
+    }
+
+    for _, uri, release in rows:
+        if use_linked_releases and uri:
+            package_release = {
+                'url': uri + '#' + release['id'],
+                'date': release['date'],
+                'tag': release['tag'],
+            }
+        else:
+            package_release = release
+        record['releases'].append(package_release)
+
+    return record
+
+
+def _merge_releases(merger, releases, compiled, versioned):
+    # The releases are None if the results are cached.
+    if releases is None:
+        return None, None
+
+    return (
+        merger.create_compiled_release(releases) if compiled else None,
+        merger.create_versioned_release(releases) if versioned else None,
+    )
+
+
+# The merger of each process in the pool of processes, if merging with many processes.
+_merger = None
+
+
+def _initialize_worker(merger):
+    global _merger
+    _merger = merger
+
+
+def _merge_batch(batch, compiled, versioned):
+    return [_merge_releases(_merger, releases, compiled, versioned) for releases in batch]
+
+
+def _merge_concurrently(merger, groups, compiled, versioned, workers):
+    """
+    Yields each group's key, and its compiled release and versioned release, or None if not requested, in order,
+    merging batches of groups in a pool of processes.
+
+    At most two batches per process are pending at a time, so that memory usage remains bounded.
+
+    :param groups: an iterable of tuples of a key, which isn't sent to the processes, and a list of releases
+    """
+    # multiprocessing is slow to import, so it is imported only if using many processes.
+    from concurrent.futures import ProcessPoolExecutor
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker, initargs=(merger,))
+    futures = deque()
+    try:
+        for batch in _batch_groups(groups):
+            if len(futures) >= workers * 2:
+                yield from _merge_results(*futures.popleft())
+            keys, releases = zip(*batch)
+            futures.append((keys, executor.submit(_merge_batch, releases, compiled, versioned)))
+
+        while futures:
+            yield from _merge_results(*futures.popleft())
+    finally:
+        for _, future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def _batch_groups(groups):
+    batch = []
+    size = 0
+    for group in groups:
+        batch.append(group)
+        size += len(group[1]) if group[1] is not None else 1
+        if size >= MERGE_BATCH_SIZE:
+            yield batch
+            batch = []
+            size = 0
+    if batch:
+        yield batch
+
+
+def _merge_results(keys, future):
+    for key, result in zip(keys, future.result()):
+        yield (key, *result)
 
 
 # The backend's responsibilities (for now) are exclusively to:
@@ -198,50 +551,804 @@ class AbstractBackend(ABC):
 
 
 class PythonBackend(AbstractBackend):
-    def __init__(self):
+    """
+    Holds releases in memory, as dicts, or as bytes if ``codec`` is set.
+    """
+    def __init__(self, codec=None):
+        """
+        :param str codec: the codec with which to encode releases: "json" or "zlib"
+        :raises BackendOptionError: if the codec is unknown
+        """
+        self.codec = _get_codec(codec)
         self.groups = defaultdict(list)
 
     def _add_release(self, ocid, package_uri, release):
+        if self.codec:
+            release = self.codec.encode(release)
         self.groups[ocid].append((ocid, package_uri, release))
 
     def get_releases_by_ocid(self):
         for ocid in sorted(self.groups):
-            yield ocid, self.groups[ocid]
+            if self.codec:
+                decode = self.codec.decode
+                yield ocid, [(ocid, uri, decode(release)) for _, uri, release in self.groups[ocid]]
+            else:
+                yield ocid, self.groups[ocid]
 
 
 class SQLiteBackend(AbstractBackend):
+    """
+    Stores releases in an SQLite database, which is held in memory until it exceeds ``memory_limit``, and is then moved
+    to a temporary file.
+    """
     # "The sqlite3 module internally uses a statement cache to avoid SQL parsing overhead."
     # https://docs.python.org/3/library/sqlite3.html#sqlite3.connect
-    # Note: We never commit changes. SQLite manages the memory usage of uncommitted changes.
+    # Note: We only commit changes before moving the database. SQLite manages the memory usage of uncommitted changes.
     # https://sqlite.org/atomiccommit.html#_cache_spill_prior_to_commit
-    def __init__(self):
-        self.file = NamedTemporaryFile(delete=False)
+    def __init__(self, pragmas=None, tempdir=None, memory_limit=SQLITE_MEMORY_LIMIT, codec=None):
+        """
+        :param dict pragmas: PRAGMAs to set, in addition to and overriding ``SQLITE_PRAGMAS``, like
+            ``{'temp_store': 'MEMORY'}``
+        :param str tempdir: the directory in which to create the temporary file, instead of the default directory
+        :param int memory_limit: the size in bytes of the database above which to move it from memory to a temporary
+            file, or 0 to always use a temporary file
+        :param str codec: the codec with which to encode releases: "json" or "zlib" (by default, releases are stored
+            as JSON text)
+        :raises BackendOptionError: if a PRAGMA's name or value is invalid, or if the codec is unknown
+        """
+        self.codec = _get_codec(codec)
 
-        # https://docs.python.org/3/library/sqlite3.html#sqlite3.PARSE_DECLTYPES
-        self.connection = sqlite3.connect(self.file.name, detect_types=sqlite3.PARSE_DECLTYPES)
+        self.pragmas = {**SQLITE_PRAGMAS, **(pragmas or {})}
+        for name, value in self.pragmas.items():
+            if not name.isidentifier() or not _PRAGMA_VALUE_RE.match(str(value)):
+                raise BackendOptionError('invalid PRAGMA: {}={}'.format(name, value))
+
+        self.tempdir = tempdir
+        self.memory_limit = memory_limit if USING_SQLITE_BACKUP else 0
+        self.file = None
 
-        # https://sqlite.org/tempfiles.html#temp_databases
-        self.connection.execute("CREATE TEMP TABLE releases (ocid text, uri text, release json)")
+        if self.memory_limit:
+            self.connection = self._connect(':memory:')
+        else:
+            self.connection = self._connect(self._create_file())
+
+        # The "json" type converts the column's values to dicts: see `convert_json`.
+        self.connection.execute("CREATE TABLE releases (ocid text, uri text, release {})".format(
+            'blob' if self.codec else 'json'))
 
         self.buffer = []
 
+    def _create_file(self):
+        self.file = NamedTemporaryFile(suffix='.sqlite', dir=self.tempdir, delete=False)
+        return self.file.name
+
+    def _connect(self, database):
+        # https://docs.python.org/3/library/sqlite3.html#sqlite3.PARSE_DECLTYPES
+        connection = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES)
+        for name, value in self.pragmas.items():
+            connection.execute('PRAGMA {} = {}'.format(name, value))
+        return connection
+
     def _add_release(self, ocid, package_uri, release):
+        if self.codec:
+            release = self.codec.encode(release)
         self.buffer.append((ocid, package_uri, release))
 
+        # A package can contain many releases, so insert them in batches, to not exceed the memory limit by much.
+        if len(self.buffer) >= SQLITE_INSERT_BATCH_SIZE:
+            self.flush()
+
     def flush(self):
         # https://docs.python.org/3/library/sqlite3.html#sqlite3.Connection.executemany
         self.connection.executemany("INSERT INTO releases VALUES (?, ?, ?)", self.buffer)
 
         self.buffer = []
 
+        if not self.file and self.memory_limit and self.size() > self.memory_limit:
+            self._move_to_file()
+
+    def size(self):
+        """
+        Returns the size of the database in bytes.
+        """
+        page_count = self.connection.execute('PRAGMA page_count').fetchone()[0]
+        page_size = self.connection.execute('PRAGMA page_size').fetchone()[0]
+        return page_count * page_size
+
+    def _move_to_file(self):
+        connection = self._connect(self._create_file())
+        self.connection.commit()
+        self.connection.backup(connection)
+        self.connection.close()
+        self.connection = connection
+
     def get_releases_by_ocid(self):
+        # The index is created after all releases are inserted, because building an index once is faster than updating
+        # it on each insert. https://sqlite.org/faq.html#q19
         self.connection.execute("CREATE INDEX IF NOT EXISTS ocid_idx ON releases(ocid)")
 
         results = self.connection.execute("SELECT * FROM releases ORDER BY ocid")
         for ocid, rows in itertools.groupby(results, lambda row: row[0]):
+            if self.codec:
+                decode = self.codec.decode
+                rows = ((ocid, uri, decode(release)) for _, uri, release in rows)
             yield ocid, rows
 
     def close(self):
-        self.file.close()
         self.connection.close()
-        os.unlink(self.file.name)
+        if self.file:
+            self.file.close()
+            os.unlink(self.file.name)
+
+
+class SortMergeBackend(AbstractBackend):
+    """
+    Buffers releases in memory until they exceed ``memory_limit``, and then sorts them by OCID and writes them to a
+    temporary file as a sorted run. To get the releases by OCID, merges the sorted runs.
+
+    Memory usage is bounded by ``memory_limit``, plus a read buffer per sorted run, and I/O is sequential. The releases
+    of an OCID are yielded in the order in which they were added.
+    """
+    def __init__(self, tempdir=None, memory_limit=SORT_MEMORY_LIMIT, max_runs=SORT_MAX_RUNS, codec='json'):
+        """
+        :param str tempdir: the directory in which to create the sorted runs, instead of the default directory
+        :param int memory_limit: the approximate size in bytes of the releases to buffer before writing a sorted run
+        :param int max_runs: the maximum number of sorted runs to merge at once. If there are more, they are merged in
+            many passes.
+        :param str codec: the codec with which to encode releases: "json" or "zlib"
+        :raises BackendOptionError: if ``max_runs`` is less than 2, or if the codec is unknown
+        """
+        if max_runs < 2:
+            raise BackendOptionError('max_runs must be at least 2, not {}'.format(max_runs))
+
+        self.codec = _get_codec(codec or 'json')
+
+        self.tempdir = tempdir
+        self.memory_limit = memory_limit
+        self.max_runs = max_runs
+        self.runs = []
+        self.buffer = []
+        self.size = 0
+
+    def _add_release(self, ocid, package_uri, release):
+        row = (ocid.encode(), package_uri.encode(), self.codec.encode(release))
+        self.buffer.append(row)
+        self.size += len(row[0]) + len(row[1]) + len(row[2]) + _SORT_ROW_OVERHEAD
+
+        if self.size > self.memory_limit:
+            self._write_run()
+
+    def _write_run(self):
+        # `list.sort` is stable, so the releases of an OCID remain in the order in which they were added.
+        self.buffer.sort(key=lambda row: row[0])
+        self.runs.append(self._write(self.buffer))
+        self.buffer = []
+        self.size = 0
+
+    def add_sorted_run(self, rows):
+        """
+        Writes rows that are already sorted by OCID as a sorted run, without buffering them.
+
+        :param rows: an iterable of tuples of the encoded OCID, the encoded package URI and the release encoded with
+            the backend's codec
+        """
+        self.runs.append(self._write(rows))
+
+    def _write(self, rows):
+        file = TemporaryFile(dir=self.tempdir, buffering=SORT_BUFFER_SIZE)
+        try:
+            pack = _SORT_HEADER.pack
+            write = file.write
+            for ocid, uri, release in rows:
+                write(pack(len(ocid), len(uri), len(release)))
+                write(ocid)
+                write(uri)
+                write(release)
+            file.seek(0)
+        except BaseException:
+            file.close()
+            raise
+        return file
+
+    def get_releases_by_ocid(self):
+        if self.runs:
+            if self.buffer:
+                self._write_run()
+
+            # Merge consecutive runs in each pass, so that the releases of an OCID remain in the order in which they
+            # were added.
+            while len(self.runs) > self.max_runs:
+                runs = self.runs
+                self.runs = []
+                for i in range(0, len(runs), self.max_runs):
+                    self.runs.append(self._write(self._merge(runs[i:i + self.max_runs])))
+
+            rows = self._merge(self.runs)
+        else:
+            self.buffer.sort(key=lambda row: row[0])
+            rows = self.buffer
+
+        decode = self.codec.decode
+        for key, group in itertools.groupby(rows, lambda row: row[0]):
+            ocid = key.decode()
+            yield ocid, ((ocid, uri.decode(), decode(release)) for _, uri, release in group)
+
+    def _merge(self, runs):
+        # `heapq.merge` is stable, so rows with the same OCID are yielded in the order of the runs.
+        try:
+            yield from heapq.merge(*(_read_run(run) for run in runs), key=lambda row: row[0])
+        finally:
+            for run in runs:
+                run.close()
+
+    def close(self):
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.buffer = []
+
+
+def _read_run(file):
+    read = file.read
+    unpack = _SORT_HEADER.unpack
+    size = _SORT_HEADER.size
+    while True:
+        header = read(size)
+        if not header:
+            return
+        ocid_length, uri_length, release_length = unpack(header)
+        yield read(ocid_length), read(uri_length), read(release_length)
+
+
+class HybridBackend(AbstractBackend):
+    """
+    Holds releases in memory until their estimated size exceeds ``max_memory``, and then moves them to a
+    :class:`~ocdskit.packager.SortMergeBackend`, which writes them to temporary files as sorted runs. Small inputs are
+    as fast as with the Python backend, and large inputs don't exceed available memory.
+
+    The size of each release in memory is estimated from the first ``sample_size`` releases. If ``input_size`` is set,
+    the number of releases in the input is also estimated from the samples: if all releases are expected to exceed
+    ``max_memory``, the releases are moved once sampled, instead of once ``max_memory`` is exceeded.
+    """
+    def __init__(self, max_memory=HYBRID_MAX_MEMORY, tempdir=None, sample_size=HYBRID_SAMPLE_SIZE, input_size=None,
+                 codec=None):
+        """
+        :param int max_memory: the estimated size in bytes of the releases to hold in memory, and the approximate size
+            in bytes of the releases to buffer before writing a sorted run
+        :param str tempdir: the directory in which to create the sorted runs, instead of the default directory
+        :param int sample_size: the number of releases from which to estimate the size of each release in memory
+        :param int input_size: the size in bytes of the input, if known
+        :param str codec: the codec with which to encode releases: "json" or "zlib"
+        :raises BackendOptionError: if ``sample_size`` is less than 1, or if the codec is unknown
+        """
+        if sample_size < 1:
+            raise BackendOptionError('sample_size must be at least 1, not {}'.format(sample_size))
+
+        self.codec = _get_codec(codec)
+
+        self.max_memory = max_memory
+        self.tempdir = tempdir
+        self.sample_size = sample_size
+        self.input_size = input_size
+        self.groups = defaultdict(list)
+        self.count = 0
+        # The estimated size in bytes of the releases in memory.
+        self.size = 0
+        # The size in bytes of the sampled releases, as JSON.
+        self.sample_input_size = 0
+        self.average_size = None
+        # The sort-merge backend, once the releases are moved out of memory.
+        self.disk = None
+
+    def _add_release(self, ocid, package_uri, release):
+        if self.disk:
+            self.disk._add_release(ocid, package_uri, release)
+            return
+
+        data = self.codec.encode(release) if self.codec else release
+        self.groups[ocid].append((ocid, package_uri, data))
+        self.count += 1
+
+        if self.average_size is None:
+            self.size += _sizeof(data)
+            self.sample_input_size += len(json_dumpb(release))
+            if self.count == self.sample_size:
+                self._estimate()
+        else:
+            self.size += self.average_size
+
+        if not self.disk and self.size > self.max_memory:
+            self._spill()
+
+    def _estimate(self):
+        self.average_size = self.size / self.count
+
+        if self.input_size and self.input_size / self.sample_input_size * self.size > self.max_memory:
+            self._spill()
+
+    def _spill(self):
+        self.disk = SortMergeBackend(tempdir=self.tempdir, memory_limit=self.max_memory)
+        if self.codec:
+            # Share the codec, so that the releases encoded in memory needn't be encoded again.
+            self.disk.codec = self.codec
+
+        # Write the releases in memory as a sorted run, instead of buffering them again.
+        groups = self.groups
+        self.groups = None
+        self.disk.add_sorted_run(self._pop_rows(groups))
+
+    def _pop_rows(self, groups):
+        encode = self.disk.codec.encode
+        for ocid in sorted(groups):
+            # Pop each OCID's releases, so that their memory is released as they are written.
+            rows = groups.pop(ocid)
+            key = ocid.encode()
+            for _, uri, data in rows:
+                yield key, uri.encode(), data if self.codec else encode(data)
+
+    @property
+    def spilled(self):
+        """
+        Returns whether the releases were moved out of memory.
+        """
+        return self.disk is not None
+
+    def get_releases_by_ocid(self):
+        if self.disk:
+            yield from self.disk.get_releases_by_ocid()
+            return
+
+        for ocid in sorted(self.groups):
+            if self.codec:
+                decode = self.codec.decode
+                yield ocid, [(ocid, uri, decode(release)) for _, uri, release in self.groups[ocid]]
+            else:
+                yield ocid, self.groups[ocid]
+
+    def close(self):
+        if self.disk:
+            self.disk.close()
+
+
+def _sizeof(value):
+    # Estimates the memory usage of a value. Objects that are shared, like interned strings, are counted each time.
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + _sizeof(item)
+    elif isinstance(value, list):
+        for item in value:
+            size += _sizeof(item)
+    return size
+
+
+class StoreBackend(AbstractBackend):
+    """
+    Stores releases in a persistent SQLite database, so that releases can be added over many runs, and only the OCIDs
+    whose releases changed since the last completed run are yielded.
+
+    The ``releases`` table holds the latest release with each OCID and ``id``, indexed by OCID. A release that is
+    identical to the stored release is ignored, and a release whose content changed replaces the stored release.
+
+    Each time the backend is opened, a run is started. The run is completed once all OCIDs are yielded by
+    :meth:`~ocdskit.packager.StoreBackend.get_releases_by_ocid`. If a run is interrupted, its OCIDs are yielded again
+    by the next run that completes.
+
+    Each batch of releases is committed when flushed. The database uses write-ahead logging, so that other processes
+    can read it while releases are added.
+    """
+    def __init__(self, path, changed_only=True, timeout=STORE_TIMEOUT):
+        """
+        :param str path: the path of the database file, which is created if it doesn't exist
+        :param bool changed_only: whether to yield only the OCIDs whose releases changed since the last completed run
+        :param float timeout: the number of seconds to wait for another process to finish writing
+        """
+        self.path = path
+        self.changed_only = changed_only
+
+        # https://docs.python.org/3/library/sqlite3.html#sqlite3.PARSE_DECLTYPES
+        self.connection = sqlite3.connect(path, timeout=timeout, detect_types=sqlite3.PARSE_DECLTYPES)
+        # https://sqlite.org/wal.html
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+
+        self.connection.execute("CREATE TABLE IF NOT EXISTS releases (id integer PRIMARY KEY, ocid text NOT NULL, "
+                                "uri text NOT NULL, release_id text NOT NULL, digest text NOT NULL, release json, "
+                                "run integer NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS ocid_idx ON releases(ocid)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS run_idx ON releases(run)")
+        self.connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS release_idx ON releases(ocid, release_id)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS runs (id integer PRIMARY KEY, completed integer NOT NULL "
+                                "DEFAULT 0)")
+
+        self.run = self.connection.execute("INSERT INTO runs DEFAULT VALUES").lastrowid
+        self.connection.commit()
+
+        self.buffer = []
+
+    def _add_release(self, ocid, package_uri, release):
+        data = json_dumpb(release)
+        digest = hashlib.sha256(data).hexdigest()
+        self.buffer.append((ocid, package_uri, str(release.get('id', '')), digest, data, self.run))
+
+    def flush(self):
+        # Replace a stored release only if its content changed, so that its run is that in which it last changed.
+        # https://sqlite.org/lang_upsert.html
+        self.connection.executemany("INSERT INTO releases (ocid, uri, release_id, digest, release, run) VALUES (?, ?, "
+                                    "?, ?, ?, ?) ON CONFLICT (ocid, release_id) DO UPDATE SET uri = excluded.uri, "
+                                    "digest = excluded.digest, release = excluded.release, run = excluded.run WHERE "
+                                    "digest != excluded.digest", self.buffer)
+        self.connection.commit()
+
+        self.buffer = []
+
+    def get_releases_by_ocid(self):
+        if self.changed_only:
+            # The releases added by this run or by interrupted runs have changed.
+            results = self.connection.execute("SELECT ocid, uri, release FROM releases WHERE ocid IN (SELECT ocid "
+                                              "FROM releases WHERE run NOT IN (SELECT id FROM runs WHERE completed)) "
+                                              "ORDER BY ocid, id")
+        else:
+            results = self.connection.execute("SELECT ocid, uri, release FROM releases ORDER BY ocid, id")
+
+        for ocid, rows in itertools.groupby(results, lambda row: row[0]):
+            yield ocid, rows
+
+        # The OCIDs of earlier, interrupted runs were yielded, too.
+        self.connection.execute("UPDATE runs SET completed = 1 WHERE id <= ? AND NOT completed", (self.run,))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'sort': SortMergeBackend,
+    'hybrid': HybridBackend,
+    'python': PythonBackend,
+    'store': StoreBackend,
+}
+
+
+class JSONCodec:
+    """
+    Encodes releases as compact JSON.
+    """
+    def encode(self, release):
+        """
+        Returns the release as bytes.
+        """
+        return json_dumpb(release)
+
+    def decode(self, data):
+        """
+        Returns the release encoded as bytes.
+        """
+        return json_loads(data)
+
+
+class ZlibCodec(JSONCodec):
+    """
+    Encodes releases as JSON, compressed with zlib.
+
+    Releases are small, and have many keys and values in common, so a preset dictionary is used, which is the JSON of
+    the first releases up to ``dictionary_size`` bytes. Releases encoded before the dictionary is set are compressed
+    without a dictionary. The first byte of an encoded release indicates whether the dictionary is used.
+
+    A codec must decode only the releases that it encoded.
+    """
+    def __init__(self, level=ZLIB_LEVEL, dictionary_size=ZLIB_DICTIONARY_SIZE):
+        """
+        :param int level: the compression level, from 1 (fastest) to 9 (smallest)
+        :param int dictionary_size: the size in bytes of the preset dictionary, or 0 to not use a dictionary
+        """
+        self.level = level
+        self.dictionary_size = dictionary_size
+        self.samples = []
+        self.samples_size = 0
+        self.prefix = b'\x00'
+
+        # Negative window bits omit the zlib header and checksum. The compressor and decompressors are copied for each
+        # release, so that the dictionary is processed once only.
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self.decompressors = {b'\x00': zlib.decompressobj(-zlib.MAX_WBITS)}
+
+    def encode(self, release):
+        data = json_dumpb(release)
+
+        if self.samples is not None and self.dictionary_size:
+            self.samples.append(data)
+            self.samples_size += len(data)
+            if self.samples_size >= self.dictionary_size:
+                self._set_dictionary(b''.join(self.samples)[-self.dictionary_size:])
+
+        compressor = self.compressor.copy()
+        return self.prefix + compressor.compress(data) + compressor.flush()
+
+    def _set_dictionary(self, dictionary):
+        self.samples = None
+        self.prefix = b'\x01'
+        self.compressor = zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+        self.decompressors[self.prefix] = zlib.decompressobj(-zlib.MAX_WBITS, zdict=dictionary)
+
+    def decode(self, data):
+        decompressor = self.decompressors[data[:1]].copy()
+        return json_loads(decompressor.decompress(memoryview(data)[1:]) + decompressor.flush())
+
+
+CODECS = {
+    'json': JSONCodec,
+    'zlib': ZlibCodec,
+}
+
+
+def _get_codec(name):
+    if name is None:
+        return None
+    if name not in CODECS:
+        raise BackendOptionError('codec must be one of {}, not {}'.format(', '.join(CODECS), name))
+    return CODECS[name]()
+
+
+class ReleaseCache:
+    """
+    Caches compiled releases and versioned releases in a persistent SQLite database, so that the releases of an OCID
+    aren't merged again if they are unchanged since an earlier run.
+
+    An entry's key is a digest of the OCID, the sorted ``id`` and ``date`` of its releases, and a fingerprint of the
+    merger's merge rules, which depend on the schema and its extensions. Since a release's ``id`` must change if its
+    content changes, the releases' contents aren't digested.
+
+    The least recently used entries are evicted once the cache exceeds its maximum size. Changes are committed in
+    batches, and once the cache is closed. The database uses write-ahead logging, so that many processes can use it.
+    """
+    def __init__(self, path, max_size=CACHE_MAX_SIZE, timeout=STORE_TIMEOUT):
+        """
+        :param str path: the path of the database file, which is created if it doesn't exist
+        :param int max_size: the maximum size of the cached releases, in bytes
+        :param float timeout: the number of seconds to wait for another process to finish writing
+        :raises BackendOptionError: if sqlite3 is unavailable
+        """
+        if not USING_SQLITE:
+            raise BackendOptionError('the cache is unavailable, because sqlite3 is unavailable')
+
+        self.path = path
+        self.max_size = max_size
+
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        # https://sqlite.org/wal.html
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+
+        self.connection.execute("CREATE TABLE IF NOT EXISTS entries (key text PRIMARY KEY, compiled blob, versioned "
+                                "blob, size integer NOT NULL, accessed integer NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS accessed_idx ON entries(accessed)")
+
+        # The time of access is a counter, rather than a clock, so that the order of accesses is exact.
+        self.clock, self.size = self.connection.execute("SELECT coalesce(max(accessed), 0), coalesce(sum(size), 0) "
+                                                        "FROM entries").fetchone()
+        self.changes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.close()
+
+    @staticmethod
+    def fingerprint(merger):
+        """
+        Returns a digest of the merger's merge rules and rule overrides.
+
+        :param ocdsmerge.merge.Merger merger: a merger
+        """
+        return hashlib.sha256(json_dumpb([
+            sorted([list(path), sorted(rules)] for path, rules in merger.merge_rules.items()),
+            sorted([list(path), str(rule)] for path, rule in merger.rule_overrides.items()),
+        ])).hexdigest()
+
+    @staticmethod
+    def digest(releases, fingerprint):
+        """
+        Returns the key of the cache entry for the releases of an OCID.
+
+        :param list releases: the releases of an OCID
+        :param str fingerprint: the merger's fingerprint: see :meth:`~ocdskit.packager.ReleaseCache.fingerprint`
+        """
+        ocid = releases[0].get('ocid') if releases else None
+        # `date` can be a nested object in invalid data, so both values are made strings.
+        pairs = sorted((str(release.get('date', '')), str(release.get('id', ''))) for release in releases)
+        return hashlib.sha256(json_dumpb([fingerprint, ocid, pairs])).hexdigest()
+
+    def get(self, key, compiled=True, versioned=False):
+        """
+        Returns the cached compiled release and versioned release, or None if not requested, or returns None if either
+        requested release isn't cached.
+
+        :param str key: the key of the cache entry
+        :param bool compiled: whether the compiled release is requested
+        :param bool versioned: whether the versioned release is requested
+        """
+        row = self.connection.execute("SELECT compiled, versioned FROM entries WHERE key = ?", (key,)).fetchone()
+        if not row or compiled and row[0] is None or versioned and row[1] is None:
+            return None
+
+        self.clock += 1
+        self.connection.execute("UPDATE entries SET accessed = ? WHERE key = ?", (self.clock, key))
+        self._changed()
+
+        # Like the SQLite backend, decode numbers with fractions as floats.
+        return (
+            jsonlib.loads(row[0]) if compiled else None,
+            jsonlib.loads(row[1]) if versioned else None,
+        )
+
+    def set(self, key, compiled_release=None, versioned_release=None):
+        """
+        Caches a compiled release and/or a versioned release, replacing the same kind of release, if cached, and
+        keeping the other kind, so that runs that request different kinds don't evict each other's releases.
+
+        :param str key: the key of the cache entry
+        :param dict compiled_release: the compiled release
+        :param dict versioned_release: the versioned release
+        """
+        compiled = json_dumpb(compiled_release) if compiled_release is not None else None
+        versioned = json_dumpb(versioned_release) if versioned_release is not None else None
+
+        row = self.connection.execute("SELECT compiled, versioned, size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row:
+            if compiled is None:
+                compiled = row[0]
+            if versioned is None:
+                versioned = row[1]
+            self.size -= row[2]
+
+        size = len(compiled or b'') + len(versioned or b'')
+
+        self.clock += 1
+        self.connection.execute("INSERT OR REPLACE INTO entries (key, compiled, versioned, size, accessed) VALUES "
+                                "(?, ?, ?, ?, ?)", (key, compiled, versioned, size, self.clock))
+        self.size += size
+        self._changed()
+
+    def _changed(self):
+        self.changes += 1
+        if self.changes >= CACHE_COMMIT_INTERVAL:
+            self.commit()
+
+    def commit(self):
+        """
+        Evicts the least recently used entries until the cache is at most its maximum size, and commits changes.
+        """
+        excess = self.size - self.max_size
+        if excess > 0:
+            keys = []
+            for key, size in self.connection.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                keys.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            self.connection.executemany("DELETE FROM entries WHERE key = ?", keys)
+            # Another process might have changed the cache.
+            self.size = self.connection.execute("SELECT coalesce(sum(size), 0) FROM entries").fetchone()[0]
+
+        self.connection.commit()
+        self.changes = 0
+
+    def close(self):
+        """
+        Commits changes and closes the database.
+        """
+        self.commit()
+        self.connection.close()
+
+
+class ReleaseDeduplicator:
+    """
+    Detects releases with the same ``ocid`` and ``id`` as an earlier release, so that publishers' copies of the same
+    release across package files aren't stored and merged many times.
+
+    Each release is keyed by a digest of its ``ocid`` and ``id``. If ``compare_content`` is set, a digest of each
+    release's JSON is also compared: a release with the same key and content as an earlier release is a duplicate, and
+    a release with the same key but different content is a conflicting duplicate, which is kept, so that no data is
+    lost. Releases without an ``id`` are kept.
+
+    The digests are held in a set in memory, unless ``on_disk`` is set, in which case they're held in a temporary
+    SQLite database, indexed by digest, so that the memory usage is bounded for large inputs.
+    """
+    def __init__(self, compare_content=False, on_disk=False, tempdir=None):
+        """
+        :param bool compare_content: whether to keep releases with the same ``ocid`` and ``id`` as an earlier release,
+            if their content is different
+        :param bool on_disk: whether to hold the digests in a temporary SQLite database, instead of in memory
+        :param str tempdir: the directory in which to create the temporary file, instead of the default directory
+        :raises BackendOptionError: if ``on_disk`` is set, and sqlite3 is unavailable
+        """
+        if on_disk and not USING_SQLITE:
+            raise BackendOptionError('the on-disk index is unavailable, because sqlite3 is unavailable')
+
+        self.compare_content = compare_content
+        self.duplicates = 0
+        self.conflicts = 0
+        self.file = None
+        self.connection = None
+
+        if on_disk:
+            self.file = NamedTemporaryFile(suffix='.sqlite', dir=tempdir, delete=False)
+            self.connection = sqlite3.connect(self.file.name)
+            # The database is temporary, like the SQLite backend's.
+            for name, value in SQLITE_PRAGMAS.items():
+                self.connection.execute('PRAGMA {} = {}'.format(name, value))
+            self.connection.execute("CREATE TABLE releases (key blob NOT NULL, content blob NOT NULL, PRIMARY KEY "
+                                    "(key, content)) WITHOUT ROWID")
+        else:
+            self.keys = set()
+            # The concatenated digests of the key and the content, if comparing content.
+            self.pairs = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.close()
+
+    def is_duplicate(self, release):
+        """
+        Records the release, and returns whether it is a duplicate of an earlier release. Counts duplicates in
+        ``duplicates`` and conflicting duplicates in ``conflicts``.
+
+        :param dict release: a release
+        """
+        ocid = release.get('ocid')
+        release_id = release.get('id')
+        if ocid is None or release_id is None:
+            return False
+
+        # `id` can be a number in invalid data, so it is made a string.
+        key = hashlib.blake2b('{}\0{}'.format(ocid, release_id).encode('utf-8', 'surrogatepass'),
+                              digest_size=16).digest()
+        if self.compare_content:
+            content = hashlib.blake2b(json_dumpb(release), digest_size=16).digest()
+        else:
+            content = b''
+
+        if self.connection:
+            cursor = self.connection.execute("INSERT OR IGNORE INTO releases VALUES (?, ?)", (key, content))
+            if not cursor.rowcount:
+                self.duplicates += 1
+                return True
+            if self.compare_content:
+                count = self.connection.execute("SELECT count(*) FROM releases WHERE key = ?", (key,)).fetchone()[0]
+                if count > 1:
+                    self.conflicts += 1
+            return False
+
+        if self.compare_content:
+            pair = key + content
+            if pair in self.pairs:
+                self.duplicates += 1
+                return True
+            self.pairs.add(pair)
+
+        if key in self.keys:
+            if self.compare_content:
+                self.conflicts += 1
+                return False
+            self.duplicates += 1
+            return True
+
+        self.keys.add(key)
+        return False
+
+    def close(self):
+        """
+        Deletes the temporary database, if any.
+        """
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+        if self.file:
+            self.file.close()
+            os.unlink(self.file.name)
+            self.file = None
@@ -0,0 +1,207 @@
+import hashlib
+import logging
+import os
+import time
+from tempfile import NamedTemporaryFile
+
+import requests
+from ocdsextensionregistry import ProfileBuilder
+from ocdsmerge import Merger
+from ocdsmerge.merge import get_merge_rules
+from ocdsmerge.util import get_release_schema_url, get_tags
+
+from ocdskit.exceptions import SchemaCacheMissError
+from ocdskit.util import json_dumpb, jsonlib
+
+# The number of seconds after which to download the tags, patched release schemas and schemas at URLs again, unless
+# offline.
+SCHEMA_CACHE_MAX_AGE = 86400
+
+logger = logging.getLogger('ocdskit')
+
+
+def default_directory():
+    """
+    Returns the directory of the schema cache: the ``OCDSKIT_CACHE_DIR`` environment variable, if set, otherwise an
+    ``ocdskit`` directory in the user's cache directory.
+    """
+    if os.getenv('OCDSKIT_CACHE_DIR'):
+        return os.getenv('OCDSKIT_CACHE_DIR')
+    return os.path.join(os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'ocdskit')
+
+
+class SchemaCache:
+    """
+    Caches the tags of OCDS versions, release schemas, patched release schemas and merge rules as JSON files, so that
+    merging releases doesn't access the network once the cache is warm.
+
+    A release schema is keyed by its tag, a patched release schema by its tag and its extension URLs, and merge rules
+    by the schema from which they are derived, or by its tag and its sorted extension URLs. As new versions of OCDS and
+    of extensions can be released, and as a schema at a URL can change, the tags, the patched release schemas and the
+    merge rules of schemas at URLs are downloaded again once older than ``max_age``, unless offline. If downloading
+    fails, the expired file is used, with a warning. Files are written atomically, so that many processes can share the
+    cache.
+    """
+    def __init__(self, directory=None, offline=False, max_age=SCHEMA_CACHE_MAX_AGE):
+        """
+        :param str directory: the directory of the cache, which is created if it doesn't exist (by default, the
+            directory returned by :meth:`~ocdskit.schema_cache.default_directory`)
+        :param bool offline: whether to not access the network, in which case files that aren't cached raise an error
+        :param float max_age: the number of seconds after which to download the tags, patched release schemas and
+            schemas at URLs again
+        """
+        self.directory = directory or default_directory()
+        self.offline = offline
+        self.max_age = max_age
+
+    def get_tags(self):
+        """
+        Returns the tags of all versions of OCDS in alphabetical order.
+
+        :raises SchemaCacheMissError: if offline, and the tags aren't cached
+        """
+        return self._get(('tags.json',), 'the tags of OCDS versions', get_tags, self.max_age)
+
+    def get_latest_tag(self, version=None):
+        """
+        Returns the tag of the latest version of OCDS, or of the latest patch version of the given minor version.
+
+        :param str version: a minor version of OCDS, like "1.1"
+        :raises SchemaCacheMissError: if offline, and the tags aren't cached
+        """
+        tags = self.get_tags()
+        if not version:
+            return tags[-1]
+        prefix = version.replace('.', '__') + '__'
+        return next(tag for tag in reversed(tags) if tag.startswith(prefix))
+
+    def get_release_schema(self, tag):
+        """
+        Returns the release schema of a version of OCDS.
+
+        :param str tag: the tag of the version of OCDS
+        :raises SchemaCacheMissError: if offline, and the release schema isn't cached
+        """
+        return self._get(('release-schema', tag + '.json'), 'the release schema of {}'.format(tag),
+                         lambda: _download(get_release_schema_url(tag)))
+
+    def get_patched_release_schema(self, tag, extensions, schema=None, extension_field=None):
+        """
+        Returns the release schema of a version of OCDS, or the given schema, patched with extensions.
+
+        :param str tag: the tag of the version of OCDS, if ``schema`` isn't set
+        :param list extensions: the extensions' metadata URLs, base URLs and/or download URLs
+        :param dict schema: the schema to patch, instead of the version's release schema
+        :param str extension_field: the property with which to annotate each definition and field with the name of the
+            extension in which the definition or field was defined
+        :raises SchemaCacheMissError: if offline, and the patched release schema isn't cached
+        """
+        # The order of the extensions can change the order of the patched release schema's properties.
+        key = _digest([tag, list(extensions), _digest(schema) if schema else None, extension_field])
+
+        def function():
+            builder = ProfileBuilder(tag, list(extensions))
+            return builder.patched_release_schema(schema=schema, extension_field=extension_field)
+
+        name = '{} patched with {}'.format('the release schema of {}'.format(tag) if tag else 'the given schema',
+                                           ', '.join(extensions))
+
+        return self._get(('patched-release-schema', key + '.json'), name, function, self.max_age)
+
+    def get_merger(self, schema=None, tag=None, extensions=None):
+        """
+        Returns a merger for the given schema or, if ``schema`` isn't set, for the release schema of the given version
+        of OCDS (by default, the latest version), patched with the given extensions, if any.
+
+        The merge rules are cached, unless ``schema`` is a local path.
+
+        :param schema: the URL, path or dict of the patched release schema to use
+        :param str tag: the tag of the version of OCDS, if ``schema`` isn't set
+        :param list extensions: the extensions' metadata URLs, base URLs and/or download URLs, if ``schema`` isn't set
+        :raises SchemaCacheMissError: if offline, and the merge rules aren't cached
+        """
+        max_age = None
+
+        if isinstance(schema, dict):
+            key = _digest(schema)
+            name = 'the merge rules of the given schema'
+
+            def function():
+                return get_merge_rules(schema)
+        elif schema:
+            if not schema.startswith(('http://', 'https://')):
+                return Merger(schema)
+
+            key = _digest(['url', schema])
+            name = 'the merge rules of {}'.format(schema)
+            # The schema at the URL can change.
+            max_age = self.max_age
+
+            def function():
+                return get_merge_rules(_download(schema))
+        else:
+            tag = tag or self.get_latest_tag()
+            extensions = sorted(extensions or [])
+            key = _digest(['tag', tag, extensions])
+            name = 'the merge rules of {}'.format(tag)
+
+            if extensions:
+                # The merge rules must expire with the patched release schema.
+                max_age = self.max_age
+
+                def function():
+                    return get_merge_rules(self.get_patched_release_schema(tag, extensions))
+            else:
+                def function():
+                    return get_merge_rules(self.get_release_schema(tag))
+
+        rules = self._get(('merge-rules', key + '.json'), name,
+                          lambda: [[list(path), sorted(value)] for path, value in function().items()], max_age)
+
+        return Merger(merge_rules={tuple(path): set(value) for path, value in rules})
+
+    def _get(self, parts, name, function, max_age=None):
+        path = os.path.join(self.directory, *parts)
+
+        try:
+            if self.offline or max_age is None or time.time() - os.path.getmtime(path) < max_age:
+                with open(path, 'rb') as f:
+                    return jsonlib.loads(f.read())
+            expired = True
+        except FileNotFoundError:
+            if self.offline:
+                raise SchemaCacheMissError('{} is not in the schema cache at {}, and the cache is offline'.format(
+                    name, self.directory), path)
+            expired = False
+
+        try:
+            data = function()
+        except requests.RequestException as e:
+            if not expired:
+                raise
+            logger.warning('%s could not be downloaded again, so the expired copy in the schema cache is used: %s',
+                           name, e)
+            with open(path, 'rb') as f:
+                return jsonlib.loads(f.read())
+
+        self._write(path, data)
+        return data
+
+    def _write(self, path, data):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file, and then rename it, so that other processes don't read a partial file.
+        with NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as f:
+            f.write(json_dumpb(data))
+        os.replace(f.name, path)
+
+
+def _download(url):
+    response = requests.get(url)
+    response.raise_for_status()
+    return response.json()
+
+
+def _digest(data):
+    return hashlib.sha256(json_dumpb(data, sort_keys=True)).hexdigest()
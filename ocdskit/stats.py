@@ -0,0 +1,288 @@
+import sys
+import threading
+import time
+from collections import defaultdict
+
+try:
+    import resource
+
+    USING_RESOURCE = True
+except ImportError:  # Windows
+    USING_RESOURCE = False
+
+# The phases of processing, in the order in which to report them.
+PHASES = ('parse', 'transform', 'deduplicate', 'backend', 'cache', 'merge', 'encode', 'write')
+
+# The default number of allocation sites to report at each checkpoint, if tracing memory.
+TOP_ALLOCATIONS = 10
+
+# Don't report allocations by this module, by tracemalloc or by the import system.
+_TRACEMALLOC_FILTERS = (
+    __file__,
+    '<frozen importlib._bootstrap>',
+    '<frozen importlib._bootstrap_external>',
+    '<unknown>',
+)
+
+
+class Stats:
+    """
+    Collects counters, and the wall time and CPU time of each phase of processing.
+
+    Phases can be nested: while a nested phase runs, the time of the outer phase is paused, so that the times of the
+    phases add up to at most the total time. The CPU time is the CPU time of the process, across all threads.
+
+    Memory usage is recorded at checkpoints. If ``trace_memory`` is ``True``, memory allocations are traced with
+    ``tracemalloc``, which slows the program and increases its memory usage.
+    """
+    enabled = True
+
+    def __init__(self, trace_memory=False, top=TOP_ALLOCATIONS):
+        """
+        :param bool trace_memory: whether to trace memory allocations
+        :param int top: the number of allocation sites to report at each checkpoint, if tracing memory
+        """
+        self.counters = defaultdict(int)
+        self.phases = {}
+        self.checkpoints = []
+        self.trace_memory = trace_memory
+        self.top = top
+        self._stack = []
+        self._lock = threading.Lock()
+        self._snapshot = None
+        if trace_memory:
+            # tracemalloc imports pickle, which is slow to import, so it is imported only if tracing memory.
+            import tracemalloc
+
+            tracemalloc.start()
+            self._snapshot = self._take_snapshot()
+        self._start = self._now()
+
+    @staticmethod
+    def _now():
+        return time.perf_counter(), time.process_time()
+
+    def count(self, name, value=1):
+        """
+        Increments a counter.
+
+        :param str name: the counter's name, like ``items``
+        :param int value: the value by which to increment the counter
+        """
+        with self._lock:
+            self.counters[name] += value
+
+    def phase(self, name):
+        """
+        Returns a context manager that measures the time of a phase.
+
+        :param str name: the phase's name, like ``parse``
+        """
+        return _Phase(self, name)
+
+    def iterate(self, name, iterable):
+        """
+        Yields the items of the iterable, measuring the time to get each item as the time of a phase.
+
+        :param str name: the phase's name, like ``parse``
+        """
+        iterator = iter(iterable)
+        while True:
+            self.start(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stop()
+            yield item
+
+    def start(self, name):
+        """
+        Starts measuring the time of a phase, pausing the current phase, if any.
+        """
+        now = self._now()
+        if self._stack:
+            self._add(self._stack[-1], now)
+        self._stack.append([name, *now])
+
+    def stop(self):
+        """
+        Stops measuring the time of the current phase, resuming the outer phase, if any.
+        """
+        now = self._now()
+        self._add(self._stack.pop(), now)
+        if self._stack:
+            self._stack[-1][1:] = now
+
+    def checkpoint(self, name):
+        """
+        Records the peak resident set size of the process, if available. If tracing memory, also records the current
+        and peak size of traced memory, and the allocation sites whose size changed most since the previous
+        checkpoint.
+
+        :param str name: the checkpoint's name, like ``Packager.add``
+        """
+        checkpoint = {'name': name, 'peak_rss': _peak_rss()}
+
+        if self.trace_memory:
+            import tracemalloc
+
+            checkpoint['traced'], checkpoint['traced_peak'] = tracemalloc.get_traced_memory()
+
+            snapshot = self._take_snapshot()
+            checkpoint['top'] = [{
+                'site': '{}:{}'.format(statistic.traceback[0].filename, statistic.traceback[0].lineno),
+                'size': statistic.size,
+                'size_diff': statistic.size_diff,
+                'count': statistic.count,
+            } for statistic in snapshot.compare_to(self._snapshot, 'lineno')[:self.top]]
+            self._snapshot = snapshot
+
+        self.checkpoints.append(checkpoint)
+
+    @staticmethod
+    def _take_snapshot():
+        import tracemalloc
+
+        filters = [tracemalloc.Filter(False, pattern) for pattern in (tracemalloc.__file__, *_TRACEMALLOC_FILTERS)]
+        return tracemalloc.take_snapshot().filter_traces(filters)
+
+    def close(self):
+        """
+        Stops tracing memory allocations, if tracing.
+        """
+        if self.trace_memory:
+            import tracemalloc
+
+            self._snapshot = None
+            tracemalloc.stop()
+
+    def _add(self, entry, now):
+        name, wall, cpu = entry
+        phase = self.phases.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'calls': 0})
+        phase['wall'] += now[0] - wall
+        phase['cpu'] += now[1] - cpu
+        phase['calls'] += 1
+
+    def as_dict(self):
+        """
+        Returns the counters, the rates of the counters per second, the total wall time and CPU time, the wall time,
+        CPU time and number of calls of each phase, and the checkpoints.
+        """
+        wall, cpu = (now - start for now, start in zip(self._now(), self._start))
+
+        return {
+            'wall': wall,
+            'cpu': cpu,
+            'counters': dict(self.counters),
+            'rates': {name: value / wall if wall else 0 for name, value in self.counters.items()},
+            'phases': {name: dict(self.phases[name]) for name in _sort_phases(self.phases)},
+            'checkpoints': self.checkpoints,
+        }
+
+    def report(self):
+        """
+        Returns a human-readable report of the counters and phases.
+        """
+        data = self.as_dict()
+
+        lines = []
+        for name, value in data['counters'].items():
+            lines.append('{}: {} ({:.1f}/s)'.format(name, value, data['rates'][name]))
+        lines.append('total: {:.3f}s wall, {:.3f}s CPU'.format(data['wall'], data['cpu']))
+
+        if data['phases']:
+            lines.append('{:<10} {:>10} {:>10} {:>10}'.format('phase', 'wall (s)', 'CPU (s)', 'calls'))
+            for name, phase in data['phases'].items():
+                lines.append('{:<10} {wall:>10.3f} {cpu:>10.3f} {calls:>10}'.format(name, **phase))
+
+        for checkpoint in data['checkpoints']:
+            line = '{}: peak RSS {}'.format(checkpoint['name'], _format_size(checkpoint['peak_rss']))
+            if 'traced' in checkpoint:
+                line += ', traced {} (peak {})'.format(_format_size(checkpoint['traced']),
+                                                       _format_size(checkpoint['traced_peak']))
+            lines.append(line)
+
+            for site in checkpoint.get('top', []):
+                size_diff = _format_size(site['size_diff'], sign=True)
+                size = _format_size(site['size'])
+                lines.append('  {:>10} {:>10} {:>10} {}'.format(size_diff, size, site['count'], site['site']))
+
+        return '\n'.join(lines)
+
+
+class NullStats(Stats):
+    """
+    Collects nothing. Use it instead of :class:`~ocdskit.stats.Stats` to disable statistics.
+    """
+    enabled = False
+
+    def count(self, name, value=1):
+        pass
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def iterate(self, name, iterable):
+        return iterable
+
+    def start(self, name):
+        pass
+
+    def stop(self):
+        pass
+
+    def checkpoint(self, name):
+        pass
+
+
+class _Phase:
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.stats.start(self.name)
+
+    def __exit__(self, type_, value, traceback):
+        self.stats.stop()
+
+
+class _NullPhase:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, type_, value, traceback):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def _sort_phases(phases):
+    return sorted(phases, key=lambda name: (PHASES.index(name) if name in PHASES else len(PHASES), name))
+
+
+def _peak_rss():
+    if not USING_RESOURCE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # https://docs.python.org/3/library/resource.html#resource.getrusage
+    if sys.platform == 'darwin':
+        return peak
+    return peak * 1024
+
+
+def _format_size(size, sign=False):
+    if size is None:
+        return 'unknown'
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            break
+        size /= 1024
+    else:
+        unit = 'GiB'
+    if unit == 'B':
+        return '{:{}}{}'.format(size, '+' if sign else '', unit)
+    return '{:{}.1f}{}'.format(size, '+' if sign else '', unit)
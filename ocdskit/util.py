@@ -1,6 +1,11 @@
 import itertools
 import json
+import mmap
+import re
+from collections.abc import Iterator
+from contextlib import contextmanager
 from decimal import Decimal
+
 import ijson
 
 from ocdskit.exceptions import UnknownFormatError
@@ -15,6 +20,126 @@ except ImportError:
     USING_ORJSON = False
 
 
+# The default size of the buffer with which ijson reads files.
+BUF_SIZE = 64 * 1024
+
+# The ijson backends that can be selected, from fastest to slowest.
+IJSON_BACKENDS = ('yajl2_c', 'yajl2_cffi', 'python')
+
+# The ijson backends that are much slower than the C backend.
+SLOW_IJSON_BACKENDS = ('python',)
+
+# The ijson backends that accept `memoryview` objects from a file's `read` method.
+MEMORYVIEW_BACKENDS = ('yajl2_c', 'python')
+
+# ijson selects the fastest available backend by default.
+_ijson_backend = ijson
+
+
+def get_ijson_backend():
+    """
+    Returns the ijson backend with which JSON is parsed.
+
+    The backend's name is its ``backend`` attribute.
+    """
+    return _ijson_backend
+
+
+def set_ijson_backend(name):
+    """
+    Sets the ijson backend with which to parse JSON. By default, ijson selects the fastest available backend.
+
+    :param str name: the name of the backend, like ``yajl2_c``, ``yajl2_cffi`` or ``python``
+    :raises ImportError: if the backend is unavailable
+    """
+    global _ijson_backend
+
+    _ijson_backend = ijson.get_backend(name)
+
+
+class MmapReader:
+    """
+    Reads a file using a memory map. The ``read`` method returns ``memoryview`` slices of the memory map, to avoid
+    copying data.
+
+    Use it as a context manager, to close the memory map.
+    """
+    def __init__(self, file):
+        """
+        :param file: a binary file
+        :raises ValueError: if the file is empty
+        :raises OSError: if the file can't be memory-mapped, like a pipe
+        """
+        self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mmap)
+        self.position = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.close()
+
+    def read(self, size=-1):
+        # ijson reads zero bytes to determine whether the file is binary.
+        if not size:
+            return b''
+        if size < 0:
+            end = len(self.view)
+        else:
+            end = self.position + size
+        data = self.view[self.position:end]
+        self.position += len(data)
+        return data
+
+    def close(self):
+        self.view.release()
+        try:
+            self.mmap.close()
+        # If a slice is still referenced, the memory map is closed once the slice is garbage collected.
+        except BufferError:
+            pass
+
+
+@contextmanager
+def zero_copy_reader(file):
+    """
+    Returns a context manager that yields an :class:`~ocdskit.util.MmapReader` for the file, if possible. Otherwise,
+    yields the file.
+
+    :param file: a binary file
+    """
+    if _ijson_backend.backend not in MEMORYVIEW_BACKENDS:
+        yield file
+        return
+
+    try:
+        reader = MmapReader(file)
+    except (ValueError, OSError):
+        yield file
+    else:
+        with reader:
+            yield reader
+
+
+_KEY_SEPARATOR = {False: b':', True: b': '}
+
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+_NON_ASCII_BYTES = re.compile(rb'[^\x00-\x7f]')
+
+
+def is_ascii(data):
+    """
+    Returns whether the bytes are all ASCII.
+    """
+    # `bytes.isascii()` is new in Python 3.7.
+    try:
+        return data.isascii()
+    except AttributeError:
+        return not _NON_ASCII_BYTES.search(data)
+
+
 # See `grouper` recipe: https://docs.python.org/3.8/library/itertools.html#recipes
 def grouper(iterable, n, fillvalue=None):
     args = [iter(iterable)] * n
@@ -57,11 +182,101 @@ def iterencode(data, ensure_ascii=False, **kwargs):
     """
     Returns a generator that yields each string representation as available.
     """
+    # `_orjson_iterencode` escapes non-ASCII characters itself, if `ensure_ascii` is set.
+    if _can_use_orjson(False, kwargs.get('indent'), {k: v for k, v in kwargs.items() if k != 'indent'}):
+        return (chunk.decode() for chunk in _orjson_iterencode(data, ensure_ascii, kwargs.get('indent')))
+
     if 'indent' not in kwargs:
         kwargs['separators'] = (',', ':')
     return JSONEncoder(ensure_ascii=ensure_ascii, **kwargs).iterencode(data)
 
 
+def iterencodeb(data, ensure_ascii=False, indent=None, **kwargs):
+    """
+    Returns a generator that yields each UTF-8 bytes representation as available.
+
+    If orjson is available, writes the JSON objects and arrays that contain iterators, and encodes the other values
+    using orjson, one at a time.
+    """
+    if not _can_use_orjson(False, indent, kwargs):
+        if indent is not None:
+            kwargs['indent'] = indent
+        return (chunk.encode() for chunk in iterencode(data, ensure_ascii=ensure_ascii, **kwargs))
+
+    return _orjson_iterencode(data, ensure_ascii, indent)
+
+
+def _orjson_iterencode(data, ensure_ascii, indent, level=0):
+    if isinstance(data, dict) and any(isinstance(value, Iterator) for value in data.values()):
+        separator = _KEY_SEPARATOR[bool(indent)]
+        items = ((_encode_key(key, ensure_ascii) + separator, value) for key, value in data.items())
+        yield from _orjson_iterencode_container(b'{', b'}', items, ensure_ascii, indent, level)
+    elif isinstance(data, Iterator):
+        items = ((b'', value) for value in data)
+        yield from _orjson_iterencode_container(b'[', b']', items, ensure_ascii, indent, level)
+    else:
+        chunk = _orjson_dumps(data, indent, False)
+        if indent and level:
+            # orjson only writes newlines between tokens, as newlines in strings are escaped.
+            chunk = chunk.replace(b'\n', b'\n' + b'  ' * level)
+        if ensure_ascii and not is_ascii(chunk):
+            chunk = _escape_non_ascii(chunk)
+        yield chunk
+
+
+def _encode_key(key, ensure_ascii):
+    # Like `json.JSONEncoder`, coerce numbers, booleans and `None` to strings. orjson never escapes non-ASCII.
+    if isinstance(key, str):
+        pass
+    elif key is True:
+        key = 'true'
+    elif key is False:
+        key = 'false'
+    elif key is None:
+        key = 'null'
+    elif isinstance(key, (int, float)):
+        key = json.dumps(key)
+    else:
+        raise TypeError('keys must be str, int, float, bool or None, not {}'.format(key.__class__.__name__))
+    return json.dumps(key, ensure_ascii=ensure_ascii).encode()
+
+
+def _orjson_iterencode_container(start, end, items, ensure_ascii, indent, level):
+    if indent:
+        separator = b'\n' + b'  ' * (level + 1)
+        end = b'\n' + b'  ' * level + end
+    else:
+        separator = b''
+
+    empty = True
+    for prefix, value in items:
+        if empty:
+            yield start
+            empty = False
+        else:
+            yield b','
+        yield separator + prefix
+        yield from _orjson_iterencode(value, ensure_ascii, indent, level + 1)
+
+    if empty:
+        yield start + end[-1:]
+    else:
+        yield end
+
+
+def _escape_non_ascii(chunk):
+    # Non-ASCII characters only occur in strings. Characters outside the BMP are escaped as surrogate pairs.
+    return _NON_ASCII.sub(_escape_character, chunk.decode()).encode()
+
+
+def _escape_character(match):
+    code_point = ord(match.group())
+    if code_point < 0x10000:
+        return '\\u{:04x}'.format(code_point)
+    code_point -= 0x10000
+    return '\\u{:04x}\\u{:04x}'.format(0xd800 | code_point >> 10, 0xdc00 | code_point & 0x3ff)
+
+
 def json_dump(data, io, ensure_ascii=False, **kwargs):
     """
     Dumps JSON to a file-like object.
@@ -75,21 +290,67 @@ def json_dumps(data, ensure_ascii=False, indent=None, sort_keys=False, **kwargs)
     """
     Dumps JSON to a string, and returns it.
     """
-    # orjson doesn't support `ensure_ascii` if `True`, `indent` if not `2` or other arguments except for `sort_keys`.
-    if not USING_ORJSON or ensure_ascii or indent and indent != 2 or kwargs:
+    if not _can_use_orjson(ensure_ascii, indent, kwargs):
         if not indent:
             kwargs['separators'] = (',', ':')
         return json.dumps(data, cls=JSONEncoder, ensure_ascii=ensure_ascii, indent=indent, sort_keys=sort_keys,
                           **kwargs)
 
-    option = 0
+    # orjson dumps to bytes.
+    return _orjson_dumps(data, indent, sort_keys).decode()
+
+
+def json_dumpb(data, ensure_ascii=False, indent=None, sort_keys=False, **kwargs):
+    """
+    Dumps JSON to UTF-8 bytes, and returns it.
+    """
+    if not _can_use_orjson(ensure_ascii, indent, kwargs):
+        return json_dumps(data, ensure_ascii=ensure_ascii, indent=indent, sort_keys=sort_keys, **kwargs).encode()
+
+    return _orjson_dumps(data, indent, sort_keys)
+
+
+def json_loads(data, object_pairs_hook=None):
+    """
+    Loads JSON from a string or bytes, and returns it.
+
+    Numbers with fractions are loaded as floats if orjson is available, and as ``Decimal`` otherwise, like ijson.
+
+    :param object_pairs_hook: a function to which to pass each object's key-value pairs, like ``OrderedDict``
+    :raises ValueError: if the JSON is invalid
+    """
+    if USING_ORJSON and not object_pairs_hook:
+        return orjson.loads(data)
+
+    return json.loads(data, object_pairs_hook=object_pairs_hook, parse_float=Decimal)
+
+
+def _can_use_orjson(ensure_ascii, indent, kwargs):
+    # orjson doesn't support `ensure_ascii` if `True`, `indent` if not `2` or other arguments except for `sort_keys`.
+    return USING_ORJSON and not ensure_ascii and (not indent or indent == 2) and not kwargs
+
+
+def _orjson_dumps(data, indent, sort_keys):
+    # Like `json.JSONEncoder`, coerce non-string keys to strings. The option is set before encoding, instead of on
+    # error, as encoding consumes any iterators in the data.
+    option = orjson.OPT_NON_STR_KEYS
     if indent:
         option |= orjson.OPT_INDENT_2
     if sort_keys:
         option |= orjson.OPT_SORT_KEYS
 
-    # orjson dumps to bytes.
-    return orjson.dumps(data, default=JSONEncoder().default, option=option).decode()
+    return orjson.dumps(data, default=_orjson_default, option=option)
+
+
+def _orjson_default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    # Unlike `JSONEncoder`, orjson serializes a list subclass without calling its `__iter__` method.
+    try:
+        return list(obj)
+    except TypeError:
+        pass
+    raise TypeError
 
 
 def get_ocds_minor_version(data):
@@ -187,7 +448,7 @@ def _empty_package(uri, publisher, published_date, version):
     }
 
 
-def detect_format(path, root_path=''):
+def detect_format(path, root_path='', buf_size=BUF_SIZE):
     """
     Returns the format of OCDS data, and whether the OCDS data is concatenated or in an array.
 
@@ -195,53 +456,56 @@ def detect_format(path, root_path=''):
 
     :param str path: the path to a file
     :param str root_path: the path to the OCDS data within the file
+    :param int buf_size: the number of bytes to read at a time
     :returns: the format, whether data is concatenated, and whether data is in an array
     :rtype: tuple
     :raises UnknownFormatError: if the format cannot be detected
     """
-    with open(path, 'rb') as f:
-        events = iter(ijson.parse(f, multiple_values=True))
-
-        while True:
-            prefix, event, value = next(events)
-            if prefix == root_path:
-                break
-
-        if prefix:
-            prefix += '.'
-
-        if event == 'start_array':
-            prefix += 'item.'
-        elif event != 'start_map':
-            raise UnknownFormatError('top-level JSON value is a {}'.format(event))
-
-        records_prefix = '{}records'.format(prefix)
-        releases_prefix = '{}releases'.format(prefix)
-        ocid_prefix = '{}ocid'.format(prefix)
-        tag_item_prefix = '{}tag.item'.format(prefix)
-
-        has_records = False
-        has_releases = False
-        has_ocid = False
-        has_tag = False
-        is_compiled = False
-        is_array = event == 'start_array'
-
-        for prefix, event, value in events:
-            if prefix == records_prefix:
-                has_records = True
-            elif prefix == releases_prefix:
-                has_releases = True
-            elif prefix == ocid_prefix:
-                has_ocid = True
-            elif prefix == tag_item_prefix:
-                has_tag = True
-                if value == 'compiled':
-                    is_compiled = True
-            if not prefix and event not in ('end_array', 'end_map', 'map_key'):
-                return _detect_format_result(True, is_array, has_records, has_releases, has_ocid, has_tag, is_compiled)
-
-        return _detect_format_result(False, is_array, has_records, has_releases, has_ocid, has_tag, is_compiled)
+    with open(path, 'rb') as f, zero_copy_reader(f) as reader:
+        return _detect_format(iter(_ijson_backend.parse(reader, multiple_values=True, buf_size=buf_size)), root_path)
+
+
+def _detect_format(events, root_path):
+    while True:
+        prefix, event, value = next(events)
+        if prefix == root_path:
+            break
+
+    if prefix:
+        prefix += '.'
+
+    if event == 'start_array':
+        prefix += 'item.'
+    elif event != 'start_map':
+        raise UnknownFormatError('top-level JSON value is a {}'.format(event))
+
+    records_prefix = '{}records'.format(prefix)
+    releases_prefix = '{}releases'.format(prefix)
+    ocid_prefix = '{}ocid'.format(prefix)
+    tag_item_prefix = '{}tag.item'.format(prefix)
+
+    has_records = False
+    has_releases = False
+    has_ocid = False
+    has_tag = False
+    is_compiled = False
+    is_array = event == 'start_array'
+
+    for prefix, event, value in events:
+        if prefix == records_prefix:
+            has_records = True
+        elif prefix == releases_prefix:
+            has_releases = True
+        elif prefix == ocid_prefix:
+            has_ocid = True
+        elif prefix == tag_item_prefix:
+            has_tag = True
+            if value == 'compiled':
+                is_compiled = True
+        if not prefix and event not in ('end_array', 'end_map', 'map_key'):
+            return _detect_format_result(True, is_array, has_records, has_releases, has_ocid, has_tag, is_compiled)
+
+    return _detect_format_result(False, is_array, has_records, has_releases, has_ocid, has_tag, is_compiled)
 
 
 def _detect_format_result(is_concatenated, is_array, has_records, has_releases, has_ocid, has_tag, is_compiled):
@@ -280,14 +544,14 @@ def _empty_release_package(uri='', publisher=None, published_date='', version=No
     return package
 
 
-def _update_package_metadata(output, package):
+def _update_package_metadata(output, package, extensions=None):
     for field in ('publisher', 'license', 'publicationPolicy'):
         if field in package:
             output[field] = package[field]
 
     # We use an insertion-ordered dict to keep extensions in order without duplication.
     if 'extensions' in package:
-        output['extensions'].update(dict.fromkeys(package['extensions']))
+        (output['extensions'] if extensions is None else extensions).update(dict.fromkeys(package['extensions']))
 
 
 def _resolve_metadata(output, field):
@@ -11,10 +11,10 @@ setup(
     url='https://github.com/open-contracting/ocdskit',
     description='A suite of command-line tools for working with OCDS data',
     license='BSD',
-    packages=find_packages(exclude=['tests', 'tests.*']),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*', 'tests', 'tests.*']),
     long_description=long_description,
     install_requires=[
-        'ijson>=2.5',
+        'ijson>=3.1',
         'jsonpointer',
         'jsonref',
         'jsonschema',
@@ -29,6 +29,9 @@ setup(
         'perf': [
             'orjson>=3',
         ],
+        'benchmark': [
+            'asv',
+        ],
         'test': [
             'coveralls',
             'pytest',
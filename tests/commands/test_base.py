@@ -0,0 +1,124 @@
+import gzip
+import time
+import zlib
+from io import BytesIO
+
+import pytest
+
+from ocdskit.cli.commands.base import OutputWriter, ParallelGzipFile
+
+
+class BrokenPipe(BytesIO):
+    def write(self, data):
+        raise BrokenPipeError
+
+
+def test_output_writer_buffer_size():
+    file = BytesIO()
+    writer = OutputWriter(file, buffer_size=4, flush_interval=0.5)
+
+    writer.write(b'abc')
+    assert file.getvalue() == b''
+
+    writer.write(b'd')
+    assert file.getvalue() == b'abcd'
+
+    writer.write(b'e')
+    writer.close()
+    assert file.getvalue() == b'abcde'
+
+
+class FlushCounter(BytesIO):
+    def __init__(self):
+        super().__init__()
+        self.flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+
+
+def test_output_writer_buffer_size_no_flush():
+    file = FlushCounter()
+    writer = OutputWriter(file, buffer_size=4, flush_interval=60)
+
+    # A full buffer is written, but not flushed, so that a compressed file doesn't end a compressed block.
+    writer.write(b'abcd')
+    writer.write(b'efgh')
+    assert file.getvalue() == b'abcdefgh'
+    assert file.flushes == 0
+
+    writer.close()
+    assert file.flushes == 1
+
+
+def test_output_writer_flush_interval():
+    file = BytesIO()
+    writer = OutputWriter(file, flush_interval=0.01)
+
+    writer.write(b'abc')
+    for _ in range(100):
+        if file.getvalue():
+            break
+        time.sleep(0.01)
+    assert file.getvalue() == b'abc'
+
+    writer.close()
+
+
+def test_output_writer_flush_interval_unchanged():
+    file = FlushCounter()
+    writer = OutputWriter(file, flush_interval=0.01)
+
+    writer.write(b'abc')
+    for _ in range(100):
+        if file.flushes:
+            break
+        time.sleep(0.01)
+
+    # The file isn't flushed again if nothing is written.
+    time.sleep(0.05)
+    writer.close()
+    assert file.flushes == 1
+
+
+def test_output_writer_no_flush_interval():
+    file = BytesIO()
+    writer = OutputWriter(file, flush_interval=0)
+
+    writer.write(b'abc')
+    assert file.getvalue() == b'abc'
+
+    writer.close()
+
+
+def test_output_writer_broken_pipe():
+    writer = OutputWriter(BrokenPipe(), flush_interval=0.01)
+
+    writer.write(b'abc')
+    time.sleep(0.1)
+
+    with pytest.raises(BrokenPipeError):
+        writer.write(b'd')
+
+
+def test_parallel_gzip_file():
+    data = b''.join(b'%05d\n' % i for i in range(1000))
+    file = BytesIO()
+    writer = ParallelGzipFile(file, threads=3, block_size=600)
+
+    for i in range(0, len(data), 7):
+        writer.write(data[i:i + 7])
+    writer.close()
+
+    # Each block is a gzip member, and the members are in order.
+    members = []
+    compressed = file.getvalue()
+    while compressed:
+        decompressor = zlib.decompressobj(wbits=31)
+        members.append(decompressor.decompress(compressed))
+        compressed = decompressor.unused_data
+
+    assert len(members) == 10
+    assert members[0].startswith(b'00000\n')
+    assert b''.join(members) == data
+    assert gzip.decompress(file.getvalue()) == data
@@ -0,0 +1,38 @@
+import logging
+import os
+
+from ocdskit.cli.__main__ import main
+from tests import assert_streaming_error, path, run_command, run_streaming
+
+URL = 'https://standard.open-contracting.org/schema/{}/release-schema.json'
+
+
+def test_command(schema_downloads, schema_cache_directory, monkeypatch):
+    stdin = ['realdata/release-package-1.json', 'realdata/release-package-2.json']
+
+    assert run_command(monkeypatch, main, ['cache-schemas']) == ''
+    assert schema_downloads == ['tags', URL.format('1__0__3'), URL.format('1__1__4')]
+    assert len(os.listdir(os.path.join(schema_cache_directory, 'merge-rules'))) == 2
+
+    # The compile command doesn't access the network.
+    expected = run_streaming(monkeypatch, main, ['compile', '--schema', path('release-schema.json')], stdin)
+    assert run_streaming(monkeypatch, main, ['compile', '--offline'], stdin) == expected
+    assert len(schema_downloads) == 3
+
+
+def test_command_tag(schema_downloads, monkeypatch):
+    run_command(monkeypatch, main, ['cache-schemas', '--tag', '1__0__2', '--schema', URL.format('1__1__4')])
+
+    assert schema_downloads == [URL.format('1__0__2'), URL.format('1__1__4')]
+
+
+def test_command_offline_miss(schema_cache_directory, monkeypatch, caplog):
+    with caplog.at_level(logging.ERROR):
+        assert_streaming_error(monkeypatch, main, ['compile', '--offline'], ['realdata/release-package-1.json'])
+
+        assert len(caplog.records) == 1
+        assert caplog.records[0].levelname == 'CRITICAL'
+        assert caplog.records[0].message == (
+            'the tags of OCDS versions is not in the schema cache at {}, and the cache is offline\nTry first running '
+            'the command without --offline, or caching the release schema with the cache-schemas command.'.format(
+                schema_cache_directory))
@@ -3,6 +3,9 @@ import sys
 from io import BytesIO, StringIO, TextIOWrapper
 from unittest.mock import patch
 
+import pytest
+
+import ocdskit.util
 from ocdskit.cli.__main__ import main
 from tests import assert_streaming, read, run_streaming
 
@@ -20,6 +23,18 @@ def test_command_no_extensions(monkeypatch):
                      ['combine-release-packages_minimal.json'])
 
 
+@pytest.mark.parametrize('using_orjson', [True, False])
+def test_command_ascii(using_orjson, monkeypatch):
+    monkeypatch.setattr(ocdskit.util, 'USING_ORJSON', using_orjson and ocdskit.util.USING_ORJSON)
+    stdin = '{"releases":[{"ocid":"x","\u00e9":"\u00fc"}]}'.encode()
+
+    actual = run_streaming(monkeypatch, main, ['--ascii', 'combine-release-packages'], stdin)
+
+    assert actual.isascii()
+    assert '"\\u00e9":"\\u00fc"' in actual
+    assert json.loads(actual)['releases'] == [{'ocid': 'x', '\u00e9': '\u00fc'}]
+
+
 def test_command_uri_published_date(monkeypatch):
     actual = run_streaming(monkeypatch, main, ['combine-release-packages', '--uri', 'http://example.com/x.json',
                                                '--published-date', '2010-01-01T00:00:00Z', '--version', '1.2'],
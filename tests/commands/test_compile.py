@@ -1,12 +1,15 @@
+import gzip
 import json
 import logging
+import os
 
 import pytest
+from ocdsmerge import Merger
 
-import ocdskit.combine
+import ocdskit.packager
 from ocdskit.cli.__main__ import main
 from ocdskit.util import json_dumps
-from tests import assert_streaming, assert_streaming_error, read, run_streaming
+from tests import assert_equal, assert_streaming, assert_streaming_error, path, read, run_command, run_streaming
 
 
 def _remove_package_metadata(filenames):
@@ -158,12 +161,324 @@ def test_command_missing_ocid(monkeypatch, caplog):
 
 @pytest.mark.vcr()
 def test_command_without_sqlite(monkeypatch, caplog):
-    ocdskit.combine.sqlite = False
+    monkeypatch.setattr(ocdskit.packager, 'USING_SQLITE', False)
 
     # To check the warning, not the output.
     run_streaming(monkeypatch, main, ['compile'], ['release-package_minimal.json'])
 
     assert len(caplog.records) == 1
     assert caplog.records[0].levelname == 'WARNING'
-    assert caplog.records[0].message == 'sqlite3 is unavailable, so the command will run in memory. If input files ' \
-                                        'are too large, the command might exceed available memory.'
+    assert caplog.records[0].message == 'sqlite3 is unavailable, so the command will hold releases in memory until ' \
+                                        'they exceed --max-memory, and then write them to temporary files.'
+
+
+@pytest.mark.usefixtures('sqlite')
+def test_command_stats_file(tmpdir, monkeypatch):
+    filename = str(tmpdir.join('stats.json'))
+    run_streaming(monkeypatch, main, ['--stats-file', filename, 'compile', '--schema', path('release-schema.json')],
+                  ['realdata/release-package-1.json', 'realdata/release-package-2.json'])
+
+    with open(filename) as f:
+        data = json.load(f)
+
+    assert data['counters']['items'] == 2
+    assert data['counters']['releases'] == 4
+    assert data['counters']['ocids'] == 2
+    assert list(data['phases']) == ['parse', 'backend', 'merge', 'encode', 'write']
+
+
+def test_command_sqlite_options(tmpdir, monkeypatch):
+    args = ['compile', '--schema', path('release-schema.json'), '--package']
+    stdin = ['realdata/release-package-1.json', 'realdata/release-package-2.json']
+
+    expected = run_streaming(monkeypatch, main, args, stdin)
+    actual = run_streaming(monkeypatch, main, args + ['--tempdir', str(tmpdir), '--sqlite-memory-limit', '1',
+                                                      '--sqlite-pragma', 'temp_store=MEMORY',
+                                                      '--sqlite-pragma', 'cache_size = -1024'], stdin)
+
+    assert actual == expected
+    assert tmpdir.listdir() == []
+
+
+@pytest.mark.parametrize('args', [
+    ['--backend', 'python'],
+    ['--backend', 'sort'],
+    ['--jobs', '2'],
+    ['--backend', 'sort', '--sort-memory-limit', '1'],
+    ['--codec', 'zlib', '--sqlite-memory-limit', '0'],
+    ['--backend', 'python', '--codec', 'json'],
+    ['--backend', 'sort', '--codec', 'zlib', '--sort-memory-limit', '1'],
+    ['--backend', 'hybrid'],
+    ['--backend', 'hybrid', '--max-memory', '1'],
+    ['--backend', 'hybrid', '--codec', 'zlib', '--max-memory', '1'],
+])
+def test_command_backend(args, tmpdir, monkeypatch):
+    command = ['compile', '--schema', path('release-schema.json'), '--package', '--versioned']
+    stdin = ['realdata/release-package-1.json', 'realdata/release-package-2.json']
+
+    expected = run_streaming(monkeypatch, main, command, stdin)
+    actual = run_streaming(monkeypatch, main, command + ['--tempdir', str(tmpdir)] + args, stdin)
+
+    assert actual == expected
+    assert tmpdir.listdir() == []
+
+
+def test_command_hybrid_input_size(tmpdir, monkeypatch):
+    sizes = []
+
+    class HybridBackend(ocdskit.packager.HybridBackend):
+        def __init__(self, input_size=None, **kwargs):
+            sizes.append(input_size)
+            super().__init__(input_size=input_size, **kwargs)
+
+    monkeypatch.setitem(ocdskit.packager.BACKENDS, 'hybrid', HybridBackend)
+
+    filenames = [path('realdata/release-package-1.json'), path('realdata/release-package-2.json')]
+    compressed = tmpdir.join('release-package-1.json.gz')
+    compressed.write_binary(gzip.compress(read('realdata/release-package-1.json', 'rb')))
+    command = ['compile', '--schema', path('release-schema.json'), '--backend', 'hybrid', '--input']
+
+    expected = run_command(monkeypatch, main, command + filenames[:1])
+    assert run_command(monkeypatch, main, command + [str(compressed)]) == expected
+    run_command(monkeypatch, main, command + filenames)
+
+    # The size is the sum of the files' sizes, and is unknown if a file is compressed.
+    assert sizes == [os.path.getsize(filenames[0]), None, sum(os.path.getsize(name) for name in filenames)]
+
+
+@pytest.mark.parametrize('args', [[], ['--versioned'], ['--package', '--linked-releases']])
+def test_command_jobs(args, monkeypatch):
+    command = ['compile', '--schema', path('release-schema.json')] + args
+    stdin = ['realdata/release-package-1.json', 'realdata/release-package-2.json']
+
+    expected = run_streaming(monkeypatch, main, command, stdin)
+    actual = run_streaming(monkeypatch, main, command + ['--jobs', '2'], stdin)
+
+    assert actual == expected
+    assert actual.count('"ocid"') >= 2
+
+
+@pytest.mark.parametrize('args', [[], ['--versioned'], ['--package', '--linked-releases']])
+def test_command_presorted(args, monkeypatch):
+    command = ['compile', '--schema', path('release-schema.json')] + args
+    stdin = ['realdata/release-package-1-2.json']
+
+    expected = run_streaming(monkeypatch, main, command, stdin)
+    actual = run_streaming(monkeypatch, main, command + ['--presorted'], stdin)
+
+    if '--package' in args:
+        # The extensions are written after the records, as an empty array if no package declares extensions.
+        package = json.loads(actual)
+        assert package.pop('extensions') == []
+        actual = json.dumps(package) + '\n'
+
+    assert_equal(actual, expected, ordered=False)
+    assert actual.count('"ocid"') >= 2
+
+
+def test_command_presorted_extensions(monkeypatch):
+    command = ['compile', '--schema', path('release-schema.json'), '--package']
+    package = json.loads(read('realdata/release-package-2.json'))
+    package['extensions'] = ['http://example.com/extension.json']
+    stdin = read('realdata/release-package-1.json', 'rb') + json.dumps(package).encode()
+
+    expected = run_streaming(monkeypatch, main, command, stdin)
+    actual = run_streaming(monkeypatch, main, command + ['--presorted'], stdin)
+
+    assert json.loads(actual) == json.loads(expected)
+    assert json.loads(actual)['extensions'] == ['http://example.com/extension.json']
+
+
+def test_command_presorted_out_of_order(monkeypatch, caplog):
+    with caplog.at_level(logging.ERROR):
+        stdin = ['realdata/release-package-1.json', 'realdata/release-package-2.json',
+                 'realdata/release-package-1.json']
+        assert_streaming_error(monkeypatch, main, ['compile', '--schema', path('release-schema.json'), '--presorted'],
+                               stdin, expected=run_streaming(monkeypatch, main, ['compile', '--schema',
+                                                                                 path('release-schema.json')],
+                                                             stdin[:2]))
+
+        assert len(caplog.records) == 1
+        assert caplog.records[0].levelname == 'CRITICAL'
+        assert caplog.records[0].message == 'the releases of OCID OCDS-87SD3T-AD-SF-DRM-063-2015 are not ' \
+                                            'consecutive. Try without presorted input.'
+
+
+def test_command_store(tmpdir, monkeypatch):
+    store = str(tmpdir.join('store.db'))
+    command = ['compile', '--schema', path('release-schema.json')]
+    first = ['realdata/release-package-1.json']
+    both = ['realdata/release-package-1.json', 'realdata/release-package-2.json']
+
+    expected = run_streaming(monkeypatch, main, command, both)
+    expected_second = run_streaming(monkeypatch, main, command, ['realdata/release-package-2.json'])
+
+    assert run_streaming(monkeypatch, main, command + ['--store', store], first) != ''
+    assert run_streaming(monkeypatch, main, command + ['--store', store], first) == ''
+    # Only the OCIDs whose releases changed are printed.
+    assert run_streaming(monkeypatch, main, command + ['--store', store], both) == expected_second
+    assert run_streaming(monkeypatch, main, command + ['--store', store, '--unchanged'], first) == expected
+
+
+def _spy_merges(monkeypatch):
+    # Records the calls to the merger's methods in this process.
+    calls = []
+
+    def spy(method):
+        def wrapper(self, releases):
+            calls.append(method.__name__)
+            return method(self, releases)
+        return wrapper
+
+    monkeypatch.setattr(Merger, 'create_compiled_release', spy(Merger.create_compiled_release))
+    monkeypatch.setattr(Merger, 'create_versioned_release', spy(Merger.create_versioned_release))
+
+    return calls
+
+
+def test_command_cache(tmpdir, monkeypatch):
+    cache = str(tmpdir.join('cache.db'))
+    command = ['compile', '--schema', path('release-schema.json'), '--package', '--versioned']
+    stdin = ['realdata/release-package-1.json', 'realdata/release-package-2.json']
+    calls = _spy_merges(monkeypatch)
+
+    expected = run_streaming(monkeypatch, main, command, stdin)
+    del calls[:]
+
+    assert run_streaming(monkeypatch, main, command + ['--cache', cache], stdin) == expected
+    assert len(calls) == 4
+    # The releases are read from the cache.
+    assert run_streaming(monkeypatch, main, command + ['--cache', cache], stdin) == expected
+    assert len(calls) == 4
+    assert run_streaming(monkeypatch, main, command + ['--cache', cache, '--jobs', '2'], stdin) == expected
+    assert run_streaming(monkeypatch, main, command + ['--cache', cache, '--cache-size', '0'], stdin) == expected
+
+
+def test_command_cache_alternating(tmpdir, monkeypatch):
+    cache = str(tmpdir.join('cache.db'))
+    command = ['compile', '--schema', path('release-schema.json'), '--cache', cache]
+    stdin = ['realdata/release-package-1.json', 'realdata/release-package-2.json']
+    calls = _spy_merges(monkeypatch)
+
+    compiled = run_streaming(monkeypatch, main, command, stdin)
+    versioned = run_streaming(monkeypatch, main, command + ['--versioned'], stdin)
+    assert calls == ['create_compiled_release'] * 2 + ['create_versioned_release'] * 2
+
+    # Caching versioned releases doesn't evict compiled releases, or vice versa.
+    assert run_streaming(monkeypatch, main, command, stdin) == compiled
+    assert run_streaming(monkeypatch, main, command + ['--versioned'], stdin) == versioned
+    assert len(calls) == 4
+
+
+def test_command_store_backend(monkeypatch, caplog):
+    with caplog.at_level(logging.ERROR):
+        assert_streaming_error(monkeypatch, main, ['compile', '--store', 'store.db', '--backend', 'sort'],
+                               ['release-package_minimal.json'])
+
+        assert len(caplog.records) == 1
+        assert caplog.records[0].levelname == 'CRITICAL'
+        assert caplog.records[0].message == '--store and --backend are mutually exclusive'
+
+
+def test_command_backend_sqlite_unavailable(monkeypatch, caplog):
+    monkeypatch.setattr(ocdskit.packager, 'USING_SQLITE', False)
+
+    with caplog.at_level(logging.ERROR):
+        assert_streaming_error(monkeypatch, main, ['compile', '--backend', 'sqlite'], ['release-package_minimal.json'])
+
+        assert len(caplog.records) == 1
+        assert caplog.records[0].levelname == 'CRITICAL'
+        assert caplog.records[0].message == '--backend sqlite is unavailable, because sqlite3 is unavailable'
+
+
+@pytest.mark.parametrize('args', [
+    ['--deduplicate', 'memory'],
+    ['--deduplicate', 'disk', '--deduplicate-content'],
+    ['--deduplicate', 'memory', '--presorted'],
+])
+def test_command_deduplicate(args, tmpdir, monkeypatch, caplog):
+    command = ['compile', '--schema', path('release-schema.json'), '--package', '--versioned']
+    stdin = ['realdata/release-package-1.json', 'realdata/release-package-2.json']
+
+    expected = run_streaming(monkeypatch, main, command, stdin)
+    actual = run_streaming(monkeypatch, main, command + ['--tempdir', str(tmpdir)] + args, stdin + stdin)
+
+    # The package URIs are repeated, but not the releases.
+    assert json.loads(actual)['records'] == json.loads(expected)['records']
+    assert tmpdir.listdir() == []
+
+    assert len(caplog.records) == 0
+
+
+def test_command_deduplicate_conflicts(monkeypatch, caplog):
+    command = ['compile', '--schema', path('release-schema.json'), '--deduplicate', 'memory', '--deduplicate-content']
+    data = json.loads(read('realdata/release-package-1.json'))
+    stdin = json_dumps(data).encode()
+    data['releases'][0]['date'] = '2000-01-01T00:00:00Z'
+    stdin += json_dumps(data).encode()
+
+    with caplog.at_level(logging.INFO):
+        run_streaming(monkeypatch, main, command, stdin)
+
+    assert [(record.levelname, record.message) for record in caplog.records] == [
+        ('INFO', '{} duplicate releases were ignored'.format(len(data['releases']) - 1)),
+        ('WARNING', '1 releases have the same ocid and id as an earlier release, but different content, and were '
+                    'kept'),
+    ]
+
+
+def test_command_deduplicate_content_without_deduplicate(monkeypatch, caplog):
+    with caplog.at_level(logging.ERROR):
+        assert_streaming_error(monkeypatch, main, ['compile', '--deduplicate-content'],
+                               ['release-package_minimal.json'])
+
+        assert len(caplog.records) == 1
+        assert caplog.records[0].levelname == 'CRITICAL'
+        assert caplog.records[0].message == '--deduplicate-content requires --deduplicate'
+
+
+@pytest.mark.parametrize('args', [[], ['--package']])
+def test_command_empty(args, monkeypatch, schema_downloads, schema_cache_directory):
+    actual = run_streaming(monkeypatch, main, ['compile', *args], b'{"releases": []}')
+
+    # Without releases, the merge rules aren't needed, so neither the network nor the schema cache is accessed.
+    if args:
+        assert actual == '{"uri":"","publisher":{},"publishedDate":"","version":"1.1","packages":[],"records":[]}\n'
+    else:
+        assert actual == ''
+    assert schema_downloads == []
+    assert not os.path.exists(schema_cache_directory)
+
+
+def test_command_unchanged_without_store(monkeypatch, caplog):
+    with caplog.at_level(logging.ERROR):
+        assert_streaming_error(monkeypatch, main, ['compile', '--unchanged'], ['release-package_minimal.json'])
+
+        assert len(caplog.records) == 1
+        assert caplog.records[0].levelname == 'CRITICAL'
+        assert caplog.records[0].message == '--unchanged requires --store'
+
+
+@pytest.mark.parametrize('args', [['--presorted'], ['--store', 'store.db']])
+def test_command_codec_incompatible(args, monkeypatch, caplog):
+    with caplog.at_level(logging.ERROR):
+        assert_streaming_error(monkeypatch, main, ['compile', '--codec', 'zlib'] + args,
+                               ['release-package_minimal.json'])
+
+        assert len(caplog.records) == 1
+        assert caplog.records[0].levelname == 'CRITICAL'
+        assert caplog.records[0].message == '--codec is incompatible with --presorted and --store'
+
+
+@pytest.mark.parametrize('pragma,message', [
+    ('temp_store', '--sqlite-pragma must be like NAME=VALUE, not temp_store'),
+    ('temp_store=MEMORY; DROP TABLE releases', 'invalid PRAGMA: temp_store=MEMORY; DROP TABLE releases'),
+])
+def test_command_sqlite_pragma_invalid(pragma, message, monkeypatch, caplog):
+    with caplog.at_level(logging.ERROR):
+        assert_streaming_error(monkeypatch, main, ['compile', '--sqlite-pragma', pragma],
+                               ['release-package_minimal.json'])
+
+        assert len(caplog.records) == 1
+        assert caplog.records[0].levelname == 'CRITICAL'
+        assert caplog.records[0].message == message
@@ -1,3 +1,6 @@
+import logging
+import sys
+
 import pytest
 
 from ocdskit.cli.__main__ import main
@@ -37,6 +40,26 @@ def test_command_root_path_nonexistent(monkeypatch, caplog):
     assert len(caplog.records) == 0
 
 
+def test_command_compress(monkeypatch, caplog):
+    with caplog.at_level(logging.ERROR):
+        assert_command_error(monkeypatch, main, ['--compress', 'gzip', 'detect-format', path('record_minimal.json')])
+
+        assert len(caplog.records) == 1
+        assert caplog.records[0].levelname == 'CRITICAL'
+        assert caplog.records[0].message == '--compress is unavailable, because the detect-format command does not ' \
+                                            'print JSON'
+
+
+def test_command_jobs(monkeypatch, capsys):
+    # --jobs is only accepted by commands that use it.
+    monkeypatch.setattr(sys, 'argv', ['ocdskit', 'detect-format', '--jobs=2', path('record_minimal.json')])
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+
+    assert excinfo.value.code == 2
+    assert 'unrecognized arguments: --jobs=2' in capsys.readouterr().err
+
+
 def test_command_recursive(monkeypatch, caplog, tmpdir):
     content = b'{"records":[]}'
     tmpdir.join('test.json').write(content)
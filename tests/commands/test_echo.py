@@ -1,4 +1,8 @@
+import bz2
+import gzip
+import json
 import logging
+import lzma
 import re
 import sys
 from io import BytesIO, StringIO, TextIOWrapper
@@ -6,8 +10,10 @@ from unittest.mock import patch
 
 import pytest
 
+import ocdskit.cli.commands.base
 from ocdskit.cli.__main__ import main
-from tests import assert_streaming, assert_streaming_error, read, run_streaming
+from tests import (assert_command_error, assert_streaming, assert_streaming_error, path, read, run_command,
+                   run_streaming)
 
 
 @patch('sys.stdout', new_callable=StringIO)
@@ -90,3 +96,153 @@ def test_command_invalid_json(monkeypatch, caplog):
         assert len(caplog.records) == 1
         assert caplog.records[0].levelname == 'CRITICAL'
         assert caplog.records[0].message.startswith('JSON error: ')
+
+
+def test_command_input(monkeypatch):
+    expected = run_streaming(monkeypatch, main, ['echo'], ['release_minimal-1.json', 'release_minimal-2.json'])
+    actual = run_command(monkeypatch, main, ['echo', '--input', path('release_minimal-1.json'),
+                                             path('release_minimal-2.json')])
+
+    assert actual == expected
+
+
+def test_command_input_glob(monkeypatch):
+    expected = run_streaming(monkeypatch, main, ['echo'], ['release_minimal-1.json', 'release_minimal-2.json'])
+    actual = run_command(monkeypatch, main, ['echo', '--input', path('release_minimal-*.json')])
+
+    assert actual == expected
+
+
+@pytest.mark.parametrize('unordered', [True, False])
+def test_command_input_threads(unordered, monkeypatch):
+    filenames = ['realdata/release-package-1.json', 'realdata/release-package-2.json', 'release_minimal-1.json',
+                 'release_minimal-2.json']
+    args = ['echo', '--threads', '3', '--root-path', 'releases.item', '--input'] + [path(name) for name in filenames]
+    if unordered:
+        args.append('--unordered')
+
+    expected = run_streaming(monkeypatch, main, ['echo', '--root-path', 'releases.item'], filenames)
+    actual = run_command(monkeypatch, main, args)
+
+    if unordered:
+        assert sorted(actual.splitlines()) == sorted(expected.splitlines())
+    else:
+        assert actual == expected
+
+
+def test_command_input_threads_invalid_json(tmpdir, monkeypatch, caplog):
+    invalid = tmpdir.join('invalid.json')
+    invalid.write('{\n')
+
+    with caplog.at_level(logging.ERROR):
+        assert_command_error(monkeypatch, main, ['echo', '--threads', '2', '--input', str(invalid),
+                                                 path('release-schema.json')])
+
+        assert len(caplog.records) == 1
+        assert caplog.records[0].levelname == 'CRITICAL'
+        assert caplog.records[0].message.startswith('JSON error: ')
+
+
+def test_command_input_missing(monkeypatch, caplog):
+    with caplog.at_level(logging.ERROR):
+        assert_command_error(monkeypatch, main, ['echo', '--input', path('nonexistent*.json')])
+
+        assert len(caplog.records) == 1
+        assert caplog.records[0].levelname == 'CRITICAL'
+        assert caplog.records[0].message.endswith('nonexistent*.json: No such file')
+
+
+@pytest.mark.parametrize('module', [gzip, bz2, lzma])
+def test_command_compressed_input(module, monkeypatch):
+    stdin = read('realdata/release-package-1.json', 'rb')
+
+    expected = run_streaming(monkeypatch, main, ['echo'], stdin)
+    actual = run_streaming(monkeypatch, main, ['echo'], module.compress(stdin))
+
+    assert actual == expected
+
+
+@pytest.mark.parametrize('compression,threads,module', [
+    ('gzip', '1', gzip),
+    ('gzip', '3', gzip),
+    ('bz2', '1', bz2),
+    ('xz', '1', lzma),
+])
+def test_command_compressed_output(compression, threads, module, monkeypatch):
+    stdin = read('realdata/release-package-1.json', 'rb') * 3
+
+    expected = run_streaming(monkeypatch, main, ['echo'], stdin)
+
+    stdout = TextIOWrapper(BytesIO())
+    with patch('sys.stdout', stdout), patch('sys.stdin', TextIOWrapper(BytesIO(stdin))):
+        monkeypatch.setattr(sys, 'argv', ['ocdskit', '--compress', compression, '--compress-threads', threads, 'echo'])
+        main()
+
+    assert module.decompress(stdout.buffer.getvalue()).decode() == expected
+
+
+def test_command_input_buffer_size(monkeypatch):
+    expected = run_streaming(monkeypatch, main, ['echo'], ['realdata/release-package-1.json'])
+    actual = run_command(monkeypatch, main, ['--buffer-size', '7', 'echo', '--input',
+                                             path('realdata/release-package-1.json')])
+
+    assert actual == expected
+
+
+@pytest.mark.parametrize('encoding', ['shift_jis', 'utf-16', 'iso2022_jp'])
+def test_command_encoding_multibyte(encoding, monkeypatch):
+    stdin = '{"name": "日本語"}\n{"name": "ascii"}\n'.encode(encoding)
+
+    # A small buffer size splits multi-byte characters across reads.
+    actual = run_streaming(monkeypatch, main, ['--encoding', encoding, '--buffer-size', '3', 'echo'], stdin)
+
+    assert actual == '{"name":"日本語"}\n{"name":"ascii"}\n'
+
+
+@pytest.mark.parametrize('args', [[], ['--root-path', 'releases.item']])
+def test_command_jsonl(args, tmpdir, monkeypatch):
+    filenames = ['realdata/release-package-1.json', 'realdata/release-package-2.json']
+    tmpdir.join('input.jsonl').write(''.join(json.dumps(json.loads(read(filename))) + '\n' for filename in filenames))
+
+    expected = run_streaming(monkeypatch, main, ['echo'] + args, filenames)
+
+    # A small buffer size splits lines across reads.
+    for buffer_size in ('7', '65536'):
+        actual = run_command(monkeypatch, main, ['--buffer-size', buffer_size, 'echo', '--jsonl', '--input',
+                                                 str(tmpdir.join('input.jsonl'))] + args)
+
+        assert actual == expected
+
+
+def test_command_jsonl_blank_lines(monkeypatch):
+    actual = run_streaming(monkeypatch, main, ['echo', '--jsonl'], b'\n{"a": [1, 2.5]}\r\n\n[{"b": 3}, {"c": 4}]')
+
+    assert actual == '{"a":[1,2.5]}\n{"b":3}\n{"c":4}\n'
+
+
+def test_command_jsonl_invalid_json(monkeypatch, caplog):
+    assert_streaming_error(monkeypatch, main, ['echo', '--jsonl'], b'{"a": 1}\n{"a": \n', expected='{"a":1}\n')
+
+    assert len(caplog.records) == 1
+    assert caplog.records[0].levelname == 'CRITICAL'
+    assert caplog.records[0].message.startswith('JSON error: line 2: ')
+
+
+@pytest.mark.parametrize('unordered', [True, False])
+def test_command_jobs(unordered, monkeypatch):
+    # Send one item at a time, to test the order of many batches.
+    monkeypatch.setattr(ocdskit.cli.commands.base, 'JOB_BATCH_SIZE', 1)
+
+    filenames = ['realdata/release-package-1.json', 'realdata/release-package-2.json', 'release_minimal-1.json',
+                 'release_minimal-2.json']
+    args = ['echo', '--jobs', '2', '--root-path', 'releases.item']
+    if unordered:
+        args.append('--unordered')
+
+    expected = run_streaming(monkeypatch, main, ['echo', '--root-path', 'releases.item'], filenames)
+    actual = run_streaming(monkeypatch, main, args, filenames)
+
+    if unordered:
+        assert sorted(actual.splitlines()) == sorted(expected.splitlines())
+    else:
+        assert actual == expected
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from ocdskit.cli.__main__ import main
+from tests import assert_command_error, run_command
+
+
+def _generate(monkeypatch, *args):
+    return [json.loads(line) for line in run_command(monkeypatch, main, ['generate', *args]).splitlines()]
+
+
+def test_command(monkeypatch):
+    packages = _generate(monkeypatch, '--ocids', '25', '--releases-per-ocid', '2', '--package-size', '10')
+
+    assert [len(package['releases']) for package in packages] == [20, 20, 10]
+    assert len({release['id'] for package in packages for release in package['releases']}) == 50
+    assert len({release['ocid'] for package in packages for release in package['releases']}) == 25
+
+    package = packages[0]
+    assert package['version'] == '1.1'
+    assert package['uri'] == 'https://example.com/release-package/0-9.json'
+    assert 'extensions' not in package
+
+    release = package['releases'][1]
+    assert release['ocid'] == 'ocds-213czf-0000000000'
+    assert release['tag'] == ['tender']
+    assert len(release['parties']) == 2
+    assert len(release['tender']['documents']) == 1
+
+
+def test_command_seed(monkeypatch):
+    args = ['generate', '--ocids', '10', '--distribution', 'pareto']
+
+    first = run_command(monkeypatch, main, args)
+    second = run_command(monkeypatch, main, args)
+    other = run_command(monkeypatch, main, args + ['--seed', '1'])
+
+    assert first == second
+    assert first != other
+
+
+@pytest.mark.parametrize('package_size', [1, 3, 100])
+def test_command_jobs(package_size, monkeypatch):
+    args = ['generate', '--ocids', '10', '--releases-per-ocid', '3', '--distribution', 'uniform',
+            '--package-size', str(package_size)]
+
+    expected = run_command(monkeypatch, main, args)
+    actual = run_command(monkeypatch, main, args + ['--jobs', '2'])
+
+    assert actual == expected
+
+
+def test_command_release(monkeypatch):
+    releases = _generate(monkeypatch, '--type', 'release', '--ocids', '3', '--releases-per-ocid', '5',
+                         '--parties', '4', '--documents', '0')
+
+    assert len(releases) == 15
+    assert [release['tag'] for release in releases[:5]] == [
+        ['planning'], ['tender'], ['award'], ['contract'], ['implementation']]
+    assert releases[4]['contracts'][0]['awardID'] == releases[4]['awards'][0]['id']
+    assert all(len(release['parties']) == 4 for release in releases)
+    assert all(release['tender']['documents'] == [] for release in releases)
+    assert [release['date'] for release in releases[:5]] == sorted(release['date'] for release in releases[:5])
+
+
+def test_command_record_package(monkeypatch):
+    packages = _generate(monkeypatch, '--type', 'record-package', '--ocids', '3', '--releases-per-ocid', '2',
+                         '--version', '1.0', '--extension', 'http://example.com/extension.json')
+
+    assert len(packages) == 1
+    package = packages[0]
+    assert 'version' not in package
+    assert package['extensions'] == ['http://example.com/extension.json']
+    assert [record['ocid'] for record in package['records']] == [
+        'ocds-213czf-0000000000', 'ocds-213czf-0000000001', 'ocds-213czf-0000000002']
+
+    release = package['records'][0]['releases'][0]
+    assert 'parties' not in release
+    assert 'id' not in release['buyer']
+    assert release['buyer']['identifier']['scheme'] == 'XI-EXAMPLE'
+
+
+def test_command_pareto(monkeypatch):
+    packages = _generate(monkeypatch, '--type', 'record-package', '--ocids', '200', '--releases-per-ocid', '3',
+                         '--distribution', 'pareto', '--package-size', '200')
+
+    counts = [len(record['releases']) for record in packages[0]['records']]
+    assert min(counts) == 1
+    assert max(counts) > 10
+
+
+def test_command_invalid(monkeypatch, caplog):
+    assert_command_error(monkeypatch, main, ['generate', '--ocids', '0'])
+
+    assert len(caplog.records) == 1
+    assert caplog.records[0].levelname == 'CRITICAL'
+    assert caplog.records[0].message == '--ocids must be at least 1'
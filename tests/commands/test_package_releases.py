@@ -1,5 +1,9 @@
+import logging
+
+import pytest
+
 from ocdskit.cli.__main__ import main
-from tests import assert_streaming
+from tests import assert_streaming, assert_streaming_error
 
 
 def test_command(monkeypatch):
@@ -9,12 +13,22 @@ def test_command(monkeypatch):
                      ['release-package_minimal-1-2.json'])
 
 
-def test_command_size(monkeypatch):
-    assert_streaming(monkeypatch, main, ['package-releases', '--size', '2'],
+@pytest.mark.parametrize('args', [[], ['--jobs', '2']])
+def test_command_size(args, monkeypatch):
+    assert_streaming(monkeypatch, main, ['package-releases', '--size', '2'] + args,
                      ['release_minimal-1.json', 'release_minimal-2.json', 'release_minimal.json'],
                      ['release-package_minimal-1-2-no-metadata.json', 'release-package_minimal-no-metadata.json'])
 
 
+def test_command_jobs_without_size(monkeypatch, caplog):
+    with caplog.at_level(logging.ERROR):
+        assert_streaming_error(monkeypatch, main, ['package-releases', '--jobs', '2'], ['release_minimal.json'])
+
+        assert len(caplog.records) == 1
+        assert caplog.records[0].levelname == 'CRITICAL'
+        assert caplog.records[0].message == '--jobs requires --size, as a single package is printed otherwise'
+
+
 def test_command_extensions(monkeypatch):
     assert_streaming(monkeypatch, main, ['package-releases', '--uri', 'http://example.com', '--published-date',
                                          '9999-01-01T00:00:00Z', '--version', '1.2', '--publisher-name', '',
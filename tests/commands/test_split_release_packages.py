@@ -5,3 +5,9 @@ from tests import assert_streaming
 def test_command(monkeypatch):
     assert_streaming(monkeypatch, main, ['split-release-packages', '2'], ['realdata/release-package-1-2.json'],
                      ['realdata/release-package_split.json'])
+
+
+def test_command_jobs(monkeypatch):
+    assert_streaming(monkeypatch, main, ['split-release-packages', '--jobs', '2', '2'],
+                     ['realdata/release-package-1-2.json'],
+                     ['realdata/release-package_split.json'])
@@ -25,8 +25,9 @@ def test_command_release_package_buyer_procuring_entity_suppliers(monkeypatch):
                      ['realdata/release-package_1.1-1.json'], ordered=False)
 
 
-def test_command_release_package_transactions(monkeypatch):
-    assert_streaming(monkeypatch, main, ['upgrade', '1.0:1.1'],
+@pytest.mark.parametrize('args', [[], ['--jobs', '2']])
+def test_command_release_package_transactions(args, monkeypatch):
+    assert_streaming(monkeypatch, main, ['upgrade', '1.0:1.1'] + args,
                      ['realdata/release-package_1.0-2.json'],
                      ['realdata/release-package_1.1-2.json'], ordered=False)
 
@@ -122,3 +123,13 @@ def test_command_downgrade(monkeypatch, caplog):
     assert len(caplog.records) == 1
     assert caplog.records[0].levelname == 'CRITICAL'
     assert caplog.records[0].message == 'downgrade from 1.1 to 1.0 is not supported'
+
+
+def test_command_jsonl(monkeypatch):
+    # Each package is on one line, without reordering fields.
+    stdin = json.dumps(json.loads(read('realdata/release-package_1.0-1.json'))).encode()
+
+    expected = run_streaming(monkeypatch, main, ['upgrade', '1.0:1.1'], stdin)
+    actual = run_streaming(monkeypatch, main, ['upgrade', '1.0:1.1', '--jsonl'], stdin)
+
+    assert actual == expected
@@ -1,9 +1,12 @@
+import json
 import logging
 import os.path
 
 import pytest
 
 import ocdskit.packager
+import ocdskit.schema_cache
+from tests import read
 
 logger = logging.getLogger('vcr')
 logger.setLevel(logging.WARNING)
@@ -16,4 +19,30 @@ def vcr_cassette_name(request):
 
 @pytest.fixture(params=[True, False])
 def sqlite(request, monkeypatch):
-    ocdskit.packager.USING_SQLITE = request.param
+    monkeypatch.setattr(ocdskit.packager, 'USING_SQLITE', request.param)
+
+
+@pytest.fixture(autouse=True)
+def schema_cache_directory(tmp_path, monkeypatch):
+    directory = str(tmp_path / 'schema-cache')
+    monkeypatch.setenv('OCDSKIT_CACHE_DIR', directory)
+    return directory
+
+
+@pytest.fixture()
+def schema_downloads(monkeypatch):
+    # Serves the release schema in the fixtures, instead of accessing the network, and records each download.
+    downloads = []
+
+    def get_tags():
+        downloads.append('tags')
+        return ['1__0__2', '1__0__3', '1__1__4']
+
+    def download(url):
+        downloads.append(url)
+        return json.loads(read('release-schema.json'))
+
+    monkeypatch.setattr(ocdskit.schema_cache, 'get_tags', get_tags)
+    monkeypatch.setattr(ocdskit.schema_cache, '_download', download)
+
+    return downloads
@@ -1,10 +1,15 @@
 import json
+import os
 
 import pytest
 from ocdsextensionregistry import ProfileBuilder
 
+import ocdskit.util
 from ocdskit.combine import compile_release_packages, merge, package_records
-from tests import read
+from ocdskit.exceptions import InconsistentExtensionsError
+from ocdskit.schema_cache import SchemaCache
+from ocdskit.util import iterencode
+from tests import path, read
 
 
 def test_package_default_arguments():
@@ -23,6 +28,16 @@ def test_merge_empty():
     assert compiled_releases == []
 
 
+def test_merge_empty_schema_cache(schema_downloads, tmpdir):
+    directory = str(tmpdir / 'schema-cache')
+
+    compiled_releases = list(merge([], schema_cache=SchemaCache(directory)))
+
+    assert compiled_releases == []
+    assert schema_downloads == []
+    assert not os.path.exists(directory)
+
+
 @pytest.mark.vcr()
 def test_merge_with_schema():
     builder = ProfileBuilder('1__1__4', {'additionalContactPoint': 'master'})
@@ -42,6 +57,39 @@ def test_merge_without_schema():
     assert compiled_release == json.loads(read('compile_no-extensions.json'))
 
 
+def _presorted_packages():
+    # The second package declares extensions, after the first package's releases are merged.
+    packages = [json.loads(read('realdata/release-package-{}.json'.format(i))) for i in (1, 2)]
+    packages[1]['extensions'] = ['http://example.com/extension.json']
+    return packages
+
+
+@pytest.mark.parametrize('using_orjson', [True, False])
+def test_merge_presorted_streaming_extensions(using_orjson, monkeypatch):
+    monkeypatch.setattr(ocdskit.util, 'USING_ORJSON', using_orjson and ocdskit.util.USING_ORJSON)
+
+    expected = next(merge(_presorted_packages(), schema=path('release-schema.json'), return_package=True))
+    package = next(merge(_presorted_packages(), schema=path('release-schema.json'), return_package=True,
+                         streaming=True, presorted=True))
+
+    actual = json.loads(''.join(iterencode(package)))
+
+    # The extensions are written after the records.
+    assert list(actual)[-2:] == ['packages', 'extensions']
+    assert actual == expected
+    assert actual['extensions'] == ['http://example.com/extension.json']
+
+
+def test_merge_presorted_extensions_without_schema(schema_downloads, tmpdir):
+    with pytest.raises(InconsistentExtensionsError) as excinfo:
+        list(merge(_presorted_packages(), presorted=True, schema_cache=SchemaCache(str(tmpdir))))
+
+    assert str(excinfo.value) == 'item 1: extensions error: this item declares extensions that earlier items did ' \
+                                 'not, but the merge rules were chosen using the first item: ' \
+                                 'http://example.com/extension.json'
+    assert excinfo.value.extensions == ['http://example.com/extension.json']
+
+
 @pytest.mark.vcr()
 def test_compile_release_packages():
     with pytest.warns(DeprecationWarning) as records:
@@ -0,0 +1,172 @@
+import json
+import logging
+import pstats
+import re
+import subprocess
+import sys
+import tracemalloc
+
+import pytest
+
+import ocdskit.util
+from ocdskit.cli.__main__ import COMMAND_MODULES, _command_module, _command_name, main
+from tests import assert_command_error, path, read, run_command, run_streaming
+
+SLOW_MODULES = ('jsonref', 'jsonschema', 'ocdsextensionregistry', 'ocdsmerge', 'requests', 'rfc3987', 'sqlalchemy')
+
+# The modules that are imported only if a global option like --profile, --trace-memory or --jobs is set, or, for
+# sqlite3, if the command uses the packager.
+OPTIONAL_MODULES = ('cProfile', 'multiprocessing', 'ocdskit.cli.profile', 'sqlite3', 'tracemalloc')
+
+
+def _importtime(*args):
+    code = "import sys; sys.argv = ['ocdskit'] + sys.argv[1:]; from ocdskit.cli.__main__ import main; main()"
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code, *args], input=b'{}',
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+
+    # Each line is like "import time:       self [us] |  cumulative | imported package".
+    modules = {}
+    for line in process.stderr.decode().splitlines():
+        match = re.search(r'^import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)$', line)
+        if match:
+            modules[match.group(3)] = (int(match.group(1)), len(match.group(2)))
+    return modules
+
+
+@pytest.mark.parametrize('module', COMMAND_MODULES)
+def test_command_name(module):
+    assert _command_module(_command_name(module)) == module
+
+
+def test_import_slow_modules():
+    modules = _importtime('echo')
+
+    # `importlib.import_module` isn't reported by `-X importtime`, but the command's imports are.
+    assert 'ocdskit.cli.commands.base' in modules
+    for name in SLOW_MODULES + OPTIONAL_MODULES:
+        assert name not in modules
+
+
+def test_import_optional_modules():
+    # `-X importtime` doesn't report modules that are imported by other means, like built-in modules.
+    code = "import sys; sys.argv = ['ocdskit', 'echo']; from ocdskit.cli.__main__ import main; main(); " \
+           "print(','.join(sys.modules), file=sys.stderr)"
+    process = subprocess.run([sys.executable, '-c', code], input=b'{}', stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE, check=True)
+
+    modules = process.stderr.decode().strip().split(',')
+
+    assert 'ocdskit.cli.commands.echo' in modules
+    for name in OPTIONAL_MODULES:
+        assert name not in modules
+
+
+def test_parser(monkeypatch, caplog):
+    # Restore the backend after the test.
+    monkeypatch.setattr(ocdskit.util, '_ijson_backend', ocdskit.util.get_ijson_backend())
+    caplog.set_level(logging.WARNING)
+
+    expected = run_streaming(monkeypatch, main, ['echo'], ['realdata/release-package-1.json'])
+    actual = run_command(monkeypatch, main, ['--parser', 'python', 'echo', '--input',
+                                             path('realdata/release-package-1.json')])
+
+    assert actual == expected
+    assert len(caplog.records) == 1
+    assert caplog.records[0].levelname == 'WARNING'
+    assert caplog.records[0].message.startswith('the python JSON parser is slow.')
+
+
+def test_parser_without_json_input(tmpdir, monkeypatch, caplog):
+    # Restore the backend after the test.
+    monkeypatch.setattr(ocdskit.util, '_ijson_backend', ocdskit.util.get_ijson_backend())
+    caplog.set_level(logging.WARNING)
+
+    filename = str(tmpdir.join('input.jsonl'))
+    with open(filename, 'w') as f:
+        f.write(json.dumps(json.loads(read('realdata/release-package-1.json'))) + '\n')
+
+    run_command(monkeypatch, main, ['--parser', 'python', 'generate', '--ocids', '1'])
+    run_command(monkeypatch, main, ['--parser', 'python', 'echo', '--jsonl', '--input', filename])
+
+    # The commands don't parse JSON with ijson, so no warning is logged.
+    assert len(caplog.records) == 0
+
+
+@pytest.mark.parametrize('option', ['--buffer-size', '--output-buffer-size'])
+@pytest.mark.parametrize('value', ['0', '-1', 'x'])
+def test_buffer_size_invalid(option, value, monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['ocdskit', '{}={}'.format(option, value), 'echo'])
+
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+
+    assert excinfo.value.code == 2
+    assert capsys.readouterr().err.endswith('error: argument {}: {} is not a positive integer\n'.format(option, value))
+
+
+def test_parser_unavailable(monkeypatch, caplog):
+    def get_backend(name):
+        raise ImportError('No module named cffi')
+
+    monkeypatch.setattr(ocdskit.util.ijson, 'get_backend', get_backend)
+
+    args = ['--parser', 'yajl2_cffi', 'echo', '--input', path('release_minimal.json')]
+    assert_command_error(monkeypatch, main, args)
+
+    assert len(caplog.records) == 1
+    assert caplog.records[0].levelname == 'CRITICAL'
+    assert caplog.records[0].message == '--parser yajl2_cffi is unavailable: No module named cffi'
+
+
+def test_stats(monkeypatch, capsys):
+    filenames = ['release_minimal-1.json', 'release_minimal-2.json']
+    run_streaming(monkeypatch, main, ['--stats', 'echo'], filenames)
+
+    lines = capsys.readouterr().err.splitlines()
+
+    assert lines[0].startswith('bytes read: {} '.format(sum(len(read(filename, 'rb')) for filename in filenames)))
+    assert lines[1].startswith('items: 2 ')
+    assert lines[2].startswith('bytes written: ')
+    assert lines[4].split() == ['phase', 'wall', '(s)', 'CPU', '(s)', 'calls']
+    assert [line.split()[0] for line in lines[5:9]] == ['parse', 'transform', 'encode', 'write']
+    assert lines[9].startswith('exit: peak RSS ')
+
+
+def test_stats_file(tmpdir, monkeypatch):
+    filename = str(tmpdir.join('stats.json'))
+    actual = run_streaming(monkeypatch, main, ['--stats-file', filename, 'echo', '--jsonl'], b'{"a": 1}\n{"b": 2}\n')
+
+    with open(filename) as f:
+        data = json.load(f)
+
+    assert actual == '{"a":1}\n{"b":2}\n'
+    assert data['counters'] == {'bytes read': 18, 'items': 2, 'bytes written': 16}
+    assert set(data['rates']) == set(data['counters'])
+    assert list(data['phases']) == ['parse', 'transform', 'encode', 'write']
+    assert data['phases']['parse']['calls'] == 3
+
+
+@pytest.mark.parametrize('mode', ['cprofile', 'sample'])
+def test_profile(mode, tmpdir, monkeypatch):
+    filename = str(tmpdir.join('profile'))
+    expected = run_streaming(monkeypatch, main, ['echo'], ['realdata/release-package-1.json'])
+    actual = run_streaming(monkeypatch, main, ['--profile', filename, '--profile-mode', mode,
+                                               '--profile-interval', '0.0001', 'echo'],
+                           ['realdata/release-package-1.json'])
+
+    assert actual == expected
+    if mode == 'cprofile':
+        assert any(function == 'handle' for _, _, function in pstats.Stats(filename).stats)
+    else:
+        assert tmpdir.join('profile').check(file=True)
+
+
+def test_trace_memory(monkeypatch, capsys):
+    run_streaming(monkeypatch, main, ['--trace-memory', 'echo'], ['realdata/release-package-1.json'])
+
+    lines = capsys.readouterr().err.splitlines()
+    index = next(i for i, line in enumerate(lines) if line.startswith('exit: '))
+
+    assert re.search(r'^exit: peak RSS \S+, traced \S+ \(peak \S+\)$', lines[index])
+    assert re.search(r'^  +[+-]\S+ +\S+ +\d+ \S+:\d+$', lines[index + 1])
+    assert not tracemalloc.is_tracing()
@@ -4,8 +4,13 @@ import pytest
 from ocdsmerge import Merger
 from ocdsmerge.util import get_release_schema_url, get_tags
 
-from ocdskit.packager import Packager
-from tests import read
+import ocdskit.packager
+from ocdskit.exceptions import BackendOptionError, OutOfOrderOcidError
+from ocdskit.packager import (SQLITE_MEMORY_LIMIT, HybridBackend, Packager, PythonBackend, ReleaseCache,
+                              ReleaseDeduplicator, SortMergeBackend, SQLiteBackend, StoreBackend, ZlibCodec)
+from ocdskit.stats import Stats
+from ocdskit.util import json_loads
+from tests import path, read
 
 
 @pytest.mark.vcr()
@@ -24,3 +29,387 @@ def test_output_package_no_streaming():
         actual = next(packager.output_package(Merger(schema)))
 
     assert actual == json.loads(read('realdata/record-package_package.json'))
+
+
+@pytest.mark.parametrize('memory_limit', [0, 1, SQLITE_MEMORY_LIMIT])
+def test_sqlite_backend(memory_limit, tmpdir):
+    releases = json.loads(read('realdata/release-package-1-2.json'))['releases']
+
+    backend = SQLiteBackend(pragmas={'temp_store': 'MEMORY'}, tempdir=str(tmpdir), memory_limit=memory_limit)
+    try:
+        for release in releases:
+            backend.add_release(release, 'http://example.com')
+        backend.flush()
+
+        assert backend.connection.execute('PRAGMA journal_mode').fetchone()[0] in ('off', 'memory')
+        assert backend.connection.execute('PRAGMA temp_store').fetchone()[0] == 2
+        # The database is moved to a file in the temporary directory if it exceeds the memory limit.
+        assert len(tmpdir.listdir()) == (memory_limit != SQLITE_MEMORY_LIMIT)
+
+        actual = [(ocid, [row[2]['id'] for row in rows]) for ocid, rows in backend.get_releases_by_ocid()]
+    finally:
+        backend.close()
+
+    assert actual == [
+        ('OCDS-87SD3T-AD-SF-DRM-063-2015', ['01', '02']),
+        ('OCDS-87SD3T-AD-SF-DRM-065-2015', ['01', '02']),
+    ]
+    assert tmpdir.listdir() == []
+
+
+def test_sqlite_backend_insert_batch(monkeypatch, tmpdir):
+    monkeypatch.setattr(ocdskit.packager, 'SQLITE_INSERT_BATCH_SIZE', 2)
+    release = json.loads(read('realdata/release-package-1-2.json'))['releases'][0]
+
+    backend = SQLiteBackend(tempdir=str(tmpdir), memory_limit=1)
+    try:
+        backend.add_release(release, 'http://example.com')
+        assert tmpdir.listdir() == []
+
+        # The database is moved to a file once a batch is inserted, before the package's releases are flushed.
+        backend.add_release(release, 'http://example.com')
+        assert backend.buffer == []
+        assert len(tmpdir.listdir()) == 1
+    finally:
+        backend.close()
+
+
+@pytest.mark.parametrize('backend_class', [SQLiteBackend, PythonBackend, SortMergeBackend])
+@pytest.mark.parametrize('codec', ['json', 'zlib'])
+def test_backend_codec(backend_class, codec):
+    # Numbers with fractions are loaded as the codec decodes them: as floats or as Decimals.
+    releases = json_loads(read('realdata/release-package-1-2.json'))['releases']
+
+    backend = backend_class(codec=codec)
+    try:
+        for release in releases:
+            backend.add_release(release, 'http://example.com')
+        backend.flush()
+
+        actual = [(ocid, list(rows)) for ocid, rows in backend.get_releases_by_ocid()]
+    finally:
+        backend.close()
+
+    assert actual == [
+        ('OCDS-87SD3T-AD-SF-DRM-063-2015', [('OCDS-87SD3T-AD-SF-DRM-063-2015', 'http://example.com', release)
+                                            for release in releases[:2]]),
+        ('OCDS-87SD3T-AD-SF-DRM-065-2015', [('OCDS-87SD3T-AD-SF-DRM-065-2015', 'http://example.com', release)
+                                            for release in releases[2:]]),
+    ]
+
+
+def test_backend_codec_unknown():
+    with pytest.raises(BackendOptionError) as excinfo:
+        PythonBackend(codec='lzma')
+
+    assert str(excinfo.value) == 'codec must be one of json, zlib, not lzma'
+
+
+def test_zlib_codec():
+    releases = [{'ocid': 'a', 'id': str(i), 'tender': {'title': 'Supply of office equipment'}} for i in range(100)]
+
+    codec = ZlibCodec(dictionary_size=1024)
+    encoded = [codec.encode(release) for release in releases]
+
+    # The releases encoded before the dictionary is set are compressed without it.
+    assert encoded[0][:1] == b'\x00'
+    assert encoded[-1][:1] == b'\x01'
+    assert len(encoded[-1]) < len(encoded[0]) / 2
+    assert [codec.decode(data) for data in encoded] == releases
+
+
+def test_sqlite_backend_invalid_pragma():
+    with pytest.raises(BackendOptionError) as excinfo:
+        SQLiteBackend(pragmas={'cache_size': '1; DROP TABLE releases'})
+
+    assert str(excinfo.value) == 'invalid PRAGMA: cache_size=1; DROP TABLE releases'
+
+
+@pytest.mark.parametrize('memory_limit,max_runs,runs', [
+    (2 ** 30, 2, 0),  # in memory
+    (1, 8, 6),  # a run per release
+    (1, 2, 2),  # many passes
+])
+def test_sort_merge_backend(memory_limit, max_runs, runs, tmpdir):
+    releases = [
+        {'ocid': 'b', 'id': '1'},
+        {'ocid': 'a', 'id': '1', 'value': 1.5},
+        {'ocid': 'c', 'id': '1'},
+        {'ocid': 'b', 'id': '2'},
+        {'ocid': 'a', 'id': '2'},
+        {'ocid': 'b', 'id': '3'},
+    ]
+
+    backend = SortMergeBackend(tempdir=str(tmpdir), memory_limit=memory_limit, max_runs=max_runs)
+    try:
+        for i, release in enumerate(releases):
+            backend.add_release(release, 'http://example.com/{}'.format(i))
+        backend.flush()
+
+        actual = [(ocid, list(rows)) for ocid, rows in backend.get_releases_by_ocid()]
+
+        assert len(backend.runs) == runs
+    finally:
+        backend.close()
+
+    # The releases of an OCID are in the order in which they were added.
+    assert actual == [
+        ('a', [('a', 'http://example.com/1', releases[1]), ('a', 'http://example.com/4', releases[4])]),
+        ('b', [('b', 'http://example.com/0', releases[0]), ('b', 'http://example.com/3', releases[3]),
+               ('b', 'http://example.com/5', releases[5])]),
+        ('c', [('c', 'http://example.com/2', releases[2])]),
+    ]
+
+
+@pytest.mark.parametrize('kwargs,codec,sampled,spilled', [
+    ({}, None, False, False),  # in memory
+    ({'max_memory': 5000}, None, False, True),  # once the releases exceed max_memory
+    ({'max_memory': 5000, 'input_size': 2000}, None, True, True),  # once the releases are sampled
+    ({'max_memory': 20000, 'input_size': 100}, None, False, False),
+    ({}, 'zlib', False, False),
+    ({'max_memory': 1000}, 'zlib', False, True),
+])
+def test_hybrid_backend(kwargs, codec, sampled, spilled, tmpdir):
+    releases = [{'ocid': 'abc'[i % 3], 'id': str(i), 'value': 1.5} for i in range(30)]
+
+    backend = HybridBackend(tempdir=str(tmpdir), sample_size=3, codec=codec, **kwargs)
+    try:
+        for i, release in enumerate(releases):
+            backend.add_release(release, 'http://example.com/{}'.format(i))
+            if i == 2:
+                # The releases are moved once sampled, if the input is expected to exceed max_memory.
+                assert backend.spilled == sampled
+        backend.flush()
+
+        actual = [(ocid, list(rows)) for ocid, rows in backend.get_releases_by_ocid()]
+
+        assert backend.spilled == spilled
+    finally:
+        backend.close()
+
+    # The releases of an OCID are in the order in which they were added.
+    assert actual == [(ocid, [(ocid, 'http://example.com/{}'.format(i), releases[i]) for i in range(j, 30, 3)])
+                      for j, ocid in enumerate('abc')]
+    assert tmpdir.listdir() == []
+
+
+@pytest.mark.parametrize('on_disk', [False, True])
+@pytest.mark.parametrize('compare_content,expected,duplicates,conflicts', [
+    (False, [True, False, False, False, True, True, True, True], 3, 0),
+    (True, [True, False, True, False, True, True, True, True], 2, 1),
+])
+def test_release_deduplicator(compare_content, expected, duplicates, conflicts, on_disk, tmpdir):
+    releases = [
+        {'ocid': 'a', 'id': '1', 'value': 1},
+        {'ocid': 'a', 'id': '1', 'value': 1},
+        {'ocid': 'a', 'id': '1', 'value': 2},  # a conflicting duplicate
+        {'ocid': 'a', 'id': '1', 'value': 2},
+        {'ocid': 'a', 'id': '2', 'value': 1},
+        {'ocid': 'b', 'id': '1', 'value': 1},
+        {'ocid': 'a', 'value': 1},  # without an id
+        {'ocid': 'a', 'value': 1},
+    ]
+
+    with ReleaseDeduplicator(compare_content=compare_content, on_disk=on_disk, tempdir=str(tmpdir)) as deduplicator:
+        actual = [not deduplicator.is_duplicate(release) for release in releases]
+
+    assert actual == expected
+    assert deduplicator.duplicates == duplicates
+    assert deduplicator.conflicts == conflicts
+    assert tmpdir.listdir() == []
+
+
+def test_packager_deduplicator():
+    data = [json.loads(read('realdata/release-package-1.json'))] * 3
+    stats = Stats()
+
+    with ReleaseDeduplicator() as deduplicator:
+        with Packager(stats=stats, deduplicator=deduplicator) as packager:
+            packager.add(data)
+
+            rows = [row for _, rows in packager.backend.get_releases_by_ocid() for row in rows]
+
+    assert len(rows) == 2
+    assert stats.counters['releases'] == 6
+    assert stats.counters['duplicates'] == 4
+    assert 'deduplicate' in stats.phases
+
+
+def test_packager_backend_unknown():
+    with pytest.raises(BackendOptionError) as excinfo:
+        Packager(backend='postgresql')
+
+    assert str(excinfo.value) == 'backend must be one of sqlite, sort, hybrid, python, store, not postgresql'
+
+
+@pytest.mark.parametrize('return_versioned_release', [False, True])
+def test_output_releases_workers(return_versioned_release, monkeypatch):
+    monkeypatch.setattr(ocdskit.packager, 'MERGE_BATCH_SIZE', 1)
+
+    data = [json.loads(read(filename)) for filename in
+            ('realdata/release-package-1.json', 'realdata/release-package-2.json')]
+    merger = Merger(path('release-schema.json'))
+
+    with Packager() as packager:
+        packager.add(data)
+        expected = list(packager.output_releases(merger, return_versioned_release=return_versioned_release))
+
+    with Packager() as packager:
+        packager.add(data)
+        actual = list(packager.output_releases(merger, return_versioned_release=return_versioned_release,
+                                               workers=2))
+
+    assert len(actual) == 2
+    assert actual == expected
+
+
+def _store(path, releases, **kwargs):
+    backend = StoreBackend(path, **kwargs)
+    try:
+        for release in releases:
+            backend.add_release(release, 'http://example.com')
+        backend.flush()
+
+        return [(ocid, [row[2] for row in rows]) for ocid, rows in backend.get_releases_by_ocid()]
+    finally:
+        backend.close()
+
+
+def test_store_backend(tmpdir):
+    path = str(tmpdir.join('store.db'))
+
+    a1 = {'ocid': 'a', 'id': '1', 'date': '2001-01-01T00:00:00Z'}
+    a2 = {'ocid': 'a', 'id': '2', 'date': '2001-01-02T00:00:00Z'}
+    b1 = {'ocid': 'b', 'id': '1', 'date': '2001-01-01T00:00:00Z'}
+    b1_changed = {'ocid': 'b', 'id': '1', 'date': '2001-01-01T00:00:00Z', 'tag': ['tender']}
+
+    assert _store(path, [a1, b1]) == [('a', [a1]), ('b', [b1])]
+    # Identical releases are ignored.
+    assert _store(path, [a1, b1]) == []
+    assert _store(path, [a1, a2, b1]) == [('a', [a1, a2])]
+    # Releases whose content changed replace the stored releases.
+    assert _store(path, [b1_changed]) == [('b', [b1_changed])]
+    assert _store(path, [], changed_only=False) == [('a', [a1, a2]), ('b', [b1_changed])]
+
+    # If a run is interrupted, its OCIDs are yielded by the next run that completes.
+    for release in ({'ocid': 'c', 'id': '1'}, {'ocid': 'd', 'id': '1'}):
+        backend = StoreBackend(path)
+        backend.add_release(release, '')
+        backend.flush()
+        backend.close()
+
+    assert _store(path, [a1]) == [('c', [{'ocid': 'c', 'id': '1'}]), ('d', [{'ocid': 'd', 'id': '1'}])]
+    assert _store(path, []) == []
+
+
+def test_store_backend_concurrent_readers(tmpdir):
+    path = str(tmpdir.join('store.db'))
+
+    writer = StoreBackend(path)
+    try:
+        writer.add_release({'ocid': 'a', 'id': '1'}, '')
+        writer.flush()
+        writer.add_release({'ocid': 'b', 'id': '1'}, '')
+
+        # A reader sees the committed releases while the writer is open.
+        assert _store(path, [], changed_only=False) == [('a', [{'ocid': 'a', 'id': '1'}])]
+    finally:
+        writer.close()
+
+
+def test_output_releases_presorted():
+    data = [json.loads(read('realdata/release-package-1-2.json'))]
+    merger = Merger(path('release-schema.json'))
+
+    with Packager() as packager:
+        packager.add(data)
+        expected = list(packager.output_releases(merger))
+
+    with Packager(presorted=True) as packager:
+        packager.add(iter(data))
+
+        assert packager.version == '1.0'
+
+        actual = list(packager.output_releases(merger))
+
+    assert len(actual) == 2
+    assert actual == expected
+
+
+def test_output_releases_presorted_out_of_order():
+    releases = [
+        {'ocid': 'a', 'id': '1', 'date': '2001-01-01T00:00:00Z'},
+        {'ocid': 'b', 'id': '1', 'date': '2001-01-01T00:00:00Z'},
+        {'ocid': 'a', 'id': '2', 'date': '2001-01-02T00:00:00Z'},
+    ]
+
+    with Packager(presorted=True) as packager:
+        packager.add(releases)
+
+        with pytest.raises(OutOfOrderOcidError) as excinfo:
+            list(packager.output_releases(Merger(path('release-schema.json'))))
+
+    assert excinfo.value.ocid == 'a'
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_output_releases_cache(workers, tmpdir):
+    data = [json.loads(read(filename)) for filename in
+            ('realdata/release-package-1.json', 'realdata/release-package-2.json')]
+    merger = Merger(path('release-schema.json'))
+
+    expected = {}
+    for return_versioned_release in (False, True):
+        with Packager() as packager:
+            packager.add(data)
+            expected[return_versioned_release] = list(packager.output_releases(
+                merger, return_versioned_release=return_versioned_release))
+
+    # The cache has no versioned releases until versioned releases are requested, after which it has both.
+    for hits, misses, return_versioned_release in (
+        (0, 2, False), (2, 0, False), (0, 2, True), (2, 0, True), (2, 0, False),
+    ):
+        stats = Stats()
+        with ReleaseCache(str(tmpdir.join('cache.db'))) as cache, Packager(stats=stats, cache=cache) as packager:
+            packager.add(data)
+            actual = list(packager.output_releases(merger, return_versioned_release=return_versioned_release,
+                                                   workers=workers))
+
+        assert stats.counters['cache_hits'] == hits
+        assert stats.counters['cache_misses'] == misses
+        assert actual == expected[return_versioned_release]
+
+
+def test_release_cache_digest():
+    fingerprint = ReleaseCache.fingerprint(Merger(path('release-schema.json')))
+    other = ReleaseCache.fingerprint(Merger(path('release-schema.json'), rule_overrides={('tag',): 'append'}))
+
+    a1 = {'ocid': 'a', 'id': '1', 'date': '2001-01-01T00:00:00Z'}
+    a2 = {'ocid': 'a', 'id': '2', 'date': '2001-01-02T00:00:00Z'}
+    a2_later = {'ocid': 'a', 'id': '2', 'date': '2001-01-03T00:00:00Z'}
+
+    assert ReleaseCache.digest([a1, a2], fingerprint) == ReleaseCache.digest([a2, a1], fingerprint)
+    assert ReleaseCache.digest([a1, a2], fingerprint) != ReleaseCache.digest([a1, a2_later], fingerprint)
+    assert ReleaseCache.digest([a1, a2], fingerprint) != ReleaseCache.digest([a1], fingerprint)
+    assert ReleaseCache.digest([a1, a2], fingerprint) != ReleaseCache.digest([a1, a2], other)
+
+
+def test_release_cache_eviction(tmpdir):
+    with ReleaseCache(str(tmpdir.join('cache.db')), max_size=30) as cache:
+        for key in ('a', 'b', 'c'):
+            cache.set(key, {'id': key})  # 10 bytes each
+        cache.get('a')
+        cache.set('d', {'id': 'd'})
+        cache.commit()
+
+        # The least recently used entry is evicted.
+        assert cache.size == 30
+        assert cache.get('b') is None
+        assert cache.get('a') == ({'id': 'a'}, None)
+
+        # An entry without a requested release is a miss.
+        assert cache.get('a', compiled=False, versioned=True) is None
+
+    with ReleaseCache(str(tmpdir.join('cache.db')), max_size=30) as cache:
+        assert cache.size == 30
+        assert cache.get('c') == ({'id': 'c'}, None)
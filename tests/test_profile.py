@@ -0,0 +1,48 @@
+import pstats
+import re
+import signal
+import time
+
+import pytest
+
+from ocdskit.cli.profile import DeterministicProfiler, SamplingProfiler
+
+
+def _busy(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def test_deterministic_profiler(tmpdir):
+    filename = str(tmpdir.join('profile.pstats'))
+
+    profiler = DeterministicProfiler(filename)
+    profiler.start()
+    _busy(0.01)
+    profiler.stop()
+
+    functions = pstats.Stats(filename).stats
+    assert any(function == '_busy' for _, _, function in functions)
+
+
+@pytest.mark.parametrize('use_signal', [True, False])
+def test_sampling_profiler(use_signal, tmpdir, monkeypatch):
+    if not use_signal:
+        monkeypatch.delattr(signal, 'setitimer', raising=False)
+
+    filename = str(tmpdir.join('profile.folded'))
+
+    profiler = SamplingProfiler(filename, interval=0.001)
+    profiler.start()
+    _busy(0.1)
+    profiler.stop()
+
+    with open(filename) as f:
+        lines = f.read().splitlines()
+
+    assert lines
+    for line in lines:
+        assert re.search(r'^\S.* \d+$', line)
+    assert any(re.search(r';test_sampling_profiler \(test_profile\.py:\d+\);_busy \(test_profile\.py:\d+\)', line)
+               for line in lines)
@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+
+import pytest
+import requests
+from ocdsmerge import Merger
+
+import ocdskit.schema_cache
+from ocdskit.exceptions import SchemaCacheMissError
+from ocdskit.schema_cache import SchemaCache
+from tests import path, read
+
+URL = 'https://standard.open-contracting.org/schema/{}/release-schema.json'
+
+
+class ProfileBuilder:
+    def __init__(self, standard_tag, extension_versions):
+        self.standard_tag = standard_tag
+        self.extension_versions = extension_versions
+
+    def patched_release_schema(self, schema=None, extension_field=None):
+        schema = schema or json.loads(read('release-schema.json'))
+        schema['extensions'] = self.extension_versions
+        return schema
+
+
+def test_get_merger(schema_downloads, tmpdir):
+    expected = Merger(path('release-schema.json')).merge_rules
+
+    assert SchemaCache(str(tmpdir)).get_merger(tag='1__0__3').merge_rules == expected
+    assert schema_downloads == [URL.format('1__0__3')]
+
+    # The merge rules are read from the cache.
+    assert SchemaCache(str(tmpdir), offline=True).get_merger(tag='1__0__3').merge_rules == expected
+    assert SchemaCache(str(tmpdir)).get_merger(tag='1__0__3').merge_rules == expected
+    assert schema_downloads == [URL.format('1__0__3')]
+
+    # The latest tag is the default.
+    assert SchemaCache(str(tmpdir)).get_merger().merge_rules == expected
+    assert schema_downloads == [URL.format('1__0__3'), 'tags', URL.format('1__1__4')]
+
+
+def test_get_merger_schema(schema_downloads, tmpdir):
+    expected = Merger(path('release-schema.json')).merge_rules
+    schema_cache = SchemaCache(str(tmpdir))
+
+    assert schema_cache.get_merger(json.loads(read('release-schema.json'))).merge_rules == expected
+    # A local path isn't cached.
+    assert schema_cache.get_merger(path('release-schema.json')).merge_rules == expected
+    assert len(os.listdir(str(tmpdir.join('merge-rules')))) == 1
+    assert schema_downloads == []
+
+
+def test_get_merger_url(schema_downloads, tmpdir):
+    expected = Merger(path('release-schema.json')).merge_rules
+    url = 'http://example.com/release-schema.json'
+
+    assert SchemaCache(str(tmpdir)).get_merger(url).merge_rules == expected
+    assert SchemaCache(str(tmpdir)).get_merger(url).merge_rules == expected
+    assert schema_downloads == [url]
+
+    # The merge rules of a schema at a URL expire, like when refreshing the cache.
+    assert SchemaCache(str(tmpdir), max_age=0).get_merger(url).merge_rules == expected
+    assert schema_downloads == [url, url]
+
+
+def test_get_expired(schema_downloads, monkeypatch, tmpdir, caplog):
+    url = 'http://example.com/release-schema.json'
+    SchemaCache(str(tmpdir)).get_merger(url)
+
+    def download(url):
+        raise requests.ConnectionError('failed')
+
+    monkeypatch.setattr(ocdskit.schema_cache, '_download', download)
+
+    with caplog.at_level(logging.WARNING):
+        merger = SchemaCache(str(tmpdir), max_age=0).get_merger(url)
+
+    assert merger.merge_rules == Merger(path('release-schema.json')).merge_rules
+    assert len(caplog.records) == 1
+    assert caplog.records[0].levelname == 'WARNING'
+    assert caplog.records[0].message == 'the merge rules of {} could not be downloaded again, so the expired copy ' \
+                                        'in the schema cache is used: failed'.format(url)
+
+    # A file that isn't cached raises an error.
+    with pytest.raises(requests.ConnectionError):
+        SchemaCache(str(tmpdir), max_age=0).get_merger('http://example.com/other.json')
+
+
+def test_get_latest_tag(schema_downloads, tmpdir):
+    schema_cache = SchemaCache(str(tmpdir), max_age=0)
+
+    assert schema_cache.get_latest_tag('1.0') == '1__0__3'
+    assert schema_cache.get_latest_tag() == '1__1__4'
+    # The tags expire.
+    assert schema_downloads == ['tags', 'tags']
+
+    # The tags don't expire if offline.
+    assert SchemaCache(str(tmpdir), offline=True, max_age=0).get_latest_tag() == '1__1__4'
+    assert schema_downloads == ['tags', 'tags']
+
+
+def test_get_patched_release_schema(schema_downloads, monkeypatch, tmpdir):
+    monkeypatch.setattr(ocdskit.schema_cache, 'ProfileBuilder', ProfileBuilder)
+
+    schema_cache = SchemaCache(str(tmpdir))
+    schema = schema_cache.get_patched_release_schema('1__1__4', ['http://example.com/b', 'http://example.com/a'])
+
+    assert schema['extensions'] == ['http://example.com/b', 'http://example.com/a']
+
+    # The merge rules are keyed by the sorted extensions.
+    merger = schema_cache.get_merger(tag='1__1__4', extensions=['http://example.com/b', 'http://example.com/a'])
+    offline = SchemaCache(str(tmpdir), offline=True)
+
+    assert offline.get_merger(tag='1__1__4', extensions=['http://example.com/a', 'http://example.com/b']).merge_rules \
+        == merger.merge_rules
+
+
+def test_offline_miss(tmpdir):
+    with pytest.raises(SchemaCacheMissError) as excinfo:
+        SchemaCache(str(tmpdir), offline=True).get_merger(tag='1__1__4')
+
+    assert str(excinfo.value) == 'the merge rules of 1__1__4 is not in the schema cache at {}, and the cache is ' \
+                                 'offline'.format(tmpdir)
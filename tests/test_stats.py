@@ -0,0 +1,125 @@
+import tracemalloc
+
+import pytest
+
+from ocdskit.stats import TOP_ALLOCATIONS, NullStats, Stats
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    # Each call to `_now` advances the wall time by 1 second and the CPU time by 0.5 seconds.
+    times = iter((i, i / 2) for i in range(1000))
+    monkeypatch.setattr(Stats, '_now', staticmethod(lambda: next(times)))
+    return Stats()
+
+
+def test_count(stats):
+    stats.count('items')
+    stats.count('items', 2)
+
+    assert stats.counters == {'items': 3}
+
+
+def test_phase(stats):
+    with stats.phase('parse'):
+        pass
+
+    assert stats.phases == {'parse': {'wall': 1, 'cpu': 0.5, 'calls': 1}}
+
+
+def test_phase_nested(stats):
+    with stats.phase('merge'):  # 1
+        with stats.phase('backend'):  # 2 to 3
+            pass
+    # 4
+
+    # The outer phase is paused while the nested phase runs.
+    assert stats.phases == {
+        'merge': {'wall': 2, 'cpu': 1, 'calls': 2},
+        'backend': {'wall': 1, 'cpu': 0.5, 'calls': 1},
+    }
+
+
+def test_iterate(stats):
+    assert list(stats.iterate('parse', 'ab')) == ['a', 'b']
+
+    assert stats.phases == {'parse': {'wall': 3, 'cpu': 1.5, 'calls': 3}}
+
+
+def test_as_dict(stats):
+    stats.count('items', 10)
+    with stats.phase('write'):
+        pass
+    with stats.phase('parse'):
+        pass
+
+    assert stats.as_dict() == {
+        'wall': 5,
+        'cpu': 2.5,
+        'counters': {'items': 10},
+        'rates': {'items': 2},
+        'phases': {
+            'parse': {'wall': 1, 'cpu': 0.5, 'calls': 1},
+            'write': {'wall': 1, 'cpu': 0.5, 'calls': 1},
+        },
+        'checkpoints': [],
+    }
+
+
+def test_report(stats):
+    stats.count('items', 10)
+    with stats.phase('parse'):
+        pass
+
+    assert stats.report() == (
+        'items: 10 (3.3/s)\n'
+        'total: 3.000s wall, 1.500s CPU\n'
+        'phase        wall (s)    CPU (s)      calls\n'
+        'parse           1.000      0.500          1'
+    )
+
+
+def test_null_stats():
+    stats = NullStats()
+    stats.count('items')
+    with stats.phase('parse'):
+        pass
+    iterable = [1, 2]
+
+    assert stats.iterate('parse', iterable) is iterable
+    assert stats.counters == {}
+    assert stats.phases == {}
+
+
+def test_checkpoint():
+    stats = Stats()
+    stats.checkpoint('start')
+
+    assert len(stats.checkpoints) == 1
+    assert stats.checkpoints[0]['name'] == 'start'
+    assert stats.checkpoints[0]['peak_rss'] > 0
+    assert 'top' not in stats.checkpoints[0]
+
+
+def _allocate():
+    return [str(i) for i in range(10000)]
+
+
+def test_checkpoint_trace_memory():
+    stats = Stats(trace_memory=True)
+    try:
+        data = _allocate()
+        stats.checkpoint('allocate')
+    finally:
+        stats.close()
+
+    checkpoint = stats.checkpoints[0]
+
+    assert data
+    assert not tracemalloc.is_tracing()
+    assert checkpoint['traced'] > 0
+    assert checkpoint['traced_peak'] >= checkpoint['traced']
+    assert len(checkpoint['top']) <= TOP_ALLOCATIONS
+    assert checkpoint['top'][0]['site'].endswith('test_stats.py:{}'.format(_allocate.__code__.co_firstlineno + 1))
+    assert checkpoint['top'][0]['size_diff'] > 0
+    assert 'allocate: peak RSS ' in stats.report()
@@ -1,9 +1,14 @@
 import json
+from collections import OrderedDict
+from decimal import Decimal
 
 import pytest
 
-from ocdskit.util import (detect_format, get_ocds_minor_version, is_compiled_release, is_linked_release, is_package,
-                          is_record, is_record_package, is_release, is_release_package, json_dump)
+import ocdskit.util
+from ocdskit.util import (MmapReader, detect_format, get_ijson_backend, get_ocds_minor_version, is_compiled_release,
+                          is_linked_release, is_package, is_record, is_record_package, is_release, is_release_package,
+                          iterencode, iterencodeb, json_dump, json_dumpb, json_dumps, json_loads, set_ijson_backend,
+                          zero_copy_reader)
 from tests import path, read
 
 
@@ -126,6 +131,46 @@ def test_json_dump(data, expected, tmpdir):
     assert p.read() == expected
 
 
+@pytest.mark.parametrize('kwargs,expected', [
+    ({}, b'{"a":"\xc3\xa9"}'),
+    ({'ensure_ascii': True}, b'{"a":"\\u00e9"}'),
+    ({'indent': 2}, b'{\n  "a": "\xc3\xa9"\n}'),
+])
+def test_json_dumpb(kwargs, expected):
+    assert json_dumpb({'a': '\u00e9'}, **kwargs) == expected
+
+
+def test_json_dumps_nested_iterator():
+    assert json_dumps({'a': {'b': iter([1, 2])}}) == '{"a":{"b":[1,2]}}'
+
+
+@pytest.mark.parametrize('using_orjson', [True, False])
+def test_json_dumps_iterator_non_string_key(using_orjson, monkeypatch):
+    monkeypatch.setattr(ocdskit.util, 'USING_ORJSON', using_orjson and ocdskit.util.USING_ORJSON)
+
+    assert json_dumps({'a': (i for i in range(3)), 'b': {1: 2}}) == '{"a":[0,1,2],"b":{"1":2}}'
+
+
+@pytest.mark.parametrize('data', [
+    lambda: {'a': 1, 'b': iter([{'c': '\u00e9\U0001f600', 'd': [1, {'e': 2}]}, 3]), 'f': {'g': [1]}, 'h': iter([])},
+    lambda: {'a': {'b': iter([1, 2])}, 'c': iter([{'d': {}}, []])},
+    lambda: iter([{'a': iter([1.5])}]),
+    lambda: {'\u00e9': iter(['\u00e9']), 1: iter([]), 1.5: 2, False: 3, None: {'\u00fc': 1, 2: '\u00fc'}},
+    lambda: iter([]),
+    lambda: {},
+])
+@pytest.mark.parametrize('kwargs', [{}, {'indent': 2}, {'ensure_ascii': True}, {'indent': 2, 'ensure_ascii': True}])
+def test_iterencodeb(data, kwargs):
+    options = {'ensure_ascii': False, 'separators': (',', ':')}
+    if 'indent' in kwargs:
+        del options['separators']
+    options.update(kwargs)
+    expected = ''.join(json.JSONEncoder(default=list, **options).iterencode(data())).encode()
+
+    assert b''.join(iterencodeb(data(), **kwargs)) == expected
+    assert ''.join(iterencode(data(), **kwargs)).encode() == expected
+
+
 @pytest.mark.parametrize('filename,expected', [
     ('record-package_minimal.json', ('record package', False, False)),
     ('release-package_minimal.json', ('release package', False, False)),
@@ -142,3 +187,61 @@ def test_detect_format(filename, expected):
     result = detect_format(path(filename))
 
     assert result == expected
+
+
+def test_detect_format_buf_size():
+    result = detect_format(path('release-packages.jsonl'), buf_size=3)
+
+    assert result == ('release package', True, True)
+
+
+@pytest.mark.parametrize('backend', ['python', 'yajl2_c'])
+def test_set_ijson_backend(backend, monkeypatch):
+    monkeypatch.setattr(ocdskit.util, '_ijson_backend', get_ijson_backend())
+
+    set_ijson_backend(backend)
+    result = detect_format(path('release-packages.jsonl'))
+
+    assert get_ijson_backend().backend == backend
+    assert result == ('release package', True, True)
+
+
+@pytest.mark.parametrize('data', ['{"a": {"b": [1, 2.5]}}', b'{"a": {"b": [1, 2.5]}}'])
+def test_json_loads(data):
+    assert json_loads(data) == {'a': {'b': [1, 2.5]}}
+
+
+def test_json_loads_object_pairs_hook():
+    data = json_loads(b'{"b": 1, "a": {"c": 1.1}}', object_pairs_hook=OrderedDict)
+
+    assert data == OrderedDict([('b', 1), ('a', OrderedDict([('c', Decimal('1.1'))]))])
+    assert isinstance(data['a'], OrderedDict)
+
+
+def test_mmap_reader():
+    with open(path('release_minimal.json'), 'rb') as f:
+        expected = f.read()
+
+        with MmapReader(f) as reader:
+            assert reader.read(0) == b''
+
+            actual = reader.read(10)
+            assert isinstance(actual, memoryview)
+            assert bytes(actual) == expected[:10]
+
+            actual = reader.read()
+            assert bytes(actual) == expected[10:]
+
+            assert not reader.read(10)
+
+
+def test_mmap_reader_empty(tmpdir):
+    file = tmpdir.join('empty.json')
+    file.write('')
+
+    with open(str(file), 'rb') as f:
+        with pytest.raises(ValueError):
+            MmapReader(f)
+
+        with zero_copy_reader(f) as reader:
+            assert reader is f